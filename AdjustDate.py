@@ -11,6 +11,7 @@ import argparse
 import re
 from dateutil import parser as dateparser
 from datetime import datetime, timedelta
+from dateTools import parsedatetime
 from pytimeparse.timeparse import timeparse
 
 exec(open(os.path.dirname(os.path.realpath(__file__)) + os.path.sep + 'DataTypes.py').read())
@@ -61,12 +62,8 @@ try:
 
             print ("Updating " + str(len(rows)) + " rows.")
             for row in rows:
-                if type(row['_CreatedDate']) == unicode:    # ???
-                    createdDate  = dateparser.parse(row['_CreatedDate'])
-                    modifiedDate = dateparser.parse(row['_ModifiedDate'])
-                else:
-                    createdDate  = row['_CreatedDate']
-                    modifiedDate = row['_ModifiedDate']
+                createdDate  = parsedatetime(row['_CreatedDate'])
+                modifiedDate = parsedatetime(row['_ModifiedDate'])
                 if createdDate <= before:
                     createdDate  += adjust
                 if modifiedDate <= before:
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import argparse
+import os
+import sys
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+from sqlalchemy import *
+
+# Project sizes, as arguments to GenerateProject.py. Sources are JPEG images so that
+# every pipeline, Denormalise included, runs without LibreOffice.
+SIZES = {
+    'small':  ['--source-count', '50',   '--node-count', '50',   '--depth', '3', '--tagging-count', '500',   '--annotation-count', '50'],
+    'medium': ['--source-count', '500',  '--node-count', '200',  '--depth', '4', '--tagging-count', '5000',  '--annotation-count', '500'],
+    'large':  ['--source-count', '5000', '--node-count', '1000', '--depth', '5', '--tagging-count', '50000', '--annotation-count', '5000']
+}
+
+# Platforms, as the arguments that GenerateProject.py, NormaliseDB.py and DenormaliseDB.py
+# take to generate and convert a project in each format. Plain projects are in the NVivo
+# for Windows format but without its name coding.
+PLATFORMS = {
+    'plain':   [],
+    'windows': ['--windows'],
+    'mac':     ['--mac']
+}
+
+PIPELINES = ['Normalise', 'Denormalise', 'Norm2RQDA', 'RQDA2Norm', 'CompareDBs', 'Subtract']
+
+# Pipelines whose output each pipeline reads
+REQUIRES = {'Normalise':   [],
+            'Denormalise': ['Normalise'],
+            'Norm2RQDA':   ['Normalise'],
+            'RQDA2Norm':   ['Norm2RQDA'],
+            'CompareDBs':  ['Denormalise'],
+            'Subtract':    ['RQDA2Norm']}
+
+scriptpath = os.path.dirname(os.path.realpath(__file__)) + os.path.sep
+
+parser = argparse.ArgumentParser(description='Benchmark the conversion pipelines on synthetic projects, optionally failing if any is slower than a baseline.')
+
+parser.add_argument('-v', '--verbosity', type=int, default=1)
+
+parser.add_argument('--sizes', type=str, default='small,medium',
+                    help='Comma-separated project sizes, from ' + ', '.join(sorted(SIZES.keys())) + '.')
+parser.add_argument('--platforms', type=str, default='windows,mac',
+                    help='Comma-separated platforms, from ' + ', '.join(sorted(PLATFORMS.keys())) + '.')
+parser.add_argument('--pipelines', type=str, default=','.join(PIPELINES),
+                    help='Comma-separated pipelines to run.')
+parser.add_argument('--repeat', type=int, default=3,
+                    help='Number of runs of each pipeline, of which the fastest is kept.')
+parser.add_argument('--seed', type=int, default=0,
+                    help='Random seed for the synthetic projects.')
+
+parser.add_argument('--baseline', type=str,
+                    help='Baseline results file to compare against.')
+parser.add_argument('--threshold', type=float, default=20.0,
+                    help='Percentage by which a pipeline may be slower than the baseline before the run fails.')
+parser.add_argument('--min-difference', type=float, default=0.1,
+                    help='Slowdowns of fewer seconds than this are ignored as noise.')
+parser.add_argument('--save', type=str,
+                    help='Write the results to this file, for use as a later baseline.')
+
+parser.add_argument('--workdir', type=str,
+                    help='Directory for the generated projects, otherwise a temporary directory that is removed afterwards.')
+
+args = parser.parse_args()
+
+sizes = args.sizes.split(',')
+platforms = args.platforms.split(',')
+pipelines = args.pipelines.split(',')
+for size in sizes:
+    if size not in SIZES:
+        raise RuntimeError("ERROR: Unknown project size: " + size)
+for platform in platforms:
+    if platform not in PLATFORMS:
+        raise RuntimeError("ERROR: Unknown platform: " + platform)
+for pipeline in pipelines:
+    if pipeline not in PIPELINES:
+        raise RuntimeError("ERROR: Unknown pipeline: " + pipeline)
+
+# Pipelines that must run, either to be measured or to provide input to another
+needed = set()
+def need(pipeline):
+    if pipeline not in needed:
+        needed.add(pipeline)
+        for required in REQUIRES[pipeline]:
+            need(required)
+for pipeline in pipelines:
+    need(pipeline)
+
+workdir = os.path.abspath(args.workdir or tempfile.mkdtemp())
+if not os.path.isdir(workdir):
+    os.makedirs(workdir)
+DEVNULL = open(os.devnull, 'wb')
+
+# Peak resident set size of a finished child process, in bytes
+def childrss(rusage):
+    return rusage.ru_maxrss if sys.platform == 'darwin' else rusage.ru_maxrss * 1024
+
+# Run a script, returning its wall time and peak memory
+def runscript(script, arglist):
+    command = [sys.executable, scriptpath + script] + arglist
+    if args.verbosity > 1:
+        print("Running " + ' '.join(command), file=sys.stderr)
+
+    started = time.time()
+    proc = subprocess.Popen(command, cwd=workdir, stdout=DEVNULL, stderr=(None if args.verbosity > 1 else DEVNULL))
+    if hasattr(os, 'wait4'):
+        pid, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
+        peakrss = childrss(rusage)
+    else:
+        proc.wait()
+        peakrss = None
+    walltime = time.time() - started
+
+    if proc.returncode != 0:
+        raise RuntimeError("ERROR: " + ' '.join(command) + " failed with status " + str(proc.returncode))
+
+    return walltime, peakrss
+
+# Number of rows in every table of a SQLite file
+def rowcount(filename):
+    db = create_engine('sqlite:///' + os.path.join(workdir, filename))
+    md = MetaData(bind=db)
+    md.reflect(db)
+    count = sum(db.execute(select([func.count()]).select_from(table)).scalar() for table in md.sorted_tables)
+    db.dispose()
+    return count
+
+def remove(filename):
+    path = os.path.join(workdir, filename)
+    if os.path.exists(path):
+        os.remove(path)
+
+results = {}
+try:
+    for size in sizes:
+        for platform in platforms:
+            # Projects, files and results are named for both size and platform
+            name = size + '-' + platform
+            if args.verbosity > 0:
+                print("Generating " + size + " " + platform + " project", file=sys.stderr)
+
+            project = name + '.nvivo'
+            empty   = name + '-empty.nvivo'
+            generate = ['-v', '0', '--object-type', 'JPEG', '--seed', str(args.seed)] + PLATFORMS[platform]
+            runscript('GenerateProject.py', generate + SIZES[size] + [project])
+            runscript('GenerateProject.py', generate + ['--empty', empty])
+
+            # Each pipeline, with its input file, the files it writes and its arguments
+            steps = {
+                'Normalise':   (project, [name + '.norm'],
+                                ['NormaliseDB.py', '-v', '0'] + PLATFORMS[platform] + ['sqlite:///' + project, 'sqlite:///' + name + '.norm']),
+                'Denormalise': (name + '.norm', [name + '-denorm.nvivo'],
+                                ['DenormaliseDB.py', '-v', '0'] + PLATFORMS[platform] + ['sqlite:///' + name + '.norm', 'sqlite:///' + name + '-denorm.nvivo']),
+                'Norm2RQDA':   (name + '.norm', [name + '.rqda'],
+                                ['Norm2RQDA.py', '-v', '0', name + '.norm', name + '.rqda']),
+                'RQDA2Norm':   (name + '.rqda', [name + '-rqda.norm'],
+                                ['RQDA2Norm.py', '-v', '0', name + '.rqda', name + '-rqda.norm']),
+                'CompareDBs':  (project, [],
+                                ['CompareDBs.py', 'sqlite:///' + project, 'sqlite:///' + name + '-denorm.nvivo']),
+                'Subtract':    (name + '.norm', [],
+                                ['Subtract.py', 'sqlite:///' + name + '.norm', 'sqlite:///' + name + '-rqda.norm'])
+            }
+
+            results[name] = {}
+            for pipeline in PIPELINES:
+                if pipeline not in needed:
+                    continue
+
+                infile, outfiles, command = steps[pipeline]
+                runs = args.repeat if pipeline in pipelines else 1
+                best = None
+                for run in range(runs):
+                    for outfile in outfiles:
+                        remove(outfile)
+                    if pipeline == 'Denormalise':
+                        shutil.copyfile(os.path.join(workdir, empty), os.path.join(workdir, outfiles[0]))
+
+                    statsfile = None
+                    arglist = command[1:]
+                    if command[0] not in ['CompareDBs.py', 'Subtract.py']:
+                        statsfile = os.path.join(workdir, name + '-' + pipeline + '.json')
+                        arglist = ['--stats', statsfile] + arglist
+
+                    walltime, peakrss = runscript(command[0], arglist)
+                    if best is None or walltime < best['WallTime']:
+                        best = {'WallTime': walltime, 'PeakRSS': peakrss, 'Phases': {}}
+                        if statsfile is not None:
+                            with open(statsfile) as statsfileptr:
+                                stats = json.load(statsfileptr)
+                            best['Phases'] = dict((phase['Phase'], phase['WallTime']) for phase in stats['Phases'])
+
+                if pipeline in pipelines:
+                    best['Rows'] = rowcount(infile)
+                    best['RowsPerSecond'] = best['Rows'] / best['WallTime'] if best['WallTime'] > 0 else None
+                    results[name][pipeline] = best
+
+                    if args.verbosity > 0:
+                        print("{:16} {:12} {:8.2f}s {:10.0f} rows/s {:8.1f} MB".format(
+                              name, pipeline, best['WallTime'], best['RowsPerSecond'] or 0,
+                              (best['PeakRSS'] or 0) / 1048576.0), file=sys.stderr)
+
+finally:
+    if not args.workdir:
+        shutil.rmtree(workdir)
+
+if args.save:
+    with open(args.save, 'w') as savefile:
+        json.dump({'Threshold': args.threshold, 'Results': results}, savefile, indent=2, sort_keys=True)
+
+# Compare with the baseline, failing on any pipeline that is slower by more than the threshold
+regressions = []
+if args.baseline:
+    with open(args.baseline) as baselinefile:
+        baseline = json.load(baselinefile)['Results']
+
+    for name in sorted(results.keys()):
+        for pipeline in pipelines:
+            previous = baseline.get(name, {}).get(pipeline)
+            if previous is None:
+                if args.verbosity > 0:
+                    print("No baseline for " + name + " " + pipeline, file=sys.stderr)
+                continue
+
+            current = results[name][pipeline]
+            change = 100.0 * (current['WallTime'] - previous['WallTime']) / previous['WallTime'] if previous['WallTime'] > 0 else 0.0
+            if change > args.threshold and current['WallTime'] - previous['WallTime'] > args.min_difference:
+                regressions.append((name, pipeline))
+                print("REGRESSION: {} {} took {:.2f}s against {:.2f}s in the baseline ({:+.1f}%)".format(
+                      name, pipeline, current['WallTime'], previous['WallTime'], change), file=sys.stderr)
+                for phase, phasetime in sorted(current['Phases'].items()):
+                    previousphase = previous.get('Phases', {}).get(phase)
+                    if previousphase is not None:
+                        print("    {:20} {:8.2f}s against {:8.2f}s".format(phase, phasetime, previousphase), file=sys.stderr)
+            elif args.verbosity > 0:
+                print("{:16} {:12} {:+.1f}% against baseline".format(name, pipeline, change), file=sys.stderr)
+
+if regressions:
+    sys.exit(1)
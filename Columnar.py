@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import os
+import sys
+import re
+from sqlalchemy import *
+from NVivoNorm import NVivoNorm
+from blobTools import BlobData, resolvedbblobs
+from mergeTools import merge_overwrite_or_replace
+import pyarrow
+import pyarrow.parquet
+
+exec(open(os.path.dirname(os.path.realpath(__file__)) + os.path.sep + 'DataTypes.py').read())
+
+# Number of rows in each Parquet row group or Arrow record batch. Tables are read and
+# written this many rows at a time.
+ROWGROUPSIZE = 65536
+
+EXTENSIONS = {'parquet': '.parquet',
+              'arrow':   '.arrow'}
+
+# Tagging fragments, eg 120:245 or 120:245,3:4, are also written as integer columns
+FRAGMENT = re.compile(r'^(\d+):(\d+)(?:,(\d+)(?::(\d+))?)?$')
+FRAGMENTCOLUMNS = ['StartX', 'EndX', 'StartY', 'EndY']
+
+def arrowtype(sqltype):
+    if isinstance(sqltype, UUID):
+        return pyarrow.string()
+    elif isinstance(sqltype, Boolean):
+        return pyarrow.bool_()
+    elif isinstance(sqltype, Integer):
+        return pyarrow.int64()
+    elif isinstance(sqltype, DateTime):
+        return pyarrow.timestamp('us')
+    elif isinstance(sqltype, (LargeBinary, BlobData)):
+        return pyarrow.binary()
+    else:
+        return pyarrow.string()
+
+def splitfragment(row):
+    match = FRAGMENT.match(row['Fragment'] or '')
+    for index, column in enumerate(FRAGMENTCOLUMNS):
+        value = match.group(index + 1) if match else None
+        row[column] = int(value) if value is not None else None
+
+def Norm2Columnar(args):
+    # Initialise DB variables so exception handlers don't freak out
+    normdb = None
+
+    try:
+        normdb = create_engine(args.indb)
+        normmd = MetaData(bind=normdb)
+        normmd.reflect(normdb)
+
+        # Blobs are written in full so that the columnar set stands alone
+        resolvedbblobs(normdb, normmd)
+
+        fileformat = getattr(args, 'format', None) or 'parquet'
+        rowgroupsize = getattr(args, 'row_group_size', None) or ROWGROUPSIZE
+
+        if not os.path.isdir(args.outdir):
+            os.makedirs(args.outdir)
+
+        for table in normmd.sorted_tables:
+            if args.verbosity > 0:
+                print("Exporting " + table.name, file=sys.stderr)
+
+            fields = [pyarrow.field(column.name, arrowtype(column.type)) for column in table.columns]
+            if table.name == 'Tagging':
+                fields += [pyarrow.field(column, pyarrow.int64()) for column in FRAGMENTCOLUMNS]
+            schema = pyarrow.schema(fields)
+
+            filename = os.path.join(args.outdir, table.name + EXTENSIONS[fileformat])
+            if fileformat == 'parquet':
+                writer = pyarrow.parquet.ParquetWriter(filename, schema)
+            else:
+                sink = pyarrow.OSFile(filename, 'wb')
+                writer = pyarrow.RecordBatchFileWriter(sink, schema)
+
+            cursor = normdb.execute(select([table]).execution_options(stream_results=True))
+            rowcount = 0
+            while True:
+                rows = [dict(row) for row in cursor.fetchmany(rowgroupsize)]
+                # An empty table is still written, so that its schema is kept
+                if len(rows) == 0 and rowcount > 0:
+                    break
+
+                for row in rows:
+                    for column in table.columns:
+                        if isinstance(column.type, UUID) and row[column.name] is not None:
+                            row[column.name] = unicode(row[column.name]).upper()
+                    if table.name == 'Tagging':
+                        splitfragment(row)
+
+                arrays = [pyarrow.array([row[field.name] for row in rows], type=field.type) for field in fields]
+                batch = pyarrow.RecordBatch.from_arrays(arrays, schema.names)
+                if fileformat == 'parquet':
+                    writer.write_table(pyarrow.Table.from_batches([batch]))
+                else:
+                    writer.write_batch(batch)
+
+                rowcount += len(rows)
+                if len(rows) < rowgroupsize:
+                    break
+
+            cursor.close()
+            writer.close()
+            if fileformat != 'parquet':
+                sink.close()
+
+            if args.verbosity > 1:
+                print("Exported " + str(rowcount) + " rows from " + table.name, file=sys.stderr)
+
+        normdb.dispose()
+
+    except:
+        raise
+        normdb.dispose()
+
+######################################################################################
+
+# Read a columnar file a row group or record batch at a time, yielding lists of rows
+def readcolumnar(filename):
+    if filename.endswith(EXTENSIONS['parquet']):
+        parquetfile = pyarrow.parquet.ParquetFile(filename)
+        for rowgroup in range(parquetfile.num_row_groups):
+            columns = parquetfile.read_row_group(rowgroup).to_pydict()
+            yield [dict(zip(columns.keys(), values)) for values in zip(*columns.values())]
+    else:
+        reader = pyarrow.RecordBatchFileReader(pyarrow.memory_map(filename, 'r'))
+        for index in range(reader.num_record_batches):
+            columns = reader.get_batch(index).to_pydict()
+            yield [dict(zip(columns.keys(), values)) for values in zip(*columns.values())]
+
+def Columnar2Norm(args):
+    norm = None
+
+    try:
+        norm = NVivoNorm(args.outfilename)
+        norm.begin()
+
+        operation = getattr(args, 'operation', None) or 'overwrite'
+
+        # Tables in the order that their foreign keys require
+        for table in norm.md.sorted_tables:
+            for extension in EXTENSIONS.values():
+                filename = os.path.join(args.indir, table.name + extension)
+                if os.path.isfile(filename):
+                    break
+            else:
+                continue
+
+            if args.verbosity > 0:
+                print("Importing " + table.name, file=sys.stderr)
+
+            # The project table has no key, so it is simply replaced
+            if table.name == 'Project':
+                norm.con.execute(table.delete())
+
+            keycolumns = [column.name for column in table.primary_key.columns]
+            for rows in readcolumnar(filename):
+                # Drop columns that are not in the table, such as split tagging fragments
+                for row in rows:
+                    for column in row.keys():
+                        if column not in table.c:
+                            del row[column]
+
+                if keycolumns:
+                    merge_overwrite_or_replace(norm.con, table, keycolumns, rows, operation, args.verbosity)
+                elif len(rows) > 0:
+                    norm.con.execute(table.insert(), rows)
+
+        norm.commit()
+        del norm
+
+    except:
+        raise
+        norm.rollback()
+        del norm
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import argparse
+import Columnar
+
+parser = argparse.ArgumentParser(description='Rebuild a normalised NVivo project from columnar Parquet or Arrow files.')
+
+parser.add_argument('-v', '--verbosity', type=int, default=1)
+
+parser.add_argument('-o', '--operation', choices=["merge", "overwrite"], default="overwrite",
+                    help='Action for rows already in the normalised file.')
+
+parser.add_argument('indir', type=str,
+                    help="Input directory of columnar files, one per table")
+parser.add_argument('outfilename', type=str, nargs='?',
+                    help="Output normalised (.norm) file")
+
+args = parser.parse_args()
+
+if args.outfilename is None:
+    args.outfilename = args.indir.rstrip('/\\').rsplit('.',1)[0] + '.norm'
+
+Columnar.Columnar2Norm(args)
@@ -28,7 +28,8 @@ import re
 from dateutil import parser as dateparser
 import datetime
 from pytimeparse.timeparse import timeparse
-from xml.dom.minidom import *
+from propertyTools import parsexml, localname
+from blobTools import resolvedbblobs
 
 exec(open(os.path.dirname(os.path.realpath(__file__)) + os.path.sep + 'DataTypes.py').read())
 
@@ -56,6 +57,7 @@ try:
     db1 = create_engine(args.db1)
     md1 = MetaData(bind=db1)
     md1.reflect(db1)
+    resolvedbblobs(db1, md1)
     con1 = db1.connect()
 
     if '://' not in args.db2:
@@ -64,6 +66,7 @@ try:
     db2 = create_engine(args.db2)
     md2 = MetaData(bind=db2)
     md2.reflect(db2)
+    resolvedbblobs(db2, md2)
     con2 = db2.connect()
 
     def buildTableMatchDicts(tableName, matchCols):
@@ -98,24 +101,33 @@ try:
                 dict2[row2['Id']] = match2Set
 
     # Modified from https://stackoverflow.com/questions/321795/comparing-xml-in-a-unit-test-in-python
+    # to work on ElementTree elements, so that documents shared by many rows are parsed once.
     def compareElements(e1, e2, path):
-        if e1.tagName!=e2.tagName:
-            return path+'/'+e1.tagname + ' != ' + path+'/'+e2.tagname
+        if e1.tag!=e2.tag:
+            return path+'/'+localname(e1.tag) + ' != ' + path+'/'+localname(e2.tag)
 
-        path += '/' + e1.tagName
-        for a1, a2 in zip(sorted(e1.attributes.items()), sorted(e2.attributes.items())):
+        path += '/' + localname(e1.tag)
+        for a1, a2 in zip(sorted(e1.attrib.items()), sorted(e2.attrib.items())):
             if a1[0] != a2[0]:
                 return path+':'+a1[0] + ' != ' + path+':'+a2[0]
             elif a1[0] != 'Guid':
                 if a1[1] != a2[1]:
                     return path+':'+a1[0]+'='+a1[1] + ' != ' + path+':'+a2[0]+'='+a2[1]
             else:
-                if a2[1] not in dict.get(a1[1]):
+                # Guids are matched as the Id columns are, and are the same where unmatched
+                guid1 = uuid.UUID(a1[1])
+                guid2 = uuid.UUID(a2[1])
+                if guid2 != guid1 and guid2 not in dict1.get(guid1, set()):
                     return path+':'+a1[0]+'='+a1[1] + ' != ' + path+':'+a2[0]+'='+a2[1]
 
-        if len(e1.childNodes)!=len(e2.childNodes):
-            tag1 = [c.tagName for c in e1.childNodes]
-            tag2 = [c.tagName for c in e2.childNodes]
+        if (e1.text or '').strip() != (e2.text or '').strip():
+            return path + ' text differs'
+
+        children1 = list(e1)
+        children2 = list(e2)
+        if len(children1)!=len(children2):
+            tag1 = [localname(c.tag) for c in children1]
+            tag2 = [localname(c.tag) for c in children2]
             for t in tag1:
                 if t not in tag2:
                     return path+'/'+t + ' missing from 2'
@@ -123,23 +135,25 @@ try:
                 if t not in tag1:
                     return path+'/'+t + ' missing from 1'
 
-        for c1, c2 in zip(e1.childNodes, e2.childNodes):
-            if c1.nodeType!=c2.nodeType:
-                return path+'/'+c1.tagName + ' differs from ' + path+'/'+c2.tagName
-            if c1.nodeType==c1.TEXT_NODE and c1.data!=c2.data:
-                return path+'/'+c1.tagName + ' differs from ' + path+'/'+c2.tagName
-            if c1.nodeType==c1.ELEMENT_NODE:
-                ret = compareElements(c1, c2, path)
-                if ret:
-                    return ret
+        for c1, c2 in zip(children1, children2):
+            ret = compareElements(c1, c2, path)
+            if ret:
+                return ret
         return None
 
+    # Values as printable strings. Names from NVivo for Windows are coded beyond ASCII,
+    # so text is printed as UTF-8 whether or not output goes to a terminal.
+    def printable(value):
+        return value.encode('utf-8') if isinstance(value, unicode) else str(value)
+
     def compareTable(tableName, extraColumns):
         table = next(table for table in md1.sorted_tables if table.name == tableName)
         print("Table:", table.name)
 
+        # Each database is read through its own table, so that blob references are
+        # resolved from its own store
         rows1 = [dict(row) for row in con1.execute(select(table.columns))]
-        rows2 = [dict(row) for row in con2.execute(select(table.columns))]
+        rows2 = [dict(row) for row in con2.execute(select(md2.tables[tableName].columns))]
         keyColNames = [column.name for column in table.primary_key.columns]
 
         for row1 in rows1:
@@ -165,9 +179,7 @@ try:
                     diffCols = []
                     for col in row1.keys():     # NB dict not DB key
                         if col in ['Properties', 'Layout'] and row1[col] and row2[col]:
-                            xml1 = parseString(row1[col])
-                            xml2 = parseString(row2[col])
-                            diff = compareElements(xml1.documentElement, xml2.documentElement, '')
+                            diff = compareElements(parsexml(row1[col]), parsexml(row2[col]), '')
                             if diff:
                                 diffCols.append((col, diff))
                         elif (not isinstance(row1[col], uuid.UUID)) and col not in args.ignore and row1[col] != row2[col]:
@@ -178,14 +190,14 @@ try:
                             keyDict[keyColName] = row1[keyColName]
                             if isinstance(row1[keyColName], uuid.UUID):
                                 keyDict[keyColName + ' Name'] = item1.get(row1[keyColName], '')
-                        print ("    Key:", keyDict, ("Name: " + row1['Name']) if 'Name' in row1.keys() and 'Name' not in diffCols else "")
+                        print ("    Key:", keyDict, ("Name: " + printable(row1['Name'])) if 'Name' in row1.keys() and 'Name' not in diffCols else "")
                         for diffCol in diffCols:
                             print("        ", diffCol[0])
                             if diffCol[1]:
                                 print("            ", diffCol[1])
                             else:
-                                print("            1:", str(row1[diffCol[0]])[0:256])
-                                print("            2:", str(row2[diffCol[0]])[0:256])
+                                print("            1:", printable(row1[diffCol[0]])[0:256])
+                                print("            2:", printable(row2[diffCol[0]])[0:256])
 
                     break
             else:
@@ -24,7 +24,8 @@ except:
 from sqlalchemy.databases import mssql, sqlite
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER
-from sqlalchemy import TypeDecorator, Binary, TEXT, String
+from sqlalchemy import TypeDecorator, Binary, TEXT, String, DateTime
+from dateTools import parsedatetime
 import uuid
 
 class UUID(TypeDecorator):
@@ -63,6 +64,18 @@ class UUID(TypeDecorator):
         else:
             return value
 
+class TextDateTime(TypeDecorator):
+    """DateTime type for drivers that return timestamps as text.
+
+    Strings are decoded by parsedatetime, so that datetimes reach the
+    caller already typed.
+
+    """
+    impl = DateTime
+
+    def process_result_value(self, value, dialect):
+        return parsedatetime(value)
+
 @compiles(UUID, 'sqlite')
 def compile_UUID_mssql_sqlite(element, compiler, **kw):
     """ SQLite doesn't care too much about type names, UNIQUEIDENTIFIER is fine. """
@@ -78,3 +91,5 @@ if sqlany:
     sqlalchemy_sqlany.dialect.ischema_names['xml'] = String
     sqlalchemy_sqlany.dialect.ischema_names['long nvarchar'] = TEXT
     sqlalchemy_sqlany.dialect.ischema_names['uniqueidentifier'] = UUID
+    sqlalchemy_sqlany.dialect.ischema_names['timestamp'] = TextDateTime
+    sqlalchemy_sqlany.dialect.ischema_names['datetime'] = TextDateTime
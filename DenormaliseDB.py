@@ -51,6 +51,24 @@ parser.add_argument('-t', '--taggings', choices=["skip", "merge"], default="merg
 parser.add_argument('-a', '--annotations', choices=["skip", "merge"], default="merge",
                     help='Annotation action.')
 
+parser.add_argument('--unoconv-servers', type=int, default=1,
+                    help='Number of LibreOffice listeners to keep running for document conversion; 0 runs a fresh unoconv for each conversion.')
+
+parser.add_argument('--pdf-workers', type=int,
+                    help='Number of processes extracting text from PDF sources; the default is one for each processor.')
+parser.add_argument('--thumbnail-workers', type=int,
+                    help='Number of processes making thumbnails of image sources; the default is one for each processor.')
+parser.add_argument('--compression-level', type=int, choices=range(10), default=6,
+                    help='Level from 0 to 9 at which to compress documents for NVivo for Windows.')
+
+parser.add_argument('--conversion-cache', type=str,
+                    help='Directory in which to keep converted sources, so that unchanged sources are not converted again.')
+parser.add_argument('--conversion-cache-size', type=int, default=1024,
+                    help='Size in megabytes beyond which the least recently used conversions are removed from the cache.')
+
+parser.add_argument('--stats', type=str,
+                    help='Write the timing, row counts and memory use of each phase to this JSON file.')
+
 parser.add_argument('indb', type=str,
                     help='SQLAlchemy path of input normalised database.')
 parser.add_argument('outdb', type=str, nargs='?',
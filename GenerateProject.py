@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import argparse
+import os
+import sys
+import tempfile
+import NVivo
+import RQDA
+import Synthetic
+
+parser = argparse.ArgumentParser(description='Generate a synthetic NVivo-shaped SQLite project, and optionally matching normalised and RQDA files, for benchmarking.')
+
+parser.add_argument('-w', '--windows', action='store_true',
+                    help='Code names as NVivo for Windows does, so that the project is normalised with --windows.')
+parser.add_argument('-m', '--mac',  action='store_true',
+                    help='Generate a project in NVivo for Mac format.')
+
+parser.add_argument('-v', '--verbosity', type=int, default=1)
+
+parser.add_argument('-nv', '--nvivoversion', choices=["10", "11"], default="10",
+                    help='NVivo version (10 or 11)')
+
+parser.add_argument('--seed', type=int, default=0,
+                    help='Random seed. The same seed and sizes always generate the same project.')
+parser.add_argument('--empty', action='store_true',
+                    help='Only create the tables and system folders, as a target for denormalising.')
+
+parser.add_argument('--source-count', type=int, default=100,
+                    help='Number of sources.')
+parser.add_argument('--object-type', choices=["DOC", "JPEG"], default="DOC",
+                    help='Type of source object.')
+parser.add_argument('--text-length', type=int, default=5000,
+                    help='Approximate length in characters of the text of each document source.')
+parser.add_argument('--node-count', type=int, default=100,
+                    help='Number of nodes.')
+parser.add_argument('--depth', type=int, default=3,
+                    help='Maximum depth of the node tree.')
+parser.add_argument('--tagging-count', type=int, default=1000,
+                    help='Number of taggings.')
+parser.add_argument('--annotation-count', type=int, default=100,
+                    help='Number of annotations.')
+parser.add_argument('--node-category-count', type=int, default=2,
+                    help='Number of node categories.')
+parser.add_argument('--source-category-count', type=int, default=2,
+                    help='Number of source categories.')
+parser.add_argument('--node-attribute-count', type=int, default=4,
+                    help='Number of node attributes.')
+parser.add_argument('--source-attribute-count', type=int, default=4,
+                    help='Number of source attributes.')
+parser.add_argument('--value-count', type=int, default=5,
+                    help='Number of distinct values of each attribute, besides the defaults.')
+
+parser.add_argument('--norm', type=str,
+                    help='Also write the project normalised to this file.')
+parser.add_argument('--rqda', type=str,
+                    help='Also write the project as an RQDA file.')
+
+parser.add_argument('outfilename', type=str,
+                    help='Output SQLite file standing in for an NVivo project.')
+
+args = parser.parse_args()
+
+# Fill in extra arguments that NVivo and RQDA modules expect
+for action in ['users', 'node_categories', 'nodes', 'node_attributes', 'source_categories',
+               'sources', 'source_attributes', 'taggings', 'annotations']:
+    setattr(args, action, 'merge')
+args.project = 'overwrite'
+
+if os.path.exists(args.outfilename):
+    os.remove(args.outfilename)
+args.outdb = 'sqlite:///' + args.outfilename
+
+Synthetic.Generate(args)
+
+if args.norm or args.rqda:
+    normfilename = args.norm or tempfile.mktemp()
+    if os.path.exists(normfilename):
+        os.remove(normfilename)
+
+    args.indb  = 'sqlite:///' + args.outfilename
+    args.outdb = 'sqlite:///' + normfilename
+    NVivo.Normalise(args)
+
+    if args.rqda:
+        if os.path.exists(args.rqda):
+            os.remove(args.rqda)
+
+        args.indb  = 'sqlite:///' + normfilename
+        args.outdb = 'sqlite:///' + args.rqda
+        RQDA.Norm2RQDA(args)
+
+    if not args.norm:
+        os.remove(normfilename)
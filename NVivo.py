@@ -17,14 +17,30 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from __future__ import print_function
-from builtins import chr
 from mssqlTools import mssqlAPI
+from mergeTools import merge_overwrite_or_replace, delete_other_keys, executemany
+from offsetTools import SourceOffsets
+from nameCodec import decodename, encodename, encodepattern
+from dateTools import parsedatetime
+from pipelineTools import run_sequential, run_pipeline
+from propertyTools import decodeproperties
+from blobTools import BlobStore, blobdirectory
+from statsTools import ConversionStats
+from attributeTools import AttributeRegistry
+from itemTools import ItemCatalogue
+from nodeTools import NodeTree
+from unoconvTools import UnoconvConverter, UnoconvPool
+from layoutTools import PdfExtractor, ParagraphIndex, DISPLAYSETTINGSXML, extractpdf, writepdfpagesxml, categorylayoutxml
+from cacheTools import ConversionCache
+from imageTools import Thumbnailer, thumbnail
+from compressTools import Compressor
+import threading
+from multiprocessing.pool import ThreadPool
 import glob
 import socket
 import random
 from sqlalchemy import *
 from sqlalchemy import exc
-from xml.dom.minidom import *
 import warnings
 import sys
 import os
@@ -33,16 +49,11 @@ import subprocess
 import argparse
 import uuid
 import re
-import zlib
+import mmap
+import hashlib
+from cStringIO import StringIO
 from datetime import date, time, datetime
 from dateutil import parser as dateparser
-from PIL import Image
-import tempfile
-from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
-from pdfminer.converter import TextConverter
-from pdfminer.layout import LAParams
-from pdfminer.pdfpage import PDFPage
-from cStringIO import StringIO
 from distutils import util
 
 exec(open(os.path.dirname(os.path.realpath(__file__)) + os.path.sep + 'DataTypes.py').read())
@@ -87,6 +98,13 @@ class NVivo:
 
     ILLEGALNAMECHARS = re.compile(r'[\\:/\*\?"<>|]')
 
+    # Number of rows written by each executemany when denormalising
+    ROWCHUNKSIZE = 1000
+
+    # Columns of a source that may be filled in by converting it
+    CONVERTEDCOLUMNS = ['SourceType', 'ObjectTypeName', 'Object', 'PlainText', 'Content', 'MetaData',
+                        'LengthX', 'LengthY', 'Thumbnail', 'Properties', 'ExtendedProperties']
+
     helperpath = os.path.dirname(os.path.realpath(__file__)) + os.path.sep + 'helpers' + os.path.sep
 
 # Function to mount a database file and return an SQLite connection string.
@@ -161,36 +179,6 @@ def mount(filename, dbname=None, server=None, port=None, instance=None, nvivover
     else:
         raise RuntimeError("Unknown file extension: " + extension)
 
-# Generic merge/overwrite/replace function
-def merge_overwrite_or_replace(conn, table, columns, data, operation, verbosity):
-    newids = [{column:row[column] for column in columns} for row in data]
-    curids = [{column:row[column] for column in columns}
-                for row in conn.execute(select([table.c[column] for column in columns]))]
-
-    if operation == 'replace':
-        idstodelete = [id for id in curids if not id in newids]
-        if len(idstodelete) > 0:
-            delete = table.delete()
-            for column in columns:
-                for id in idstodelete:
-                    id['_' + column] = id[column]
-                delete = delete.where(table.c[column] == bindparam('_' + column))
-            conn.execute(delete, idstodelete)
-
-    if operation == 'overwrite' or operation == 'replace':
-        rowstoupdate = [row for row in data if {column:row[column] for column in columns} in curids]
-        if len(rowstoupdate) > 0:
-            update = table.update()
-            for column in columns:
-                for id in rowstoupdate:
-                    id['_' + column] = id[column]
-                update = update.where(table.c[column] == bindparam('_' + column))
-            conn.execute(update, rowstoupdate)
-
-    rowstoinsert = [row for row in data if not {column:row[column] for column in columns} in curids]
-    if len(rowstoinsert) > 0:
-        conn.execute(table.insert(), rowstoinsert)
-
 def Normalise(args):
     # Initialise DB variables so exception handlers don't freak out
     nvivodb = None
@@ -378,6 +366,18 @@ def Normalise(args):
                 Column('ModifiedDate',  DateTime))
             normTagging.create(normdb)
 
+        # Watermarks recorded by incremental runs, see below
+        incremental = getattr(args, 'incremental', False)
+        if incremental:
+            try:
+                normWatermark = Table('Watermark', normmd, autoload=True)
+            except exc.NoSuchTableError:
+                normWatermark = Table('Watermark', normmd,
+                    Column('Name',          String(64),     primary_key=True),
+                    Column('ModifiedDate',  DateTime),
+                    Column('RevisionId',    Integer))
+                normWatermark.create(normdb)
+
         if nvivodb is None:     # that is, if all we are doing is making an empty norm file
             normdb.dispose()
             return
@@ -385,204 +385,375 @@ def Normalise(args):
         normcon = normdb.connect()
         normtr = normcon.begin()
 
+        # Timing, row counts and memory use of each phase, written to --stats if given
+        stats = ConversionStats('Normalise', [nvivodb, normdb], getattr(args, 'stats', None))
+
+        # Labels are needed by the attribute phases whether or not the project is normalised
+        labels = nvivodb.execute(select([
+                nvivoProject.c.UnassignedLabel,
+                nvivoProject.c.NotApplicableLabel
+            ])).first()
+        unassignedlabel    = labels['UnassignedLabel']
+        notapplicablelabel = labels['NotApplicableLabel']
+        if args.windows:
+            unassignedlabel    = encodename(unassignedlabel)
+            notapplicablelabel = encodename(notapplicablelabel)
+
+        # Objects and thumbnails may be kept in a blob store beside the normalised file.
+        # Scripts that write to a temporary file say where the store belongs.
+        blobs = None
+        if getattr(args, 'blob_store', False):
+            blobs = BlobStore(getattr(args, 'blob_directory', None) or blobdirectory(normdb.url.database))
+
+        # Doc objects from NVivo for Windows are inflated on a pool of worker threads
+        compressor = Compressor()
+
+        # Only the text of each source is kept for processing taggings
+        sourcetexts = {}
+
+        # Without objects DOC and ODT sources can't be told apart, so sources that the
+        # normalised file already has as ODT are kept that way.
+        odtsourceids = set()
+        if getattr(args, 'no_objects', False) and args.sources != 'skip':
+            odtsourceids = set(row['Id'] for row in normcon.execute(select([
+                    normSource.c.Id
+                ]).where(
+                    normSource.c.ObjectType == u'ODT'
+                )))
+        sourcesdone = threading.Event()
+
+        # In incremental mode each phase reads only the rows modified since the previous
+        # run, as recorded by a watermark in the normalised file: the greatest ModifiedDate
+        # and, where the table has one, RevisionId, found before the rows were read.
+        watermarks    = {}
+        newwatermarks = {}
+        if incremental:
+            for row in normcon.execute(select([normWatermark])):
+                watermarks[row['Name']] = dict(row)
+
+        # Return a condition selecting the rows of the given NVivo tables modified since
+        # the watermark with the given name, and record the new watermark. Roles carry no
+        # modification dates, so rows that come from roles, such as the parents and
+        # categories of nodes and the values assigned to nodes and sources, are always read
+        # in full. The categories of unchanged sources are brought up to date separately.
+        def changedsince(name, tables):
+            if not incremental:
+                return true()
+
+            modifieddates = []
+            revisionids   = []
+            for table in tables:
+                aggregate = nvivodb.execute(select([
+                        func.max(table.c.ModifiedDate).label('ModifiedDate'),
+                        (func.max(table.c.RevisionId) if 'RevisionId' in table.c else null()).label('RevisionId')
+                    ])).first()
+                modifieddates.append(parsedatetime(aggregate['ModifiedDate']))
+                revisionids.append(aggregate['RevisionId'])
+
+            # The smallest of the maxima is safe for all the tables
+            newwatermarks[name] = {
+                    'Name':         name,
+                    'ModifiedDate': min(modifieddates) if None not in modifieddates else None,
+                    'RevisionId':   min(revisionids)   if None not in revisionids   else None
+                }
+
+            watermark = watermarks.get(name)
+            if watermark is None or watermark['ModifiedDate'] is None:
+                return true()
+
+            conditions = []
+            for table in tables:
+                conditions.append(table.c.ModifiedDate >= watermark['ModifiedDate'])
+                if watermark['RevisionId'] is not None and 'RevisionId' in table.c:
+                    conditions.append(table.c.RevisionId > watermark['RevisionId'])
+            return or_(*conditions)
+
+        # Filters selecting part of the project. They are compiled into the WHERE clause
+        # of each phase, and narrow the values, taggings and annotations of the selected
+        # nodes and sources in the same way. Scripts that do not offer the filter options
+        # get no filtering.
+        def namepattern(pattern):
+            return encodepattern(pattern) if args.windows else pattern
+
+        def itemconditions(item, namefilter, category, ids):
+            conditions = []
+            if namefilter is not None:
+                conditions.append(item.c.Name.like(namepattern(namefilter)))
+            if category is not None:
+                nvivoFilterCategoryRole = nvivoRole.alias(name='FilterCategoryRole')
+                nvivoFilterCategoryItem = nvivoItem.alias(name='FilterCategoryItem')
+                conditions.append(item.c.Id.in_(select([
+                        nvivoFilterCategoryRole.c.Item1_Id
+                    ]).where(and_(
+                        nvivoFilterCategoryRole.c.TypeId == literal_column(NVivo.RoleType.ItemCategory),
+                        nvivoFilterCategoryRole.c.Item2_Id == nvivoFilterCategoryItem.c.Id,
+                        nvivoFilterCategoryItem.c.Name == namepattern(category)
+                    ))))
+            if ids is not None:
+                conditions.append(item.c.Id.in_([uuid.UUID(id.strip()) for id in ids.split(',')]))
+            return conditions
+
+        nodefilter   = [getattr(args, 'node_filter', None),
+                        getattr(args, 'node_category', None),
+                        getattr(args, 'node_ids', None)]
+        sourcefilter = [getattr(args, 'source_filter', None),
+                        getattr(args, 'source_category', None),
+                        getattr(args, 'source_ids', None)]
+
+        # Condition on an Item table or alias selecting the filtered nodes or sources
+        def nodeselected(item):
+            return and_(true(), *itemconditions(item, *nodefilter))
+
+        def sourceselected(item):
+            return and_(true(), *itemconditions(item, *sourcefilter))
+
+        # Condition on a column holding item Ids, for tables that refer to nodes or sources
+        def nodeidselected(column):
+            if nodefilter == [None, None, None]:
+                return true()
+            nvivoFilterItem = nvivoItem.alias(name='FilterNodeItem')
+            return column.in_(select([nvivoFilterItem.c.Id]).where(nodeselected(nvivoFilterItem)))
+
+        def sourceidselected(column):
+            if sourcefilter == [None, None, None]:
+                return true()
+            nvivoFilterItem = nvivoItem.alias(name='FilterSourceItem')
+            return column.in_(select([nvivoFilterItem.c.Id]).where(sourceselected(nvivoFilterItem)))
+
+        # Condition on the classification items read by the category phases
+        def categoryselected(item, category):
+            if category is None:
+                return true()
+            return item.c.Name == namepattern(category)
+
+        modifiedafter  = parsedatetime(getattr(args, 'modified_after',  None))
+        modifiedbefore = parsedatetime(getattr(args, 'modified_before', None))
+
+        # Condition selecting rows of which any of the given tables was modified within
+        # the date range
+        def modifiedwithin(tables):
+            if modifiedafter is None and modifiedbefore is None:
+                return true()
+
+            conditions = []
+            for table in tables:
+                tableconditions = []
+                if modifiedafter is not None:
+                    tableconditions.append(table.c.ModifiedDate >= modifiedafter)
+                if modifiedbefore is not None:
+                    tableconditions.append(table.c.ModifiedDate < modifiedbefore)
+                conditions.append(and_(*tableconditions))
+            return or_(*conditions)
+
+        filtered = (nodefilter != [None, None, None] or sourcefilter != [None, None, None] or
+                    modifiedafter is not None or modifiedbefore is not None)
+
+        # Write rows read by a phase. In incremental or filtered mode not every row has
+        # been read, so replace becomes overwrite, followed by deletion of rows whose keys
+        # are not returned by any of the key queries. These ignore the filters, so rows
+        # outside the filters are left alone.
+        def writechanges(write, table, columns, rows, operation, keyqueries):
+            if (incremental or filtered) and operation == 'replace':
+                write(merge_overwrite_or_replace, normcon, table, columns, rows, 'overwrite', args.verbosity)
+                keys = set()
+                for keyquery in keyqueries:
+                    keys.update(tuple(row) for row in nvivodb.execute(keyquery))
+                write(delete_other_keys, normcon, table, columns, keys, args.verbosity)
+            else:
+                write(merge_overwrite_or_replace, normcon, table, columns, rows, operation, args.verbosity)
+
 # Users
-        if args.users != 'skip':
-            if args.verbosity > 0:
-                print("Normalising users", file=sys.stderr)
+        def normalise_users(write):
+            if args.users != 'skip':
+                if args.verbosity > 0:
+                    print("Normalising users", file=sys.stderr)
 
-            users = [dict(row) for row in nvivodb.execute(select([
-                    nvivoUserProfile.c.Id,
-                    nvivoUserProfile.c.Name]
-                ))]
+                users = stats.read([dict(row) for row in nvivodb.execute(select([
+                        nvivoUserProfile.c.Id,
+                        nvivoUserProfile.c.Name]
+                    ))])
 
-            merge_overwrite_or_replace(normcon, normUser, ['Id'], users, args.users, args.verbosity)
+                write(merge_overwrite_or_replace, normcon, normUser, ['Id'], users, args.users, args.verbosity)
 
 # Project
-        if args.project != 'skip':
-            if args.verbosity > 0:
-                print("Normalising project", file=sys.stderr)
-
-            project = dict(nvivodb.execute(select([
-                    nvivoProject.c.Title,
-                    nvivoProject.c.Description,
-                    nvivoProject.c.UnassignedLabel,
-                    nvivoProject.c.NotApplicableLabel,
-                    nvivoProject.c.CreatedBy,
-                    nvivoProject.c.CreatedDate,
-                    nvivoProject.c.ModifiedBy,
-                    nvivoProject.c.ModifiedDate
-                ])).first())
-
-            unassignedlabel    = project['UnassignedLabel']
-            notapplicablelabel = project['NotApplicableLabel']
-            if args.windows:
-                project['Title']       = u''.join(map(lambda ch: chr(ord(ch) - 0x377), project['Title']))
-                project['Description'] = u''.join(map(lambda ch: chr(ord(ch) - 0x377), project['Description'])).replace('\r\n', '\n')
-                unassignedlabel    = u''.join(map(lambda ch: chr(ord(ch) + 0x377), unassignedlabel))
-                notapplicablelabel = u''.join(map(lambda ch: chr(ord(ch) + 0x377), notapplicablelabel))
-
-            # SQLAlchemy should probably handle this...
-            if not isinstance(project['CreatedDate'], datetime):
-                project['CreatedDate'] = dateparser.parse(project['CreatedDate'])
-            if not isinstance(project['ModifiedDate'], datetime):
-                project['ModifiedDate'] = dateparser.parse(project['ModifiedDate'])
-
-            normcon.execute(normProject.delete())
-            normcon.execute(normProject.insert().values({
-                    'Version': '0.2'
-                }), project)
+        def normalise_project(write):
+            if args.project != 'skip':
+                if args.verbosity > 0:
+                    print("Normalising project", file=sys.stderr)
+
+                project = dict(nvivodb.execute(select([
+                        nvivoProject.c.Title,
+                        nvivoProject.c.Description,
+                        nvivoProject.c.CreatedBy,
+                        nvivoProject.c.CreatedDate,
+                        nvivoProject.c.ModifiedBy,
+                        nvivoProject.c.ModifiedDate
+                    ])).first())
 
-# Node Categories
-        if args.node_categories != 'skip':
-            if args.verbosity > 0:
-                print("Normalising node categories", file=sys.stderr)
-
-            nodecategories = [dict(row) for row in nvivodb.execute(select([
-                    nvivoItem.c.Id,
-                    nvivoItem.c.Name,
-                    nvivoItem.c.Description,
-                    nvivoItem.c.CreatedBy,
-                    nvivoItem.c.CreatedDate,
-                    nvivoItem.c.ModifiedBy,
-                    nvivoItem.c.ModifiedDate]
-                ).where(
-                    nvivoItem.c.TypeId == literal_column(NVivo.ItemType.NodeClassification)
-                ))]
-
-            for nodecategory in nodecategories:
                 if args.windows:
-                    nodecategory['Name']        = u''.join(map(lambda ch: chr(ord(ch) - 0x377), nodecategory['Name']))
-                    nodecategory['Description'] = u''.join(map(lambda ch: chr(ord(ch) - 0x377), nodecategory['Description'])).replace('\r\n', '\n')
+                    project['Title']       = decodename(project['Title'])
+                    project['Description'] = decodename(project['Description']).replace('\r\n', '\n')
+
+                # SQLAlchemy should probably handle this...
+                project['CreatedDate'] = parsedatetime(project['CreatedDate'])
+                project['ModifiedDate'] = parsedatetime(project['ModifiedDate'])
+
+                write(normcon.execute, normProject.delete())
+                write(normcon.execute, normProject.insert().values({
+                        'Version': '0.2'
+                    }), project)
+
+# Node Categories
+        def normalise_node_categories(write):
+            if args.node_categories != 'skip':
+                if args.verbosity > 0:
+                    print("Normalising node categories", file=sys.stderr)
+
+                nodecategoryquery = select([
+                        nvivoItem.c.Id,
+                        nvivoItem.c.Name,
+                        nvivoItem.c.Description,
+                        nvivoItem.c.CreatedBy,
+                        nvivoItem.c.CreatedDate,
+                        nvivoItem.c.ModifiedBy,
+                        nvivoItem.c.ModifiedDate]
+                    ).where(
+                        nvivoItem.c.TypeId == literal_column(NVivo.ItemType.NodeClassification)
+                    )
+                nodecategories = stats.read([dict(row) for row in nvivodb.execute(nodecategoryquery.where(and_(
+                        changedsince('NodeCategory', [nvivoItem]),
+                        categoryselected(nvivoItem, nodefilter[1]),
+                        modifiedwithin([nvivoItem])
+                    )))])
+
+                for nodecategory in nodecategories:
+                    if args.windows:
+                        nodecategory['Name']        = decodename(nodecategory['Name'])
+                        nodecategory['Description'] = decodename(nodecategory['Description']).replace('\r\n', '\n')
 
-                if not isinstance(nodecategory['CreatedDate'], datetime):
-                    nodecategory['CreatedDate'] = dateparser.parse(nodecategory['CreatedDate'])
-                if not isinstance(nodecategory['ModifiedDate'], datetime):
-                    nodecategory['ModifiedDate'] = dateparser.parse(nodecategory['ModifiedDate'])
+                    nodecategory['CreatedDate'] = parsedatetime(nodecategory['CreatedDate'])
+                    nodecategory['ModifiedDate'] = parsedatetime(nodecategory['ModifiedDate'])
 
-            merge_overwrite_or_replace(normcon, normNodeCategory, ['Id'], nodecategories, args.node_categories, args.verbosity)
+                writechanges(write, normNodeCategory, ['Id'], nodecategories, args.node_categories,
+                             [nodecategoryquery.with_only_columns([nvivoItem.c.Id])])
 
 # Nodes
-        if args.nodes != 'skip':
-            if args.verbosity > 0:
-                print("Normalising nodes", file=sys.stderr)
-
-            nvivoCategoryRole = nvivoRole.alias(name='CategoryRole')
-            nvivoParentRole   = nvivoRole.alias(name='ParentRole')
-
-            nodes = [dict(row) for row in nvivodb.execute(select([
-                    nvivoItem.c.Id,
-                    nvivoCategoryRole.c.Item2_Id.label('Category'),
-                    nvivoItem.c.Name,
-                    nvivoItem.c.Description,
-                    nvivoItem.c.ColorArgb.label('Color'),
-                    nvivoItem.c.Aggregate,
-                    nvivoItem.c.CreatedBy,
-                    nvivoItem.c.CreatedDate,
-                    nvivoItem.c.ModifiedBy,
-                    nvivoItem.c.ModifiedDate,
-                    nvivoParentRole.c.Item1_Id.label('Parent')]
-                ).where(
-                    nvivoItem.c.TypeId == literal_column(NVivo.ItemType.Node),
-                ).select_from(nvivoItem.outerjoin(
-                    nvivoCategoryRole,
-                and_(
-                    nvivoCategoryRole.c.TypeId == literal_column(NVivo.RoleType.ItemCategory),
-                    nvivoCategoryRole.c.Item1_Id == nvivoItem.c.Id)
-                ).outerjoin(
-                    nvivoParentRole,
-                and_(
-                    nvivoParentRole.c.TypeId == literal_column(NVivo.RoleType.ParentItem),
-                    nvivoParentRole.c.Item2_Id == nvivoItem.c.Id
-                ))))]
-            for node in nodes:
-                if args.windows:
-                    node['Name']        = u''.join(map(lambda ch: chr(ord(ch) - 0x377), node['Name']))
-                    node['Description'] = u''.join(map(lambda ch: chr(ord(ch) - 0x377), node['Description'])).replace('\r\n', '\n')
+        def normalise_nodes(write):
+            if args.nodes != 'skip':
+                if args.verbosity > 0:
+                    print("Normalising nodes", file=sys.stderr)
+
+                nvivoCategoryRole = nvivoRole.alias(name='CategoryRole')
+                nvivoParentRole   = nvivoRole.alias(name='ParentRole')
+
+                nodequery = select([
+                        nvivoItem.c.Id,
+                        nvivoCategoryRole.c.Item2_Id.label('Category'),
+                        nvivoItem.c.Name,
+                        nvivoItem.c.Description,
+                        nvivoItem.c.ColorArgb.label('Color'),
+                        nvivoItem.c.Aggregate,
+                        nvivoItem.c.CreatedBy,
+                        nvivoItem.c.CreatedDate,
+                        nvivoItem.c.ModifiedBy,
+                        nvivoItem.c.ModifiedDate,
+                        nvivoParentRole.c.Item1_Id.label('Parent')]
+                    ).where(
+                        nvivoItem.c.TypeId == literal_column(NVivo.ItemType.Node),
+                    ).select_from(nvivoItem.outerjoin(
+                        nvivoCategoryRole,
+                    and_(
+                        nvivoCategoryRole.c.TypeId == literal_column(NVivo.RoleType.ItemCategory),
+                        nvivoCategoryRole.c.Item1_Id == nvivoItem.c.Id)
+                    ).outerjoin(
+                        nvivoParentRole,
+                    and_(
+                        nvivoParentRole.c.TypeId == literal_column(NVivo.RoleType.ParentItem),
+                        nvivoParentRole.c.Item2_Id == nvivoItem.c.Id
+                    )))
+                nodes = stats.read([dict(row) for row in nvivodb.execute(nodequery.where(and_(
+                        nodeselected(nvivoItem),
+                        modifiedwithin([nvivoItem])
+                    )))])
+                for node in nodes:
+                    if args.windows:
+                        node['Name']        = decodename(node['Name'])
+                        node['Description'] = decodename(node['Description']).replace('\r\n', '\n')
 
-                if not isinstance(node['CreatedDate'], datetime):
-                    node['CreatedDate'] = dateparser.parse(node['CreatedDate'])
-                if not isinstance(node['ModifiedDate'], datetime):
-                    node['ModifiedDate'] = dateparser.parse(node['ModifiedDate'])
+                    node['CreatedDate'] = parsedatetime(node['CreatedDate'])
+                    node['ModifiedDate'] = parsedatetime(node['ModifiedDate'])
 
-            merge_overwrite_or_replace(normcon, normNode, ['Id'], nodes, args.nodes, args.verbosity)
+                writechanges(write, normNode, ['Id'], nodes, args.nodes,
+                             [nodequery.with_only_columns([nvivoItem.c.Id])])
 
 # Node attributes
-        if args.node_attributes != 'skip':
-            if args.verbosity > 0:
-                print("Normalising node attributes", file=sys.stderr)
-
-            nvivoNodeItem     = nvivoItem.alias(name='NodeItem')
-            nvivoNameItem     = nvivoItem.alias(name='NameItem')
-            nvivoNameRole     = nvivoRole.alias(name='NameRole')
-            nvivoValueItem    = nvivoItem.alias(name='ValueItem')
-            nvivoValueRole    = nvivoRole.alias(name='ValueRole')
-
-            nodeattrvalues = [dict(row) for row in nvivodb.execute(select([
-                    nvivoNodeItem.c.Id.label('Node'),
-                    nvivoNameItem.c.Id.label('Attribute'),
-                    nvivoNameItem.c.Name,
-                    nvivoNameItem.c.Description,
-                    nvivoNameItem.c.CreatedBy.label('AttrCreatedBy'),
-                    nvivoNameItem.c.CreatedDate.label('AttrCreatedDate'),
-                    nvivoNameItem.c.ModifiedBy.label('AttrModifiedBy'),
-                    nvivoNameItem.c.ModifiedDate.label('AttrModifiedDate'),
-                    nvivoValueItem.c.Name.label('Value'),
-                    nvivoValueItem.c.CreatedBy,
-                    nvivoValueItem.c.CreatedDate,
-                    nvivoValueItem.c.ModifiedBy,
-                    nvivoValueItem.c.ModifiedDate,
-                    nvivoExtendedItem.c.Properties]
-                ).where(and_(
-                    nvivoNodeItem.c.TypeId==literal_column(NVivo.ItemType.Node),
-                    nvivoNodeItem.c.Id == nvivoValueRole.c.Item1_Id,
-                    nvivoValueRole.c.TypeId == literal_column(NVivo.RoleType.ItemValue),
-                    nvivoValueItem.c.Id == nvivoValueRole.c.Item2_Id,
-                    nvivoNameRole.c.Item2_Id == nvivoValueRole.c.Item2_Id,
-                    nvivoNameRole.c.TypeId == literal_column(NVivo.RoleType.AttributeValue),
-                    nvivoNameItem.c.Id == nvivoNameRole.c.Item1_Id,
-                    nvivoValueItem.c.Name != bindparam('UnassignedLabel'),
-                    nvivoExtendedItem.c.Item_Id == nvivoNameItem.c.Id
-                )).order_by(
-                    nvivoNameItem.c.Id
-                ),
-                    {'UnassignedLabel':unassignedlabel}
-                )]
-            lastattribute = None
-            nodeattrs = []
-            for nodeattrvalue in nodeattrvalues:
-                nodeattrvalue['PlainTextName'] = nodeattrvalue['Name']
-                if args.windows:
-                    nodeattrvalue['Name']  = u''.join(map(lambda ch: chr(ord(ch) - 0x377), nodeattrvalue['Name']))
-                    nodeattrvalue['Value'] = u''.join(map(lambda ch: chr(ord(ch) - 0x377), nodeattrvalue['Value']))
-                if not isinstance(nodeattrvalue['AttrCreatedDate'], datetime):
-                    nodeattrvalue['AttrCreatedDate'] = dateparser.parse(nodeattrvalue['AttrCreatedDate'])
-                if not isinstance(nodeattrvalue['AttrModifiedDate'], datetime):
-                    nodeattrvalue['AttrModifiedDate'] = dateparser.parse(nodeattrvalue['AttrModifiedDate'])
-                if not isinstance(nodeattrvalue['CreatedDate'], datetime):
-                    nodeattrvalue['CreatedDate'] = dateparser.parse(nodeattrvalue['CreatedDate'])
-                if not isinstance(nodeattrvalue['ModifiedDate'], datetime):
-                    nodeattrvalue['ModifiedDate'] = dateparser.parse(nodeattrvalue['ModifiedDate'])
-
-                if nodeattrvalue['Attribute'] != lastattribute:
-                    lastattribute = nodeattrvalue['Attribute']
-                    attrtype = None
-                    attrlength = None
-                    for property in parseString(nodeattrvalue['Properties']).documentElement.getElementsByTagName('Property'):
-                        if property.getAttribute('Key') == 'DataType':
-                            attrtype = NVivo.DataTypeName.get(int(property.getAttribute('Value')), property.getAttribute('Value'))
-                        elif property.getAttribute('Key') == 'Length':
-                            attrlength = int(property.getAttribute('Value'))
-                            if attrlength == 0:
-                                attrlength = None
-
-                    # Check for existing attribute with same name
-                    existingattributes = [attr for attr in nodeattrs if attr['Id'] == nodeattrvalue['Attribute']]
-                    if len(existingattributes) > 0:
-                        existingattribute = existingattributes[0]
-                        if existingattribute['Type'] != attrtype or existingattribute['Length'] != attrlength:
-                            raise RuntimeError("ERROR: Attribute " + nodeattrvalue['PlainTextName'] + " is multiply defined with different type or length.")
-                    else:
-                        nodeattrs += [{
+        def normalise_node_attributes(write):
+            if args.node_attributes != 'skip':
+                if args.verbosity > 0:
+                    print("Normalising node attributes", file=sys.stderr)
+
+                nvivoNodeItem     = nvivoItem.alias(name='NodeItem')
+                nvivoNameItem     = nvivoItem.alias(name='NameItem')
+                nvivoNameRole     = nvivoRole.alias(name='NameRole')
+                nvivoValueItem    = nvivoItem.alias(name='ValueItem')
+                nvivoValueRole    = nvivoRole.alias(name='ValueRole')
+
+                nodeattrquery = select([
+                        nvivoNodeItem.c.Id.label('Node'),
+                        nvivoNameItem.c.Id.label('Attribute'),
+                        nvivoNameItem.c.Name,
+                        nvivoNameItem.c.Description,
+                        nvivoNameItem.c.CreatedBy.label('AttrCreatedBy'),
+                        nvivoNameItem.c.CreatedDate.label('AttrCreatedDate'),
+                        nvivoNameItem.c.ModifiedBy.label('AttrModifiedBy'),
+                        nvivoNameItem.c.ModifiedDate.label('AttrModifiedDate'),
+                        nvivoValueItem.c.Name.label('Value'),
+                        nvivoValueItem.c.CreatedBy,
+                        nvivoValueItem.c.CreatedDate,
+                        nvivoValueItem.c.ModifiedBy,
+                        nvivoValueItem.c.ModifiedDate,
+                        nvivoExtendedItem.c.Properties]
+                    ).where(and_(
+                        nvivoNodeItem.c.TypeId==literal_column(NVivo.ItemType.Node),
+                        nvivoNodeItem.c.Id == nvivoValueRole.c.Item1_Id,
+                        nvivoValueRole.c.TypeId == literal_column(NVivo.RoleType.ItemValue),
+                        nvivoValueItem.c.Id == nvivoValueRole.c.Item2_Id,
+                        nvivoNameRole.c.Item2_Id == nvivoValueRole.c.Item2_Id,
+                        nvivoNameRole.c.TypeId == literal_column(NVivo.RoleType.AttributeValue),
+                        nvivoNameItem.c.Id == nvivoNameRole.c.Item1_Id,
+                        nvivoValueItem.c.Name != bindparam('UnassignedLabel'),
+                        nvivoExtendedItem.c.Item_Id == nvivoNameItem.c.Id
+                    )).order_by(
+                        nvivoNameItem.c.Id
+                    )
+                nodeattrvalues = stats.read([dict(row) for row in nvivodb.execute(nodeattrquery.where(and_(
+                        nodeselected(nvivoNodeItem),
+                        modifiedwithin([nvivoNameItem, nvivoValueItem])
+                    )),
+                        {'UnassignedLabel':unassignedlabel}
+                    )])
+                lastattribute = None
+                nodeattrs = AttributeRegistry()
+                for nodeattrvalue in nodeattrvalues:
+                    nodeattrvalue['PlainTextName'] = nodeattrvalue['Name']
+                    if args.windows:
+                        nodeattrvalue['Name']  = decodename(nodeattrvalue['Name'])
+                        nodeattrvalue['Value'] = decodename(nodeattrvalue['Value'])
+                    nodeattrvalue['AttrCreatedDate'] = parsedatetime(nodeattrvalue['AttrCreatedDate'])
+                    nodeattrvalue['AttrModifiedDate'] = parsedatetime(nodeattrvalue['AttrModifiedDate'])
+                    nodeattrvalue['CreatedDate'] = parsedatetime(nodeattrvalue['CreatedDate'])
+                    nodeattrvalue['ModifiedDate'] = parsedatetime(nodeattrvalue['ModifiedDate'])
+
+                    if nodeattrvalue['Attribute'] != lastattribute:
+                        lastattribute = nodeattrvalue['Attribute']
+                        properties = decodeproperties(nodeattrvalue['Properties'])
+                        attrtype = properties.get('DataType')
+                        if attrtype is not None:
+                            attrtype = NVivo.DataTypeName.get(attrtype, unicode(attrtype))
+                        attrlength = properties.get('Length') or None
+
+                        # Register the attribute, checking that any earlier definition matches
+                        nodeattrs.add({
                             'Id':            nodeattrvalue['Attribute'],
                             'Name':          nodeattrvalue['Name'],
                             'PlainTextName': nodeattrvalue['PlainTextName'],
@@ -593,176 +764,245 @@ def Normalise(args):
                             'CreatedDate':   nodeattrvalue['AttrCreatedDate'],
                             'ModifiedBy':    nodeattrvalue['AttrModifiedBy'],
                             'ModifiedDate':  nodeattrvalue['AttrModifiedDate']
-                        }]
+                        })
 
-            merge_overwrite_or_replace(normcon, normNodeAttribute, ['Id'], nodeattrs, args.node_attributes, args.verbosity)
-            merge_overwrite_or_replace(normcon, normNodeValue, ['Node', 'Attribute'], nodeattrvalues, args.node_attributes, args.verbosity)
+                writechanges(write, normNodeAttribute, ['Id'], list(nodeattrs), args.node_attributes,
+                             [nodeattrquery.with_only_columns([nvivoNameItem.c.Id]).distinct().params(UnassignedLabel=unassignedlabel)])
+                writechanges(write, normNodeValue, ['Node', 'Attribute'], nodeattrvalues, args.node_attributes,
+                             [nodeattrquery.with_only_columns([nvivoNodeItem.c.Id, nvivoNameItem.c.Id]).params(UnassignedLabel=unassignedlabel)])
 
 # Source categories
-        if args.source_categories != 'skip':
-            if args.verbosity > 0:
-                print("Normalising source categories", file=sys.stderr)
-
-            sourcecats  = [dict(row) for row in nvivodb.execute(select([
-                    nvivoItem.c.Id,
-                    nvivoItem.c.Name,
-                    nvivoItem.c.Description,
-                    nvivoItem.c.CreatedBy,
-                    nvivoItem.c.CreatedDate,
-                    nvivoItem.c.ModifiedBy,
-                    nvivoItem.c.ModifiedDate]
-                ).where(
-                    nvivoItem.c.TypeId == literal_column(NVivo.ItemType.SourceClassification)
-                ))]
-            for sourcecat in sourcecats:
-                if args.windows:
-                    sourcecat['Name']        = u''.join(map(lambda ch: chr(ord(ch) - 0x377), sourcecat['Name']))
-                    sourcecat['Description'] = u''.join(map(lambda ch: chr(ord(ch) - 0x377), sourcecat['Description'])).replace('\r\n', '\n')
+        def normalise_source_categories(write):
+            if args.source_categories != 'skip':
+                if args.verbosity > 0:
+                    print("Normalising source categories", file=sys.stderr)
+
+                sourcecatquery = select([
+                        nvivoItem.c.Id,
+                        nvivoItem.c.Name,
+                        nvivoItem.c.Description,
+                        nvivoItem.c.CreatedBy,
+                        nvivoItem.c.CreatedDate,
+                        nvivoItem.c.ModifiedBy,
+                        nvivoItem.c.ModifiedDate]
+                    ).where(
+                        nvivoItem.c.TypeId == literal_column(NVivo.ItemType.SourceClassification)
+                    )
+                sourcecats  = stats.read([dict(row) for row in nvivodb.execute(sourcecatquery.where(and_(
+                        changedsince('SourceCategory', [nvivoItem]),
+                        categoryselected(nvivoItem, sourcefilter[1]),
+                        modifiedwithin([nvivoItem])
+                    )))])
+                for sourcecat in sourcecats:
+                    if args.windows:
+                        sourcecat['Name']        = decodename(sourcecat['Name'])
+                        sourcecat['Description'] = decodename(sourcecat['Description']).replace('\r\n', '\n')
 
-                if not isinstance(sourcecat['CreatedDate'], datetime):
-                    sourcecat['CreatedDate'] = dateparser.parse(sourcecat['CreatedDate'])
-                if not isinstance(sourcecat['ModifiedDate'], datetime):
-                    sourcecat['ModifiedDate'] = dateparser.parse(sourcecat['ModifiedDate'])
+                    sourcecat['CreatedDate'] = parsedatetime(sourcecat['CreatedDate'])
+                    sourcecat['ModifiedDate'] = parsedatetime(sourcecat['ModifiedDate'])
 
-            merge_overwrite_or_replace(normcon, normSourceCategory, ['Id'], sourcecats, args.source_categories, args.verbosity)
+                writechanges(write, normSourceCategory, ['Id'], sourcecats, args.source_categories,
+                             [sourcecatquery.with_only_columns([nvivoItem.c.Id])])
 
 # Sources
-        if args.sources != 'skip':
-            if args.verbosity > 0:
-                print("Normalising sources", file=sys.stderr)
-
-            nvivoCategoryRole = nvivoRole.alias(name='CategoryRole')
-            nvivoParentRole   = nvivoRole.alias(name='ParentRole')
-
-            sources = [dict(row) for row in nvivodb.execute(select([
-                    nvivoItem.c.Id,
-                    nvivoCategoryRole.c.Item2_Id.label('Category'),
-                    nvivoItem.c.Name,
-                    nvivoItem.c.Description,
-                    nvivoItem.c.ColorArgb.label('Color'),
-                    nvivoSource.c.TypeId.label('ObjectTypeId'),
-                    nvivoSource.c.Object,
-                    nvivoSource.c.PlainText,
-                    nvivoSource.c.MetaData,
-                    nvivoSource.c.Thumbnail,
-                    nvivoSource.c.Waveform,
-                    nvivoItem.c.TypeId.label('SourceType'),
-                    nvivoItem.c.CreatedBy,
-                    nvivoItem.c.CreatedDate,
-                    nvivoItem.c.ModifiedBy,
-                    nvivoItem.c.ModifiedDate]
-                ).where(
-                    nvivoItem.c.Id == nvivoSource.c.Item_Id
-                ).select_from(nvivoItem.outerjoin(
-                    nvivoCategoryRole,
-                and_(
-                    nvivoCategoryRole.c.TypeId == literal_column(NVivo.RoleType.ItemCategory),
-                    nvivoCategoryRole.c.Item1_Id == nvivoItem.c.Id)
-                )))]
-            for source in sources:
-                if args.windows:
-                    source['Name']        = u''.join(map(lambda ch: chr(ord(ch) - 0x377), source['Name']))
-                    source['Description'] = u''.join(map(lambda ch: chr(ord(ch) - 0x377), source['Description'])).replace('\r\n', '\n')
-
-                source['Content'] = source['PlainText']
-                if source['Content']:
-                    source['Content'] = source['Content'].replace('\r\n', '\n')
-
-                source['ObjectType'] = NVivo.ObjectTypeName.get(source['ObjectTypeId'], str(source['ObjectTypeId']))
-
-                if source['ObjectType'] == 'DOC':
-                    # Look for ODT signature from NVivo for Mac files
-                    if source['Object'][0:4] == 'PK\x03\x04':
-                        source['ObjectType'] = 'ODT'
-                    else:
-                        try:
-                            ## Try zlib decompression without header
-                            source['Object'] = zlib.decompress(source['Object'], -15)
-                        except Exception:
-                            pass
-
-                if not isinstance(source['CreatedDate'], datetime):
-                    source['CreatedDate'] = dateparser.parse(source['CreatedDate'])
-                if not isinstance(source['ModifiedDate'], datetime):
-                    source['ModifiedDate'] = dateparser.parse(source['ModifiedDate'])
+        def normalise_sources(write):
+            try:
+                if args.sources != 'skip':
+                    if args.verbosity > 0:
+                        print("Normalising sources", file=sys.stderr)
+
+                    nvivoCategoryRole = nvivoRole.alias(name='CategoryRole')
+                    nvivoParentRole   = nvivoRole.alias(name='ParentRole')
+
+                    # Sources are read through a streaming cursor and written a chunk at a time, so
+                    # that the embedded objects of the whole project are never in memory at once.
+                    #
+                    # Objects and thumbnails can be left out of the query altogether with
+                    # --no-objects and --no-thumbnails, leaving those columns of the normalised
+                    # file untouched.
+                    sourcecolumns = [
+                            nvivoItem.c.Id,
+                            nvivoCategoryRole.c.Item2_Id.label('Category'),
+                            nvivoItem.c.Name,
+                            nvivoItem.c.Description,
+                            nvivoItem.c.ColorArgb.label('Color'),
+                            nvivoSource.c.TypeId.label('ObjectTypeId'),
+                            nvivoSource.c.PlainText,
+                            nvivoSource.c.MetaData,
+                            nvivoItem.c.TypeId.label('SourceType'),
+                            nvivoItem.c.CreatedBy,
+                            nvivoItem.c.CreatedDate,
+                            nvivoItem.c.ModifiedBy,
+                            nvivoItem.c.ModifiedDate]
+                    if not getattr(args, 'no_objects', False):
+                        sourcecolumns.append(nvivoSource.c.Object)
+                    if not getattr(args, 'no_thumbnails', False):
+                        sourcecolumns.append(nvivoSource.c.Thumbnail)
+
+                    sourcequery = select(sourcecolumns
+                        ).where(
+                            nvivoItem.c.Id == nvivoSource.c.Item_Id
+                        ).select_from(nvivoItem.outerjoin(
+                            nvivoCategoryRole,
+                        and_(
+                            nvivoCategoryRole.c.TypeId == literal_column(NVivo.RoleType.ItemCategory),
+                            nvivoCategoryRole.c.Item1_Id == nvivoItem.c.Id)
+                        ))
+                    sourcecursor = nvivodb.execute(sourcequery.where(and_(
+                            changedsince('Source', [nvivoItem]),
+                            sourceselected(nvivoItem),
+                            modifiedwithin([nvivoItem])
+                        )).execution_options(stream_results=True))
+
+                    # Scripts that do not offer --chunk-size get the default
+                    chunksize = getattr(args, 'chunk_size', None) or 100
+
+                    sourceids = set()
+                    while True:
+                        sourcechunk = stats.read([dict(row) for row in sourcecursor.fetchmany(chunksize)])
+                        if len(sourcechunk) == 0:
+                            break
 
-            merge_overwrite_or_replace(normcon, normSource, ['Id'], sources, args.sources, args.verbosity)
+                        for source in sourcechunk:
+                            stats.blobbytes(len(source.get('Object') or '') + len(source.get('Thumbnail') or ''))
+                            if args.windows:
+                                source['Name']        = decodename(source['Name'])
+                                source['Description'] = decodename(source['Description']).replace('\r\n', '\n')
+
+                            source['Content'] = source['PlainText']
+                            if source['Content']:
+                                source['Content'] = source['Content'].replace('\r\n', '\n')
+
+                            source['ObjectType'] = NVivo.ObjectTypeName.get(source['ObjectTypeId'], str(source['ObjectTypeId']))
+
+                            # Look for ODT signature from NVivo for Mac files
+                            if source['ObjectType'] == 'DOC':
+                                if 'Object' not in source:
+                                    if source['Id'] in odtsourceids:
+                                        source['ObjectType'] = 'ODT'
+                                elif source['Object'][0:4] == 'PK\x03\x04':
+                                    source['ObjectType'] = 'ODT'
+
+                        # Other doc objects are inflated if they turn out to be compressed. When the
+                        # phases are pipelined this happens while the previous chunk is written.
+                        docsources = [source for source in sourcechunk if source['ObjectType'] == 'DOC' and 'Object' in source]
+                        for source, data in zip(docsources, compressor.inflate([source['Object'] for source in docsources])):
+                            source['Object'] = data
+
+                        for source in sourcechunk:
+                            if blobs is not None:
+                                for column in ['Object', 'Thumbnail']:
+                                    if column in source:
+                                        source[column] = blobs.put(source[column])
+
+                            source['CreatedDate'] = parsedatetime(source['CreatedDate'])
+                            source['ModifiedDate'] = parsedatetime(source['ModifiedDate'])
+
+                        for source in sourcechunk:
+                            sourcetexts[source['Id']] = source['PlainText']
+                            sourceids.add((source['Id'],))
+
+                        # Sources missing from the NVivo file are only known once every chunk has
+                        # been read, so replace is done as overwrite followed by deletion.
+                        write(merge_overwrite_or_replace, normcon, normSource, ['Id'], sourcechunk,
+                              'overwrite' if args.sources == 'replace' else args.sources,
+                              args.verbosity)
+
+                    sourcecursor.close()
+
+                    # Sources that have not changed may still have moved category
+                    if incremental and args.sources != 'merge':
+                        sourcecats = [{'_Id': row['Id'], 'Category': row['Category']} for row in nvivodb.execute(
+                                sourcequery.with_only_columns([
+                                    nvivoItem.c.Id,
+                                    nvivoCategoryRole.c.Item2_Id.label('Category')
+                                ]).where(and_(
+                                    sourceselected(nvivoItem),
+                                    modifiedwithin([nvivoItem])
+                                ))) if (row['Id'],) not in sourceids]
+                        if len(sourcecats) > 0:
+                            write(executemany, normcon, normSource.update(
+                                    normSource.c.Id == bindparam('_Id')
+                                ).values({
+                                    'Category': bindparam('Category')
+                                }), sourcecats)
+
+                    if args.sources == 'replace':
+                        # In incremental or filtered mode not every source has been read
+                        if incremental or filtered:
+                            sourceids = set(tuple(row) for row in nvivodb.execute(
+                                    sourcequery.with_only_columns([nvivoItem.c.Id])))
+                        write(delete_other_keys, normcon, normSource, ['Id'], sourceids, args.verbosity)
+            finally:
+                # Taggings and annotations wait for the text of every source
+                sourcesdone.set()
 
 # Source attributes
-        if args.source_attributes != 'skip':
-            if args.verbosity > 0:
-                print("Normalising source attributes", file=sys.stderr)
-
-            nvivoNameItem  = nvivoItem.alias(name='NameItem')
-            nvivoNameRole  = nvivoRole.alias(name='NameRole')
-            nvivoValueItem = nvivoItem.alias(name='ValueItem')
-            nvivoValueRole = nvivoRole.alias(name='ValueRole')
-
-            sourceattrvalues  = [dict(row) for row in nvivodb.execute(select([
-                    nvivoSource.c.Item_Id.label('Source'),
-                    nvivoNameItem.c.Id.label('Attribute'),
-                    nvivoNameItem.c.Name,
-                    nvivoNameItem.c.Description,
-                    nvivoNameItem.c.CreatedBy.label('AttrCreatedBy'),
-                    nvivoNameItem.c.CreatedDate.label('AttrCreatedDate'),
-                    nvivoNameItem.c.ModifiedBy.label('AttrModifiedBy'),
-                    nvivoNameItem.c.ModifiedDate.label('AttrModifiedDate'),
-                    nvivoValueItem.c.Name.label('Value'),
-                    nvivoValueItem.c.CreatedBy,
-                    nvivoValueItem.c.CreatedDate,
-                    nvivoValueItem.c.ModifiedBy,
-                    nvivoValueItem.c.ModifiedDate,
-                    nvivoExtendedItem.c.Properties]
-                ).where(and_(
-                    nvivoSource.c.Item_Id == nvivoValueRole.c.Item1_Id,
-                    nvivoValueRole.c.TypeId == literal_column(NVivo.RoleType.ItemValue),
-                    nvivoValueItem.c.Id == nvivoValueRole.c.Item2_Id,
-                    nvivoNameRole.c.Item2_Id == nvivoValueRole.c.Item2_Id,
-                    nvivoNameRole.c.TypeId == literal_column(NVivo.RoleType.AttributeValue),
-                    nvivoNameItem.c.Id == nvivoNameRole.c.Item1_Id,
-                    nvivoValueItem.c.Name != bindparam('UnassignedLabel'),
-                    nvivoExtendedItem.c.Item_Id == nvivoNameItem.c.Id
-                )).order_by(
-                    nvivoNameItem.c.Id
-                ),
-                    {'UnassignedLabel':unassignedlabel}
-                )]
-            lastattribute = None
-            sourceattrs = []
-            for sourceattrvalue in sourceattrvalues:
-                sourceattrvalue['PlainTextName'] = sourceattrvalue['Name']
-                if args.windows:
-                    sourceattrvalue['Name']  = u''.join(map(lambda ch: chr(ord(ch) - 0x377), sourceattrvalue['Name']))
-                    sourceattrvalue['Value'] = u''.join(map(lambda ch: chr(ord(ch) - 0x377), sourceattrvalue['Value']))
-                if not isinstance(sourceattrvalue['AttrCreatedDate'], datetime):
-                    sourceattrvalue['AttrCreatedDate'] = dateparser.parse(sourceattrvalue['AttrCreatedDate'])
-                if not isinstance(sourceattrvalue['AttrModifiedDate'], datetime):
-                    sourceattrvalue['AttrModifiedDate'] = dateparser.parse(sourceattrvalue['AttrModifiedDate'])
-                if not isinstance(sourceattrvalue['CreatedDate'], datetime):
-                    sourceattrvalue['CreatedDate'] = dateparser.parse(sourceattrvalue['CreatedDate'])
-                if not isinstance(sourceattrvalue['ModifiedDate'], datetime):
-                    sourceattrvalue['ModifiedDate'] = dateparser.parse(sourceattrvalue['ModifiedDate'])
-
-                if sourceattrvalue['Attribute'] != lastattribute:
-                    lastattribute = sourceattrvalue['Attribute']
-                    attrtype = None
-                    attrlength = None
-                    for property in parseString(sourceattrvalue['Properties']).documentElement.getElementsByTagName('Property'):
-                        if property.getAttribute('Key') == 'DataType':
-                            attrtype = NVivo.DataTypeName.get(int(property.getAttribute('Value')), property.getAttribute('Value'))
-                        elif property.getAttribute('Key') == 'Length':
-                            attrlength = int(property.getAttribute('Value'))
-                            if attrlength == 0:
-                                attrlength = None
-
-                    # Check for existing attribute with same name
-                    existingattributes = [attr for attr in sourceattrs if attr['Id'] == sourceattrvalue['Attribute']]
-                    if len(existingattributes) > 0:
-                        existingattribute = existingattributes[0]
-                        if existingattribute['Type'] != attrtype or existingattribute['Length'] != attrlength:
-                            raise RuntimeError("ERROR: Attribute " + sourceattrvalue['PlainTextName'] + " is multiply defined with different type or length.")
-                    else:
-                        sourceattrs += [{
+        def normalise_source_attributes(write):
+            if args.source_attributes != 'skip':
+                if args.verbosity > 0:
+                    print("Normalising source attributes", file=sys.stderr)
+
+                nvivoNameItem  = nvivoItem.alias(name='NameItem')
+                nvivoNameRole  = nvivoRole.alias(name='NameRole')
+                nvivoValueItem = nvivoItem.alias(name='ValueItem')
+                nvivoValueRole = nvivoRole.alias(name='ValueRole')
+
+                sourceattrquery = select([
+                        nvivoSource.c.Item_Id.label('Source'),
+                        nvivoNameItem.c.Id.label('Attribute'),
+                        nvivoNameItem.c.Name,
+                        nvivoNameItem.c.Description,
+                        nvivoNameItem.c.CreatedBy.label('AttrCreatedBy'),
+                        nvivoNameItem.c.CreatedDate.label('AttrCreatedDate'),
+                        nvivoNameItem.c.ModifiedBy.label('AttrModifiedBy'),
+                        nvivoNameItem.c.ModifiedDate.label('AttrModifiedDate'),
+                        nvivoValueItem.c.Name.label('Value'),
+                        nvivoValueItem.c.CreatedBy,
+                        nvivoValueItem.c.CreatedDate,
+                        nvivoValueItem.c.ModifiedBy,
+                        nvivoValueItem.c.ModifiedDate,
+                        nvivoExtendedItem.c.Properties]
+                    ).where(and_(
+                        nvivoSource.c.Item_Id == nvivoValueRole.c.Item1_Id,
+                        nvivoValueRole.c.TypeId == literal_column(NVivo.RoleType.ItemValue),
+                        nvivoValueItem.c.Id == nvivoValueRole.c.Item2_Id,
+                        nvivoNameRole.c.Item2_Id == nvivoValueRole.c.Item2_Id,
+                        nvivoNameRole.c.TypeId == literal_column(NVivo.RoleType.AttributeValue),
+                        nvivoNameItem.c.Id == nvivoNameRole.c.Item1_Id,
+                        nvivoValueItem.c.Name != bindparam('UnassignedLabel'),
+                        nvivoExtendedItem.c.Item_Id == nvivoNameItem.c.Id
+                    )).order_by(
+                        nvivoNameItem.c.Id
+                    )
+                sourceattrvalues = stats.read([dict(row) for row in nvivodb.execute(sourceattrquery.where(and_(
+                        sourceidselected(nvivoSource.c.Item_Id),
+                        modifiedwithin([nvivoNameItem, nvivoValueItem])
+                    )),
+                        {'UnassignedLabel':unassignedlabel}
+                    )])
+                lastattribute = None
+                sourceattrs = AttributeRegistry()
+                for sourceattrvalue in sourceattrvalues:
+                    sourceattrvalue['PlainTextName'] = sourceattrvalue['Name']
+                    if args.windows:
+                        sourceattrvalue['Name']  = decodename(sourceattrvalue['Name'])
+                        sourceattrvalue['Value'] = decodename(sourceattrvalue['Value'])
+                    sourceattrvalue['AttrCreatedDate'] = parsedatetime(sourceattrvalue['AttrCreatedDate'])
+                    sourceattrvalue['AttrModifiedDate'] = parsedatetime(sourceattrvalue['AttrModifiedDate'])
+                    sourceattrvalue['CreatedDate'] = parsedatetime(sourceattrvalue['CreatedDate'])
+                    sourceattrvalue['ModifiedDate'] = parsedatetime(sourceattrvalue['ModifiedDate'])
+
+                    if sourceattrvalue['Attribute'] != lastattribute:
+                        lastattribute = sourceattrvalue['Attribute']
+                        properties = decodeproperties(sourceattrvalue['Properties'])
+                        attrtype = properties.get('DataType')
+                        if attrtype is not None:
+                            attrtype = NVivo.DataTypeName.get(attrtype, unicode(attrtype))
+                        attrlength = properties.get('Length') or None
+
+                        # Register the attribute, checking that any earlier definition matches
+                        sourceattrs.add({
                             'Id':            sourceattrvalue['Attribute'],
                             'Name':          sourceattrvalue['Name'],
                             'PlainTextName': sourceattrvalue['PlainTextName'],
@@ -773,43 +1013,40 @@ def Normalise(args):
                             'CreatedDate':   sourceattrvalue['AttrCreatedDate'],
                             'ModifiedBy':    sourceattrvalue['AttrModifiedBy'],
                             'ModifiedDate':  sourceattrvalue['AttrModifiedDate']
-                        }]
+                        })
 
-            merge_overwrite_or_replace(normcon, normSourceAttribute, ['Id'], sourceattrs, args.source_attributes, args.verbosity)
-            merge_overwrite_or_replace(normcon, normSourceValue, ['Source', 'Attribute'], sourceattrvalues, args.source_attributes, args.verbosity)
+                writechanges(write, normSourceAttribute, ['Id'], list(sourceattrs), args.source_attributes,
+                             [sourceattrquery.with_only_columns([nvivoNameItem.c.Id]).distinct().params(UnassignedLabel=unassignedlabel)])
+                writechanges(write, normSourceValue, ['Source', 'Attribute'], sourceattrvalues, args.source_attributes,
+                             [sourceattrquery.with_only_columns([nvivoSource.c.Item_Id, nvivoNameItem.c.Id]).params(UnassignedLabel=unassignedlabel)])
 
 # Tagging
+        # Offset index for each source, built the first time the source is referenced
+        sourceoffsets = {}
         def build_tagging_or_annotation(item):
+            offsets = sourceoffsets.get(item['Source'])
+            if offsets is None:
+                # Sources that the sources phase did not read, because they were skipped
+                # or are unchanged since the last incremental run, are read here.
+                if item['Source'] in sourcetexts:
+                    sourcetext = sourcetexts[item['Source']]
+                else:
+                    sourcetext = nvivodb.execute(select([
+                            nvivoSource.c.PlainText
+                        ]).where(
+                            nvivoSource.c.Item_Id == bindparam('Id')
+                        ), {'Id':item['Source']}).scalar()
+                offsets = SourceOffsets(sourcetext)
+                sourceoffsets[item['Source']] = offsets
+
             # On Mac, text sections refer to indexes on non-space characters, but non-breaking
             # spaces are counted.
             if args.mac:
-                # TODO: Deal with case where we have skipped sources
-                source = next(source for source in sources if source['Id'] == item['Source'])
-                sourcetext = source['PlainText']
-
-                startx = item['StartText']
-                laststartx = 0
-                nextstartx = startx + sum(c.isspace() and c != u'\xa0' for c in sourcetext[laststartx:startx+1])
-                while nextstartx > startx:
-                    laststartx = startx+1
-                    startx = nextstartx
-                    nextstartx = startx + sum(c.isspace() and c != u'\xa0' for c in sourcetext[laststartx:startx+1])
-
-                lengthx = item['LengthText']
-                lastlengthx = 0
-                nextlengthx = lengthx + sum(c.isspace() and c != u'\xa0' for c in sourcetext[startx+lastlengthx:startx+lengthx])
-                while nextlengthx > lengthx:
-                    lastlengthx = lengthx
-                    lengthx = nextlengthx
-                    nextlengthx = lengthx + sum(c.isspace() and c != u'\xa0' for c in sourcetext[startx+lastlengthx:startx+lengthx])
-
-                item['StartX']  = startx
-                item['LengthX'] = lengthx
+                item['StartX'], item['LengthX'] = offsets.fromMac(item['StartText'], item['LengthText'])
             # Otherwise correct for adjusted line terminators: PlainText is original, Content
             # is adjusted.
             else:
-                item['StartX']  -= source['Content'][0:startx].count('\r\n')
-                item['LengthX'] -= source['Content'][startx-1:startx+lengthx-1].count('\r\n')
+                item['StartX'], item['LengthX'] = offsets.fromWindows(item['StartX'], item['LengthX'])
 
             item['Node'] = None
             item['Fragment'] = ''
@@ -820,66 +1057,110 @@ def Normalise(args):
                 if item['LengthY'] > 0:
                     item['Fragment'] += ':' + str(item['StartY'] + item['LengthY'] - 1)
 
-            if not isinstance(item['CreatedDate'], datetime):
-                item['CreatedDate'] = dateparser.parse(item['CreatedDate'])
-            if not isinstance(item['ModifiedDate'], datetime):
-                item['ModifiedDate'] = dateparser.parse(item['ModifiedDate'])
-
-        if args.taggings != 'skip':
-            if args.verbosity > 0:
-                print("Normalising taggings", file=sys.stderr)
-
-            taggings  = [dict(row) for row in nvivodb.execute(select([
-                    nvivoNodeReference.c.Id,
-                    nvivoNodeReference.c.Source_Item_Id.label('Source'),
-                    nvivoNodeReference.c.Node_Item_Id.label('Node'),
-                    nvivoNodeReference.c.StartText  if args.mac else nvivoNodeReference.c.StartX,
-                    nvivoNodeReference.c.LengthText if args.mac else nvivoNodeReference.c.LengthX,
-                    nvivoNodeReference.c.StartY,
-                    nvivoNodeReference.c.LengthY,
-                    nvivoNodeReference.c.StartZ,
-                    nvivoNodeReference.c.CreatedBy,
-                    nvivoNodeReference.c.CreatedDate,
-                    nvivoNodeReference.c.ModifiedBy,
-                    nvivoNodeReference.c.ModifiedDate
-                ]).where(and_(
-                    #nvivoNodeReference.c.ReferenceTypeId == literal_column('0'),
-                    nvivoItem.c.Id == nvivoNodeReference.c.Node_Item_Id,
-                    nvivoItem.c.TypeId == literal_column(NVivo.ItemType.Node),
-                    nvivoNodeReference.c.StartZ.is_(None)
-                )))]
-            for tagging in taggings:
-                build_tagging_or_annotation(tagging)
+            item['CreatedDate'] = parsedatetime(item['CreatedDate'])
+            item['ModifiedDate'] = parsedatetime(item['ModifiedDate'])
 
-            merge_overwrite_or_replace(normcon, normTagging, ['Id'], taggings, args.taggings, args.verbosity)
+        def normalise_taggings(write):
+            if args.taggings != 'skip':
+                if args.verbosity > 0:
+                    print("Normalising taggings", file=sys.stderr)
+
+                taggingquery = select([
+                        nvivoNodeReference.c.Id,
+                        nvivoNodeReference.c.Source_Item_Id.label('Source'),
+                        nvivoNodeReference.c.Node_Item_Id.label('Node'),
+                        nvivoNodeReference.c.StartText  if args.mac else nvivoNodeReference.c.StartX,
+                        nvivoNodeReference.c.LengthText if args.mac else nvivoNodeReference.c.LengthX,
+                        nvivoNodeReference.c.StartY,
+                        nvivoNodeReference.c.LengthY,
+                        nvivoNodeReference.c.StartZ,
+                        nvivoNodeReference.c.CreatedBy,
+                        nvivoNodeReference.c.CreatedDate,
+                        nvivoNodeReference.c.ModifiedBy,
+                        nvivoNodeReference.c.ModifiedDate
+                    ]).where(and_(
+                        #nvivoNodeReference.c.ReferenceTypeId == literal_column('0'),
+                        nvivoItem.c.Id == nvivoNodeReference.c.Node_Item_Id,
+                        nvivoItem.c.TypeId == literal_column(NVivo.ItemType.Node),
+                        nvivoNodeReference.c.StartZ.is_(None)
+                    ))
+                taggings  = stats.read([dict(row) for row in nvivodb.execute(taggingquery.where(and_(
+                        changedsince('Tagging', [nvivoNodeReference]),
+                        nodeselected(nvivoItem),
+                        sourceidselected(nvivoNodeReference.c.Source_Item_Id),
+                        modifiedwithin([nvivoNodeReference])
+                    )))])
+                sourcesdone.wait()
+                for tagging in taggings:
+                    build_tagging_or_annotation(tagging)
+
+                # Taggings and annotations share a table, so both count as present
+                writechanges(write, normTagging, ['Id'], taggings, args.taggings,
+                             [taggingquery.with_only_columns([nvivoNodeReference.c.Id]),
+                              select([nvivoAnnotation.c.Id])])
 
 # Annotations
-        if args.annotations != 'skip':
-            if args.verbosity > 0:
-                print("Normalising annotations", file=sys.stderr)
-
-            annotations  = [dict(row) for row in nvivodb.execute(select([
-                    nvivoAnnotation.c.Id,
-                    nvivoAnnotation.c.Item_Id.label('Source'),
-                    nvivoAnnotation.c.Text.label('Memo'),
-                    nvivoAnnotation.c.StartText  if args.mac else nvivoAnnotation.c.StartX,
-                    nvivoAnnotation.c.LengthText if args.mac else nvivoAnnotation.c.LengthX,
-                    nvivoAnnotation.c.StartY,
-                    nvivoAnnotation.c.LengthY,
-                    nvivoAnnotation.c.CreatedBy,
-                    nvivoAnnotation.c.CreatedDate,
-                    nvivoAnnotation.c.ModifiedBy,
-                    nvivoAnnotation.c.ModifiedDate
-                ]))]
-
-            for annotation in annotations:
-                build_tagging_or_annotation(annotation)
-
-            merge_overwrite_or_replace(normcon, normTagging, ['Id'], annotations, args.annotations, args.verbosity)
+        def normalise_annotations(write):
+            if args.annotations != 'skip':
+                if args.verbosity > 0:
+                    print("Normalising annotations", file=sys.stderr)
+
+                annotationquery = select([
+                        nvivoAnnotation.c.Id,
+                        nvivoAnnotation.c.Item_Id.label('Source'),
+                        nvivoAnnotation.c.Text.label('Memo'),
+                        nvivoAnnotation.c.StartText  if args.mac else nvivoAnnotation.c.StartX,
+                        nvivoAnnotation.c.LengthText if args.mac else nvivoAnnotation.c.LengthX,
+                        nvivoAnnotation.c.StartY,
+                        nvivoAnnotation.c.LengthY,
+                        nvivoAnnotation.c.CreatedBy,
+                        nvivoAnnotation.c.CreatedDate,
+                        nvivoAnnotation.c.ModifiedBy,
+                        nvivoAnnotation.c.ModifiedDate
+                    ])
+                annotations  = stats.read([dict(row) for row in nvivodb.execute(annotationquery.where(and_(
+                        changedsince('Annotation', [nvivoAnnotation]),
+                        sourceidselected(nvivoAnnotation.c.Item_Id),
+                        modifiedwithin([nvivoAnnotation])
+                    )))])
+
+                sourcesdone.wait()
+                for annotation in annotations:
+                    build_tagging_or_annotation(annotation)
+
+                writechanges(write, normTagging, ['Id'], annotations, args.annotations,
+                             [annotationquery.with_only_columns([nvivoAnnotation.c.Id]),
+                              select([nvivoNodeReference.c.Id]).where(and_(
+                                  nvivoItem.c.Id == nvivoNodeReference.c.Node_Item_Id,
+                                  nvivoItem.c.TypeId == literal_column(NVivo.ItemType.Node),
+                                  nvivoNodeReference.c.StartZ.is_(None)
+                              ))])
+
+# Run the phases, in pipelined mode each in its own thread
+        phases = [normalise_users,
+                  normalise_project,
+                  normalise_node_categories,
+                  normalise_nodes,
+                  normalise_node_attributes,
+                  normalise_source_categories,
+                  normalise_sources,
+                  normalise_source_attributes,
+                  normalise_taggings,
+                  normalise_annotations]
+        phases = [stats.wrap(phase.__name__.replace('normalise_', ''), phase) for phase in phases]
+        if getattr(args, 'pipeline', False):
+            run_pipeline(phases)
+        else:
+            run_sequential(phases)
+
+        if incremental:
+            merge_overwrite_or_replace(normcon, normWatermark, ['Name'], newwatermarks.values(), 'overwrite', args.verbosity)
 
 # All done.
         normtr.commit()
         normtr = None
+        stats.close()
+        compressor.close()
         normcon.close()
         normdb.dispose()
 
@@ -916,6 +1197,50 @@ def Denormalise(args):
         normNodeAttribute   = Table('NodeAttribute',   normmd, autoload=True)
         normNodeValue       = Table('NodeValue',       normmd, autoload=True)
 
+        # Paragraph indexes of the text of sources, kept from earlier runs. New indexes are
+        # only written back to a normalised file that is a writable SQLite file.
+        try:
+            normSourceParagraphs = Table('SourceParagraphs', normmd, autoload=True)
+        except exc.NoSuchTableError:
+            normSourceParagraphs = None
+        storedparagraphs = {}
+        newparagraphs = []
+        keepparagraphs = (normdb.dialect.name == 'sqlite' and bool(normdb.url.database) and
+                          os.access(normdb.url.database, os.W_OK) and
+                          os.access(os.path.dirname(os.path.abspath(normdb.url.database)), os.W_OK))
+
+        # Objects and thumbnails of the normalised file may be in a blob store
+        blobdir = getattr(args, 'blob_directory', None)
+        if blobdir is None and normdb.dialect.name == 'sqlite' and normdb.url.database:
+            blobdir = blobdirectory(normdb.url.database)
+        blobs = BlobStore(blobdir) if blobdir and os.path.isdir(blobdir) else None
+
+        # Documents are converted by a pool of LibreOffice listeners, or by a fresh unoconv
+        # for each conversion if there are to be no listeners, unless the caller supplies
+        # a converter of its own.
+        converter = getattr(args, 'converter', None)
+        ownconverter = converter is None
+        if ownconverter:
+            unoconvservers = getattr(args, 'unoconv_servers', None)
+            if unoconvservers is None:
+                unoconvservers = 1
+            if unoconvservers > 0:
+                converter = UnoconvPool(NVivo.helperpath, unoconvservers, args.verbosity)
+            else:
+                converter = UnoconvConverter(NVivo.helperpath)
+
+        pdfextractor = PdfExtractor(getattr(args, 'pdf_workers', None), blobdir if blobs is not None else None)
+        thumbnailer  = Thumbnailer(getattr(args, 'thumbnail_workers', None), blobdir if blobs is not None else None)
+        compressor   = Compressor(level=getattr(args, 'compression_level', None))
+
+        # Conversions of sources are kept between runs if there is a conversion cache
+        cachedir = getattr(args, 'conversion_cache', None)
+        if cachedir:
+            cachesize = getattr(args, 'conversion_cache_size', None)
+            cache = ConversionCache(cachedir, cachesize * 1048576 if cachesize is not None else None)
+        else:
+            cache = None
+
         if args.outdb is None:
             args.outdb = args.indb.rsplit('.',1)[0] + '.nvivo'
 
@@ -934,6 +1259,7 @@ def Denormalise(args):
 
         nvivocon = nvivodb.connect()
         nvivotr = nvivocon.begin()
+        stats = ConversionStats('Denormalise', [normdb, nvivodb], getattr(args, 'stats', None))
         mssql = nvivodb.dialect.name == 'mssql'
 
 # Load project record to extract the default users
@@ -951,21 +1277,22 @@ def Denormalise(args):
             raise RuntimeError("Incompatible version of normalised file: " + project['NVivotoolsVersion'])
 
 # Users
+        stats.begin('users')
         if args.users != 'skip':
             if args.verbosity > 0:
                 print("Denormalising users", file=sys.stderr)
 
-            users = [dict(row) for row in normdb.execute(select([
+            users = stats.read([dict(row) for row in normdb.execute(select([
                     normUser.c.Id,
                     normUser.c.Name]
-                ))]
+                ))])
             for user in users:
                 user['Initials'] = u''.join(word[0].upper() for word in user['Name'].split())
 
             if args.users == 'replace':
-                newids = [row['Id'] for row in users]
-                curids = [row['Id'] for row in nvivocon.execute(select([nvivoUserProfile.c.Id]))]
-                idstodelete = [{'_Id':id} for id in curids if not id in newids]
+                newids = set(row['Id'] for row in users)
+                curids = set(row['Id'] for row in nvivocon.execute(select([nvivoUserProfile.c.Id])))
+                idstodelete = [{'_Id':id} for id in curids - newids]
 
                 # First create the new users
                 merge_overwrite_or_replace(nvivocon, nvivoUserProfile, ['Id'], users, 'overwrite', args.verbosity)
@@ -975,30 +1302,28 @@ def Denormalise(args):
                     userCreatedBy  = table.c.get('CreatedBy')
                     userModifiedBy = table.c.get('ModifiedBy')
 
-                    if userCreatedBy is not None:
-                        for idtodelete in idstodelete:
-                            nvivocon.execute(table.update(
-                                    userCreatedBy == bindparam('_Id')
-                                ).values({
-                                    'CreatedBy':   bindparam('CreatedBy'),
-                                    'CreatedDate': bindparam('CreatedDate')
-                                }), {
-                                    '_Id':         idtodelete['_Id'],
-                                    'CreatedBy':   project['CreatedBy'],
-                                    'CreatedDate': project['CreatedDate']
-                                })
-                    if userModifiedBy is not None:
-                        for idtodelete in idstodelete:
-                            nvivocon.execute(table.update(
-                                    userModifiedBy == bindparam('_Id')
-                                ).values({
-                                    'ModifiedBy':   bindparam('ModifiedBy'),
-                                    'ModifiedDate': bindparam('ModifiedDate')
-                                }), {
-                                    '_Id':          idtodelete['_Id'],
-                                    'ModifiedBy':   project['ModifiedBy'],
-                                    'ModifiedDate': project['ModifiedDate']
-                                })
+                    if userCreatedBy is not None and len(idstodelete) > 0:
+                        nvivocon.execute(table.update(
+                                userCreatedBy == bindparam('_Id')
+                            ).values({
+                                'CreatedBy':   bindparam('CreatedBy'),
+                                'CreatedDate': bindparam('CreatedDate')
+                            }), [{
+                                '_Id':         idtodelete['_Id'],
+                                'CreatedBy':   project['CreatedBy'],
+                                'CreatedDate': project['CreatedDate']
+                            } for idtodelete in idstodelete])
+                    if userModifiedBy is not None and len(idstodelete) > 0:
+                        nvivocon.execute(table.update(
+                                userModifiedBy == bindparam('_Id')
+                            ).values({
+                                'ModifiedBy':   bindparam('ModifiedBy'),
+                                'ModifiedDate': bindparam('ModifiedDate')
+                            }), [{
+                                '_Id':          idtodelete['_Id'],
+                                'ModifiedBy':   project['ModifiedBy'],
+                                'ModifiedDate': project['ModifiedDate']
+                            } for idtodelete in idstodelete])
 
                     # Finally the users can be deleted
                     if len(idstodelete) > 0:
@@ -1009,6 +1334,7 @@ def Denormalise(args):
                 merge_overwrite_or_replace(nvivocon, nvivoUserProfile, ['Id'], users, args.users, args.verbosity)
 
 # Project
+        stats.begin('project')
         # Read unassigned and not applicable labels from existing NVivo project record.
         nvivoproject = nvivocon.execute(select([nvivoProject.c.UnassignedLabel,
                                                 nvivoProject.c.NotApplicableLabel])).first()
@@ -1016,41 +1342,36 @@ def Denormalise(args):
         unassignedlabel    = nvivoproject['UnassignedLabel']
         notapplicablelabel = nvivoproject['NotApplicableLabel']
         if args.windows:
-            unassignedlabel    = u''.join(map(lambda ch: chr(ord(ch) + 0x377), unassignedlabel))
-            notapplicablelabel = u''.join(map(lambda ch: chr(ord(ch) + 0x377), notapplicablelabel))
+            unassignedlabel    = encodename(unassignedlabel)
+            notapplicablelabel = encodename(notapplicablelabel)
 
         if args.project != 'skip':
             print("Denormalising project", file=sys.stderr)
 
             project['Description'] = project['Description'] or u''
             if args.windows:
-                project['Title']       = u''.join(map(lambda ch: chr(ord(ch) + 0x377), project['Title']))
-                project['Description'] = u''.join(map(lambda ch: chr(ord(ch) + 0x377), project['Description'].replace('\n', '\r\n')))
+                project['Title']       = encodename(project['Title'])
+                project['Description'] = encodename(project['Description'].replace('\n', '\r\n'))
 
             if args.project == 'overwrite':
                 nvivocon.execute(nvivoProject.update(), project)
 
-        # Item name loookup query
-        namesel = select([
-                nvivoItem.c.Name
-            ]).where(
-                nvivoItem.c.Id == bindparam('Id')
-            )
-
-        # Hierarchical name lookup query
-        if args.mac:
-            hierarchicalnamesel = select([
-                    nvivoItem.c.HierarchicalName
-                ]).where(
-                    nvivoItem.c.Id == bindparam('Id')
-                )
+        # Catalogue of NVivo items, read once and kept up to date as items are written, so
+        # that names and hierarchical names are looked up without a query for each item.
+        catalogue = ItemCatalogue()
+        catalogue.load(nvivocon, nvivoItem, nvivoRole, NVivo.RoleType.ParentItem, args.mac)
+
+        # Write rows a chunk at a time, so that a large batch does not become one enormous
+        # statement for the driver
+        def executechunks(statement, rows):
+            for start in range(0, len(rows), NVivo.ROWCHUNKSIZE):
+                nvivocon.execute(statement, rows[start:start + NVivo.ROWCHUNKSIZE])
 
         def itemname(id):
-            res = nvivocon.execute(namesel, {'Id':id}).first()
+            res = catalogue.name(id)
             if res is not None:
-                res = res['Name']
                 if args.windows:
-                    res = u''.join(map(lambda ch: chr(ord(ch) - 0x377), res))
+                    res = decodename(res)
             else:
                 res = u''
             return res
@@ -1064,7 +1385,7 @@ def Denormalise(args):
                 # Look up head category
                 headcategoryname = name.title() + u' Classifications'
                 if args.windows:
-                    headcategoryname = u''.join(map(lambda ch: chr(ord(ch) + 0x377), headcategoryname))
+                    headcategoryname = encodename(headcategoryname)
 
                 headcategory = nvivocon.execute(select([
                         nvivoItem.c.Id
@@ -1080,7 +1401,7 @@ def Denormalise(args):
                 else:
                     if args.verbosity > 1:
                         print("Found head " + name + " category Id: " + str(headcategory['Id']), file=sys.stderr)
-                categories = [dict(row) for row in normdb.execute(select([
+                categories = stats.read([dict(row) for row in normdb.execute(select([
                         normtable.c.Id,
                         normtable.c.Name,
                         normtable.c.Description,
@@ -1088,32 +1409,29 @@ def Denormalise(args):
                         normtable.c.CreatedDate,
                         normtable.c.ModifiedBy,
                         normtable.c.ModifiedDate
-                    ]))]
+                    ]))])
                 for category in categories:
                     category['Id']            = category['Id']          or uuid.uuid4()
                     category['_Id']           = category['Id']      # So we can bind parameter
                     category['Description']   = category['Description'] or u''
                     category['PlainTextName'] = category['Name']
                     if args.windows:
-                        category['Name']        = u''.join(map(lambda ch: chr(ord(ch) + 0x377), category['Name']))
-                        category['Description'] = u''.join(map(lambda ch: chr(ord(ch) + 0x377), category['Description'].replace('\n', '\r\n')))
+                        category['Name']        = encodename(category['Name'])
+                        category['Description'] = encodename(category['Description'].replace('\n', '\r\n'))
                     if args.mac:
                         category['HierarchicalName'] = headcategoryname + u'\\\\' + category['Name']
 
-                newids = [{'_Id':row['Id']} for row in categories]
-                curids = [{'_Id':row['Id']} for row in nvivocon.execute(select([
-                        nvivoItem.c.Id
-                    ]).where(
-                        nvivoItem.c.TypeId == literal_column(itemtype)
-                    ))]
+                curids = catalogue.ids(itemtype)
 
                 if operation == 'overwrite':
-                    rowstoupdate = [row for row in categories if {'_Id':row['Id']} in curids]
+                    rowstoupdate = [row for row in categories if row['Id'] in curids]
                     if len(rowstoupdate) > 0:
                         nvivocon.execute(nvivoItem.update(
                             nvivoItem.c.Id == bindparam('_Id')), rowstoupdate)
+                        for row in rowstoupdate:
+                            catalogue.update(row['Id'], Name=row['Name'], HierarchicalName=row.get('HierarchicalName'))
 
-                rowstoinsert = [row for row in categories if not {'_Id':row['Id']} in curids]
+                rowstoinsert = [row for row in categories if row['Id'] not in curids]
                 if len(rowstoinsert) > 0:
                     itemvalues = {
                             'Id':        bindparam('_Id'),
@@ -1128,6 +1446,8 @@ def Denormalise(args):
                             'HierarchicalName': bindparam('HierarchicalName')
                         })
                     nvivocon.execute(nvivoItem.insert().values(itemvalues), rowstoinsert)
+                    for row in rowstoinsert:
+                        catalogue.add(row['Id'], row['Name'], int(itemtype), hierarchicalname=row.get('HierarchicalName'))
                     nvivocon.execute(nvivoRole.insert().values({
                             'Item1_Id': literal_column("'" + str(headcategory['Id']) + "'"),
                             'Item2_Id': bindparam('_Id'),
@@ -1144,9 +1464,11 @@ def Denormalise(args):
                         }), rowstoinsert)
 
 # Node Categories
+        stats.begin('node_categories')
         skip_merge_or_overwrite_categories(normNodeCategory, NVivo.ItemType.NodeClassification, 'case' if args.nvivoversion == '11' else 'node', args.node_categories)
 
 # Nodes
+        stats.begin('nodes')
         if args.nodes != 'skip':
             if args.verbosity > 0:
                 print("Denormalising nodes", file=sys.stderr)
@@ -1154,7 +1476,7 @@ def Denormalise(args):
             # Look up head node
             headnodename = u'Nodes'
             if args.windows:
-                headnodename = u''.join(map(lambda ch: chr(ord(ch) + 0x377), headnodename))
+                headnodename = encodename(headnodename)
 
             headnode = nvivocon.execute(select([
                     nvivoItem.c.Id
@@ -1171,7 +1493,7 @@ def Denormalise(args):
                 if args.verbosity > 1:
                     print("Found head node Id: " + str(headnode['Id']), file=sys.stderr)
 
-            nodes = [dict(row) for row in normdb.execute(select([
+            nodes = stats.read([dict(row) for row in normdb.execute(select([
                     normNode.c.Id,
                     normNode.c.Parent,
                     normNode.c.Category,
@@ -1183,7 +1505,7 @@ def Denormalise(args):
                     normNode.c.CreatedDate,
                     normNode.c.ModifiedBy,
                     normNode.c.ModifiedDate
-                ]))]
+                ]))])
 
             tag = 0
             for node in nodes:
@@ -1194,60 +1516,23 @@ def Denormalise(args):
                 node['Name'] = re.sub(NVivo.ILLEGALNAMECHARS, '_', node['Name']).strip()
 
                 if args.windows:
-                    node['Name']        = u''.join(map(lambda ch: chr(ord(ch) + 0x377), node['Name']))
-                    node['Description'] = u''.join(map(lambda ch: chr(ord(ch) + 0x377), node['Description'].replace('\n', '\r\n')))
+                    node['Name']        = encodename(node['Name'])
+                    node['Description'] = encodename(node['Description'].replace('\n', '\r\n'))
                 node['Color'] = node['Color'] or 0
-                if args.mac:
-                    node['HierarchicalName'] = node['Name']
-                    parent = node['Parent']
-                    while parent is not None:
-                        parentnode = normdb.execute(select([
-                                normNode.c.Name,
-                                normNode.c.Parent
-                            ]).where(
-                                normNode.c.Id == bindparam('Parent')
-                            ), {
-                                'Parent': parent
-                            }).first()
-                        node['HierarchicalName'] = parentnode['Name'] + u'\\' + node['HierarchicalName']
-                        parent = parentnode['Parent']
-                    node['HierarchicalName'] = u'Nodes\\\\' + node['HierarchicalName']
-
-            # JS This might be NQR. Not sure whether node should aggregate to itself -
-            # might depend on NVivo version?
-            def tagchildnodes(TopParent, Parent, AggregateList, depth):
-                tag = depth << 16
-                for node in nodes:
-                    if node['Parent'] == Parent:
-                        node['RoleTag'] = tag
-                        tag += 1
-                        node['AggregateList'] = [node['Id']] + AggregateList
-                        if Parent is None:
-                            node['TopParent'] = node['Id']
-                        else:
-                            node['TopParent'] = TopParent
 
-                        if node['Aggregate'] is None:
-                            node['Aggregate'] = False
+            curids = catalogue.ids(NVivo.ItemType.Node)
 
-                        if node['Aggregate']:
-                            tagchildnodes(node['TopParent'], node['Id'], node['AggregateList'], depth+1)
-                        else:
-                            tagchildnodes(node['TopParent'], node['Id'], [], depth+1)
-
-            newids = [{'_Id':row['Id']} for row in nodes]
-            curids = [{'_Id':row['Id']} for row in nvivocon.execute(select([
-                    nvivoItem.c.Id
-                ]).where(
-                    nvivoItem.c.TypeId == literal_column(NVivo.ItemType.Node)
-                ))]
-
-            nodestoinsert = [node for node in nodes if not {'_Id':node['Id']} in curids]
+            nodestoinsert = [node for node in nodes if node['Id'] not in curids]
             if args.verbosity > 1:
                 for node in nodestoinsert:
                     print("Inserting node: " + node['PlainTextName'], file=sys.stderr)
 
-            tagchildnodes(None, None, [], 0)
+            # Hierarchical names are built from the names of the node's ancestors, which are
+            # either among the nodes being denormalised or already in the NVivo project.
+            tree = NodeTree(nodes)
+            if args.mac:
+                tree.hierarchicalnames(u'Nodes\\\\', u'\\', catalogue.hierarchicalname)
+            tree.tag()
             aggregatepairs = []
             for node in nodestoinsert:
                 for dest in node['AggregateList']:
@@ -1268,6 +1553,8 @@ def Denormalise(args):
                         'HierarchicalName': bindparam('HierarchicalName')
                     })
                 nvivocon.execute(nvivoItem.insert().values(itemvalues), nodestoinsert)
+                for node in nodestoinsert:
+                    catalogue.add(node['Id'], node['Name'], int(NVivo.ItemType.Node), node['Parent'], node.get('HierarchicalName'))
                 nvivocon.execute(nvivoRole.insert().values({
                         'Item1_Id': literal_column("'" + str(headnode['Id']) + "'"),
                         'Item2_Id': bindparam('Id'),
@@ -1305,117 +1592,123 @@ def Denormalise(args):
 
         def skip_merge_or_overwrite_attributes(attributes, values, name, operation):
 
-            nvivoCategoryRole  = nvivoRole.alias(name='CategoryRole')
-            nvivoCategoryAttributeRole = nvivoRole.alias(name='CategoryAttributeRole')
-            nvivoAttributeItem = nvivoItem.alias(name='AttributeItem')
-            nvivoNewValueRole = nvivoRole.alias(name='NewValueRole')
-            nvivoNewValueItem = nvivoItem.alias(name='NewValueItem')
-            nvivoExistingValueRole = nvivoRole.alias(name='ExistingValueRole')
-            nvivoValueRole = nvivoRole.alias(name='ValueRole')
-            nvivoCountAttributeRole = nvivoRole.alias(name='CountAttributeRole')
-            nvivoCountValueRole = nvivoRole.alias(name='CountValueRole')
-
-            itemsel = select([
-                    nvivoCategoryRole.c.Item2_Id.label('Category')
-                ]).where(and_(
-                    nvivoItem.c.Id == bindparam('Item')
-                )).select_from(
-                    nvivoItem.outerjoin(
-                    nvivoCategoryRole, and_(
-                    nvivoCategoryRole.c.TypeId   == literal_column(NVivo.RoleType.ItemCategory),
-                    nvivoCategoryRole.c.Item1_Id == nvivoItem.c.Id
-                )))
+            nvivoAttributeValueRole = nvivoRole.alias(name='AttributeValueRole')
 
-            # Build dictionary of item categories
-            uniqueitems = set(value['Item'] for value in values)
-            itemcategory = {}
-            for item in uniqueitems:
-                itemselresult = nvivocon.execute(itemsel, {'Item':item}).first()
-                if itemselresult is None:
-                    raise RuntimeError("ERROR: " + name + " '" + str(item) + " missing")
-                else:
-                    itemcategory[item] = itemselresult['Category']
-            for value in values:
-                value['Category'] = itemcategory[value['Item']]
-                if value['Category'] is None:
-                    raise RuntimeError("WARNING: " + name + " '" + itemname(value['Item']) + "' has no category, attributes cannot be stored.")
-                    continue
-
-            attrsel = select([
-                    func.max(nvivoCountAttributeRole.c.Tag).label('MaxAttributeTag')
-                ]).where(and_(
-                    nvivoCountAttributeRole.c.TypeId == literal_column(NVivo.RoleType.AttributeClassification),
-                    nvivoCountAttributeRole.c.Item2_Id == bindparam('Category')
-                ))
+            # Read the categories of items, the attributes of categories, the values of
+            # attributes and the values assigned to items in a few queries, so that every
+            # change can be worked out in memory and then written in bulk.
+            itemcategory  = {}
+            categoryitems = {}
+            for row in stats.read([dict(row) for row in nvivocon.execute(select([
+                    nvivoRole.c.Item1_Id.label('Item'),
+                    nvivoRole.c.Item2_Id.label('Category')
+                ]).where(
+                    nvivoRole.c.TypeId == literal_column(NVivo.RoleType.ItemCategory)
+                ))]):
+                itemcategory.setdefault(row['Item'], row['Category'])
+                categoryitems.setdefault(row['Category'], set()).add(row['Item'])
 
-            valuesel = select([
-                    nvivoNewValueItem.c.Id.label('NewValueId'),
-                    nvivoValueRole.c.Item2_Id.label('ExistingValueId'),
+            categoryattributes = set()
+            maxattributetags = {}
+            for row in stats.read([dict(row) for row in nvivocon.execute(select([
+                    nvivoRole.c.Item1_Id.label('Attribute'),
+                    nvivoRole.c.Item2_Id.label('Category'),
+                    nvivoRole.c.Tag
+                ]).where(
+                    nvivoRole.c.TypeId == literal_column(NVivo.RoleType.AttributeClassification)
+                ))]):
+                categoryattributes.add((row['Attribute'], row['Category']))
+                if row['Tag'] is not None:
+                    maxattributetags[row['Category']] = max(maxattributetags.get(row['Category'], -1), row['Tag'])
+
+            # Values are listed by attribute and name, and assignments by item and attribute;
+            # more than one of either is an inconsistency that is only reported if we need it.
+            valueids = {}
+            maxvaluetags = {}
+            for row in stats.read([dict(row) for row in nvivocon.execute(select([
+                    nvivoRole.c.Item1_Id.label('Attribute'),
+                    nvivoRole.c.Item2_Id.label('Value'),
+                    nvivoRole.c.Tag,
+                    nvivoItem.c.Name
                 ]).where(and_(
-                    nvivoCategoryAttributeRole.c.Item1_Id == bindparam('Attribute'),
-                    nvivoCategoryAttributeRole.c.TypeId == literal_column(NVivo.RoleType.AttributeClassification),
-                    nvivoCategoryAttributeRole.c.Item2_Id == bindparam('Category')
-                )).select_from(
-                    nvivoCategoryAttributeRole.outerjoin(
-                    nvivoNewValueRole.join(
-                        nvivoNewValueItem, and_(
-                        nvivoNewValueItem.c.Id == nvivoNewValueRole.c.Item2_Id,
-                        nvivoNewValueItem.c.Name == bindparam('Value')
-                    )), and_(
-                        nvivoNewValueRole.c.TypeId == literal_column(NVivo.RoleType.AttributeValue),
-                        nvivoNewValueRole.c.Item1_Id == nvivoCategoryAttributeRole.c.Item1_Id
-                )).outerjoin(
-                    nvivoExistingValueRole.join(
-                        nvivoValueRole, and_(
-                        nvivoValueRole.c.Item2_Id == nvivoExistingValueRole.c.Item2_Id,
-                        nvivoValueRole.c.TypeId == literal_column(NVivo.RoleType.ItemValue),
-                        nvivoValueRole.c.Item1_Id == bindparam('Item')
-                    )), and_(
-                        nvivoExistingValueRole.c.TypeId == literal_column(NVivo.RoleType.AttributeValue),
-                        nvivoExistingValueRole.c.Item1_Id == nvivoCategoryAttributeRole.c.Item1_Id
-                )))
-
-            maxvaluesel = select([
-                    func.max(nvivoCountValueRole.c.Tag).label('MaxValueTag')
+                    nvivoRole.c.TypeId == literal_column(NVivo.RoleType.AttributeValue),
+                    nvivoItem.c.Id == nvivoRole.c.Item2_Id
+                )))]):
+                valueids.setdefault((row['Attribute'], row['Name']), []).append(row['Value'])
+                if row['Tag'] is not None:
+                    maxvaluetags[row['Attribute']] = max(maxvaluetags.get(row['Attribute'], -1), row['Tag'])
+
+            assignments = {}
+            for row in stats.read([dict(row) for row in nvivocon.execute(select([
+                    nvivoRole.c.Item1_Id.label('Item'),
+                    nvivoAttributeValueRole.c.Item1_Id.label('Attribute'),
+                    nvivoRole.c.Item2_Id.label('Value')
                 ]).where(and_(
-                    nvivoCountValueRole.c.TypeId == literal_column(NVivo.RoleType.AttributeValue),
-                    nvivoCountValueRole.c.Item1_Id == bindparam('Attribute')
-                ))
+                    nvivoRole.c.TypeId == literal_column(NVivo.RoleType.ItemValue),
+                    nvivoAttributeValueRole.c.TypeId == literal_column(NVivo.RoleType.AttributeValue),
+                    nvivoAttributeValueRole.c.Item2_Id == nvivoRole.c.Item2_Id
+                )))]):
+                assignments.setdefault((row['Item'], row['Attribute']), []).append(row['Value'])
+            originalassignments = dict(assignments)
 
-            missingvaluesel = select([
-                    nvivoCategoryRole.c.Item1_Id.label('Item')
-                ]).where(and_(
-                    nvivoCategoryRole.c.TypeId   == literal_column(NVivo.RoleType.ItemCategory),
-                    nvivoCategoryRole.c.Item2_Id == bindparam('Category')
-                )).group_by(
-                    nvivoCategoryRole.c.Item1_Id
-                ).having(
-                    func.count(nvivoValueRole.c.Item1_Id) == 0
-                ).select_from(
-                    nvivoCategoryRole.outerjoin(
-                    nvivoValueRole.join(
-                        nvivoExistingValueRole, and_(
-                            nvivoExistingValueRole.c.Item2_Id == nvivoValueRole.c.Item2_Id,
-                            nvivoExistingValueRole.c.TypeId == literal_column(NVivo.RoleType.ItemValue)
-                        )), and_(
-                        nvivoValueRole.c.TypeId == literal_column(NVivo.RoleType.AttributeValue),
-                        nvivoValueRole.c.Item1_Id == bindparam('Attribute'),
-                        nvivoExistingValueRole.c.Item1_Id == nvivoCategoryRole.c.Item1_Id
-                )))
+            for value in values:
+                if value['Item'] not in catalogue:
+                    raise RuntimeError("ERROR: " + name + " '" + str(value['Item']) + " missing")
+                value['Category'] = itemcategory.get(value['Item'])
+                if value['Category'] is None:
+                    raise RuntimeError("WARNING: " + name + " '" + itemname(value['Item']) + "' has no category, attributes cannot be stored.")
 
             for attribute in attributes:
                 attribute['PlainTextName'] = attribute['Name']
                 # Clean up attribute name for NVivo
                 attribute['Name'] = re.sub(NVivo.ILLEGALNAMECHARS, '_', attribute['Name']).strip()
                 if args.windows:
-                    attribute['Name'] = u''.join(map(lambda ch: chr(ord(ch) + 0x377), attribute['Name']))
-
-            maxattributetags = {}
-            maxvaluetags = {}
+                    attribute['Name'] = encodename(attribute['Name'])
+
+            # Items and roles to be written once every value has been dealt with
+            attributestoinsert = []
+            valuestoinsert = []
+            changedassignments = []
+            changedkeys = set()
+            assignmenttags = {}
+
+            # Add a value item, taking its creation and modification details from the
+            # normalised attribute or value that it comes from.
+            def addvalue(attribute, id, valuename, tag, system, isdefault, audit):
+                valuestoinsert.append({
+                        'Id':           id,
+                        'Name':         valuename,
+                        'HierarchicalName': catalogue.hierarchicalname(attribute['Id']) + '\\' + valuename if args.mac else None,
+                        'Attribute':    attribute['Id'],
+                        'Tag':          tag,
+                        'System':       system,
+                        'Properties':   '<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="IsDefault" Value="' + str(isdefault) + '"/></Properties>',
+                        'CreatedBy':    audit['CreatedBy'],
+                        'CreatedDate':  audit['CreatedDate'],
+                        'ModifiedBy':   audit['ModifiedBy'],
+                        'ModifiedDate': audit['ModifiedDate']
+                    })
+                valueids[(attribute['Id'], valuename)] = [id]
+                catalogue.add(id, valuename, int(NVivo.ItemType.AttributeValue), attribute['Id'],
+                              valuestoinsert[-1]['HierarchicalName'])
+
+            # Assign a value to an item; a value created for the item keeps its tag in the role
+            def assign(item, attributeid, valueid, tag=None):
+                key = (item, attributeid)
+                if key not in changedkeys:
+                    changedkeys.add(key)
+                    changedassignments.append(key)
+                assignments[key] = [valueid]
+                assignmenttags[key] = tag
+
+            # Attributes duplicated for a category, by original attribute and category
+            duplicateattributes = {}
             addedattributes = []
+            attributeregistry = AttributeRegistry(attributes)
             for value in values:
+                value['Attribute'] = duplicateattributes.get((value['Attribute'], value['Category']), value['Attribute'])
                 value['Value'] = value['Value'].strip()
-                attribute = next(attribute for attribute in attributes if attribute['Id'] == value['Attribute'])
+                attribute = attributeregistry.get(value['Attribute'])
                 if attribute['Type'] in NVivo.DataTypeName.values():
                     datatype = NVivo.DataTypeName.keys()[NVivo.DataTypeName.values().index(attribute['Type'])]
                 else:
@@ -1444,109 +1737,58 @@ def Denormalise(args):
                 if value['Value']:
                     value['PlainTextValue'] = value['Value']
                     if args.windows:
-                        value['Value'] = u''.join(map(lambda ch: chr(ord(ch) + 0x377), value['Value']))
+                        value['Value'] = encodename(value['Value'])
                 else:
                     value['Value']          = unassignedlabel
                     value['PlainTextValue'] = u''
 
-                curvalues = [dict(row) for row in nvivocon.execute(valuesel, value)]
-                if len(curvalues) > 1:
-                    raise RuntimeError("ERROR: Sanity check!")
-                elif len(curvalues) == 1:  # Attribute exists
-                    valuestatus = dict(curvalues[0])
+                if (value['Attribute'], value['Category']) in categoryattributes:  # Attribute exists
+                    newvalueids      = valueids.get((value['Attribute'], value['Value']), [])
+                    existingvalueids = assignments.get((value['Item'], value['Attribute']), [])
+                    if len(newvalueids) > 1 or len(existingvalueids) > 1:
+                        raise RuntimeError("ERROR: Sanity check!")
+                    valuestatus = {
+                        'NewValueId':      newvalueids[0]      if newvalueids      else None,
+                        'ExistingValueId': existingvalueids[0] if existingvalueids else None
+                    }
                 else:  # Attribute does not exist
                     valuestatus = {
                         'NewValueId':None,
                         'ExistingValueId':None,
                     }
 
-                    if value['Category'] not in maxattributetags.keys():
-                        maxattributetags[value['Category']] = nvivocon.execute(attrsel, {'Category':value['Category']}).first()['MaxAttributeTag'] or -1
-                    maxattributetags[value['Category']] += 1
+                    maxattributetags[value['Category']] = maxattributetags.get(value['Category'], -1) + 1
 
                     # NVivo doesn't like attributes being shared across categories, so test whether
                     # attribute has already been created.
-                    curitem = nvivocon.execute(select([
-                            nvivoItem.c.Name
-                        ]).where(
-                            nvivoItem.c.Id == bindparam('Id')
-                        ), attribute).first()
-                    if curitem is not None:
-                        # Need to adjust every instance of this attribute/category combination
+                    if attribute['Id'] in catalogue:
+                        # Every later value of this attribute/category combination goes to the copy
                         if args.verbosity > 1:
                             print("Duplicating " + name + " attribute '" + attribute['PlainTextName'] + "' for category '" + itemname(value['Category']) + "' with tag: " + str(maxattributetags[value['Category']]), file=sys.stderr)
                         attribute = attribute.copy()
-                        attributes += [attribute]
                         attribute['Id'] = uuid.uuid4()
-                        existingattr = value['Attribute']
-                        for valueiter in values:
-                            if valueiter['Attribute'] == existingattr and valueiter['Category'] == value['Category']:
-                                valueiter['Attribute'] = attribute['Id']
+                        attribute['Category'] = value['Category']
+                        attributes += [attribute]
+                        attributeregistry.add(attribute)
+                        duplicateattributes[(value['Attribute'], value['Category'])] = attribute['Id']
+                        value['Attribute'] = attribute['Id']
                     else:
                         if args.verbosity > 1:
                             print("Creating " + name + " attribute '" + attribute['PlainTextName'] + "' for category '" + itemname(value['Category']) + "' with tag: " + str(maxattributetags[value['Category']]), file=sys.stderr)
 
                     attribute['Tag'] = maxattributetags[value['Category']]
                     attribute['Category'] = value['Category']
-                    maxvaluetags[(value['Category'], attribute['Id'])] = 1
-
-                    if args.mac:
-                        attribute['NameHierarchicalName'] = nvivocon.execute(
-                                hierarchicalnamesel,
-                                {'Id': attribute['Category']}
-                            ).first()['HierarchicalName'] + ':' + attribute['Name']
-
-                    itemvalues = {
-                            'Id':          bindparam('Id'),
-                            'Name':        bindparam('Name'),
-                            'Description': literal_column("''"),
-                            'TypeId':      literal_column(NVivo.ItemType.AttributeName),
-                            'ColorArgb':   literal_column('0'),
-                            'System':      literal_column('0'),
-                            'ReadOnly':    literal_column('0'),
-                            'InheritPermissions': literal_column(NVivo.RoleType.ParentItem)
-                        }
+                    attribute['Properties'] = '<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="DataType" Value="' + str(datatype) + '" /><Property Key="Length" Value="0" /><Property Key="EndNoteFieldTypeId" Value="-1" /></Properties>'
                     if args.mac:
-                        itemvalues.update({
-                            'HierarchicalName': bindparam('NameHierarchicalName')
-                        })
-                    nvivocon.execute(nvivoItem.insert().values(itemvalues), attribute)
-                    nvivocon.execute(nvivoRole.insert().values({
-                            'Item1_Id': bindparam('Id'),
-                            'Item2_Id': bindparam('Category'),
-                            'TypeId':   literal_column(NVivo.RoleType.AttributeClassification),
-                            'Tag':      bindparam('Tag')
-                        }), attribute)
-                    nvivocon.execute(nvivoExtendedItem.insert().values({
-                            'Item_Id': bindparam('Id'),
-                            'Properties': literal_column('\'<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="DataType" Value="' + str(datatype) + '" /><Property Key="Length" Value="0" /><Property Key="EndNoteFieldTypeId" Value="-1" /></Properties>\'')
-                    }), attribute)
+                        attribute['NameHierarchicalName'] = catalogue.hierarchicalname(attribute['Category']) + ':' + attribute['Name']
+                    categoryattributes.add((attribute['Id'], attribute['Category']))
+                    attributestoinsert.append(attribute)
+                    catalogue.add(attribute['Id'], attribute['Name'], int(NVivo.ItemType.AttributeName),
+                                  hierarchicalname=attribute.get('NameHierarchicalName'))
 
                     # Create unassigned and not applicable attribute values
                     attribute['UnassignedValueId'] = uuid.uuid4()
-                    attribute['Unassigned'] = unassignedlabel
-                    if args.mac:
-                        attribute['HierarchicalName'] = attribute['NameHierarchicalName'] + '\\' + unassignedlabel
-                    nvivocon.execute(nvivoItem.insert().values({
-                            'Id':       bindparam('UnassignedValueId'),
-                            'Name':     bindparam('Unassigned'),
-                            'Description': literal_column("''"),
-                            'TypeId':   literal_column(NVivo.ItemType.AttributeValue),
-                            'System':   literal_column(NVivo.RoleType.ParentItem),
-                            'ReadOnly': literal_column('0'),
-                            'InheritPermissions': literal_column(NVivo.RoleType.ParentItem),
-                            'ColorArgb': literal_column('0')
-                        }), attribute)
-                    nvivocon.execute(nvivoRole.insert().values({
-                            'Item1_Id': bindparam('Id'),
-                            'Item2_Id': bindparam('UnassignedValueId'),
-                            'TypeId':   literal_column(NVivo.RoleType.AttributeValue),
-                            'Tag':      literal_column('0')
-                        }), attribute )
-                    nvivocon.execute(nvivoExtendedItem.insert().values({
-                            'Item_Id': bindparam('UnassignedValueId'),
-                            'Properties': literal_column('\'<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="IsDefault" Value="True"/></Properties>\'')
-                    }), attribute)
+                    addvalue(attribute, attribute['UnassignedValueId'], unassignedlabel, 0, True, True, attribute)
 
                     # Save the attribute and 'Unassigned' value so that it can be filled in later
                     # for all items of the present category.
@@ -1555,29 +1797,8 @@ def Denormalise(args):
                                             'DefaultValueId': attribute['UnassignedValueId'] })
 
                     attribute['NotApplicableValueId'] = uuid.uuid4()
-                    attribute['NotApplicable'] = notapplicablelabel
-                    if args.mac:
-                        attribute['HierarchicalName'] = attribute['NameHierarchicalName'] + '\\' + notapplicablelabel
-                    nvivocon.execute(nvivoItem.insert().values({
-                            'Id':       bindparam('NotApplicableValueId'),
-                            'Name':     bindparam('NotApplicable'),
-                            'Description': literal_column("''"),
-                            'TypeId':   literal_column(NVivo.ItemType.AttributeValue),
-                            'System':   literal_column(NVivo.RoleType.ParentItem),
-                            'ReadOnly': literal_column('0'),
-                            'InheritPermissions': literal_column(NVivo.RoleType.ParentItem),
-                            'ColorArgb': literal_column('0')
-                        }), attribute)
-                    nvivocon.execute(nvivoRole.insert().values({
-                            'Item1_Id': bindparam('Id'),
-                            'Item2_Id': bindparam('NotApplicableValueId'),
-                            'TypeId':   literal_column(NVivo.RoleType.AttributeValue),
-                            'Tag':      literal_column(NVivo.RoleType.ParentItem)
-                        }), attribute )
-                    nvivocon.execute(nvivoExtendedItem.insert().values({
-                            'Item_Id': bindparam('NotApplicableValueId'),
-                            'Properties': literal_column('\'<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="IsDefault" Value="False"/></Properties>\'')
-                    }), attribute)
+                    addvalue(attribute, attribute['NotApplicableValueId'], notapplicablelabel, 1, True, False, attribute)
+                    maxvaluetags[attribute['Id']] = 1
 
                     # Boolean values also need True and False values to be created
                     if attribute['Type'] == 'Boolean':
@@ -1586,54 +1807,10 @@ def Denormalise(args):
                         attribute['TrueValueId']  = uuid.uuid4()
                         attribute['True']         = u'1' if args.mac else u'True'
                         if args.windows:
-                            attribute['True']  = u''.join(map(lambda ch: chr(ord(ch) + 0x377), attribute['True']))
-                            attribute['False'] = u''.join(map(lambda ch: chr(ord(ch) + 0x377), attribute['False']))
-                        if args.mac:
-                            attribute['HierarchicalName'] = attribute['NameHierarchicalName'] + '\\' + attribute['False']
-
-                        nvivocon.execute(nvivoItem.insert().values({
-                                'Id':       bindparam('FalseValueId'),
-                                'Name':     bindparam('False'),
-                                'Description': literal_column("''"),
-                                'TypeId':   literal_column(NVivo.ItemType.AttributeValue),
-                                'System':   literal_column(NVivo.RoleType.ParentItem),
-                                'ReadOnly': literal_column('0'),
-                                'InheritPermissions': literal_column(NVivo.RoleType.ParentItem),
-                                'ColorArgb': literal_column('0')
-                            }), attribute)
-                        nvivocon.execute(nvivoRole.insert().values({
-                                'Item1_Id': bindparam('Id'),
-                                'Item2_Id': bindparam('FalseValueId'),
-                                'TypeId':   literal_column(NVivo.RoleType.AttributeValue),
-                                'Tag':      literal_column(NVivo.RoleType.NodeIndex)
-                            }), attribute )
-                        nvivocon.execute(nvivoExtendedItem.insert().values({
-                                'Item_Id': bindparam('FalseValueId'),
-                                'Properties': literal_column('\'<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="IsDefault" Value="False"/></Properties>\'')
-                        }), attribute)
-
-                        if args.mac:
-                            attribute['HierarchicalName'] = attribute['NameHierarchicalName'] + '\\' + attribute['True']
-                        nvivocon.execute(nvivoItem.insert().values({
-                                'Id':       bindparam('TrueValueId'),
-                                'Name':     bindparam('True'),
-                                'Description': literal_column("''"),
-                                'TypeId':   literal_column(NVivo.ItemType.AttributeValue),
-                                'System':   literal_column(NVivo.RoleType.ParentItem),
-                                'ReadOnly': literal_column('0'),
-                                'InheritPermissions': literal_column(NVivo.RoleType.ParentItem),
-                                'ColorArgb': literal_column('0')
-                            }), attribute)
-                        nvivocon.execute(nvivoRole.insert().values({
-                                'Item1_Id': bindparam('Id'),
-                                'Item2_Id': bindparam('TrueValueId'),
-                                'TypeId':   literal_column(NVivo.RoleType.AttributeValue),
-                                'Tag':      literal_column('3')
-                            }), attribute )
-                        nvivocon.execute(nvivoExtendedItem.insert().values({
-                                'Item_Id': bindparam('TrueValueId'),
-                                'Properties': literal_column('\'<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="IsDefault" Value="False"/></Properties>\'')
-                        }), attribute)
+                            attribute['True']  = encodename(attribute['True'])
+                            attribute['False'] = encodename(attribute['False'])
+                        addvalue(attribute, attribute['FalseValueId'], attribute['False'], 2, True, False, attribute)
+                        addvalue(attribute, attribute['TrueValueId'],  attribute['True'],  3, True, False, attribute)
 
                         # Assign boolean value to one of the two possibilities
                         if util.strtobool(value['PlainTextValue']):
@@ -1650,45 +1827,13 @@ def Denormalise(args):
                 # Create new value if required
                 if operation == 'overwrite' or valuestatus['ExistingValueId'] is None:
                     if valuestatus['NewValueId'] is None:
-                        categoryattribute = (value['Category'], value['Attribute'])
-                        # First time we have met this attribute?
-                        if categoryattribute not in maxvaluetags.keys():
-                            maxvalues = [dict(row) for row in nvivocon.execute(maxvaluesel, valuestatus)]
-                            if len(maxvalues) != 1:
-                                raise RuntimeError("ERROR: Sanity check!")
-                            maxvaluetags[categoryattribute] = maxvalues[0]['MaxValueTag']
-
-                        maxvaluetags[categoryattribute] = (maxvaluetags[categoryattribute] or -1) + 1
-                        value['Tag'] = maxvaluetags[categoryattribute]
+                        maxvaluetags[value['Attribute']] = maxvaluetags.get(value['Attribute'], -1) + 1
+                        value['Tag'] = maxvaluetags[value['Attribute']]
                         if args.verbosity > 1:
                             print("Creating value '" + value['PlainTextValue'] + "' for " + name + " attribute '" + attribute['PlainTextName'] + "' with tag: "+ str(value['Tag']), file=sys.stderr)
 
-                        value['Id']  = uuid.uuid4()
-                        if args.mac:
-                            value['HierarchicalName'] = attribute['NameHierarchicalName'] + '\\' + value['Value']
-                        nvivocon.execute(nvivoItem.insert().values({
-                                'Id':       bindparam('Id'),
-                                'Name':     bindparam('Value'),
-                                'Description': literal_column("''"),
-                                'TypeId':   literal_column(NVivo.ItemType.AttributeValue),
-                                'System':   literal_column('0'),
-                                'ReadOnly': literal_column('0'),
-                                'InheritPermissions': literal_column(NVivo.RoleType.ParentItem),
-                                'ColorArgb': literal_column('0')
-
-                            }), value )
-                        value['Attribute'] = value['Attribute']
-                        nvivocon.execute(nvivoRole.insert().values({
-                                'Item1_Id': bindparam('Attribute'),
-                                'Item2_Id': bindparam('Id'),
-                                'TypeId':   literal_column(NVivo.RoleType.AttributeValue),
-                                'Tag':      bindparam('Tag')
-                            }), value )
-                        nvivocon.execute(nvivoExtendedItem.insert().values({
-                                'Item_Id': bindparam('Id'),
-                                'Properties': literal_column('\'<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="IsDefault" Value="False"/></Properties>\'')
-                        }), value)
-
+                        value['Id'] = uuid.uuid4()
+                        addvalue(attribute, value['Id'], value['Value'], value['Tag'], False, False, value)
                         valuestatus['NewValueId'] = value['Id']
 
                     # Assign value to attribute
@@ -1697,43 +1842,114 @@ def Denormalise(args):
                         if valuestatus['ExistingValueId'] is not None:
                             if args.verbosity > 1:
                                 print("Deassigning existing value '" + itemname(value['ExistingValueId']) + "' from " + name + " attribute '" + attribute['PlainTextName']  + "' of " + name + " '" + itemname(value['Item']) + "'", file=sys.stderr)
-                            nvivocon.execute(nvivoRole.delete(and_(
-                                    nvivoRole.c.Item1_Id == bindparam('Item'),
-                                    nvivoRole.c.Item2_Id == bindparam('ExistingValueId'),
-                                    nvivoRole.c.TypeId   ==   literal_column(NVivo.RoleType.ItemValue)
-                                )), value )
 
                         if args.verbosity > 1:
                             print("Assigning value '" + value['PlainTextValue'] + "' to " + name + " attribute '" + attribute['PlainTextName']  + "' of " + name + " '" + itemname(value['Item']) + "'", file=sys.stderr)
-                        nvivocon.execute(nvivoRole.insert().values({
-                                'Item1_Id': bindparam('Item'),
-                                'Item2_Id': bindparam('NewValueId'),
-                                'TypeId':   literal_column(NVivo.RoleType.ItemValue)
-                            }), value )
+                        assign(value['Item'], value['Attribute'], valuestatus['NewValueId'], value.get('Tag'))
 
             # Now fill in default ('Undefined') for new attributes
             for addedattribute in addedattributes:
                 # Set value of undefined attribute to 'Unassigned'
-                attributes = [dict(row) for row in nvivocon.execute(missingvaluesel, addedattribute)]
-                if len(attributes) > 0 and args.verbosity > 1:
-                    print("Assigning default value '" + itemname(addedattribute['DefaultValueId']) + "' to attribute '" + itemname(addedattribute['Attribute']) + "' of " + str(len(attributes)) + " " + name + "(s).", file=sys.stderr)
-                for attribute in attributes:
-                    attribute.update(addedattribute)
-
-                if len(attributes) > 0:
-                    addedattribute.update(attribute)
-                    nvivocon.execute(nvivoRole.insert().values({
-                            'Item1_Id': bindparam('Item'),
-                            'Item2_Id': bindparam('DefaultValueId'),
-                            'TypeId':   literal_column(NVivo.RoleType.ItemValue)
-                        }), attributes )
+                unassigneditems = [item for item in categoryitems.get(addedattribute['Category'], [])
+                                        if (item, addedattribute['Attribute']) not in assignments]
+                if len(unassigneditems) > 0 and args.verbosity > 1:
+                    print("Assigning default value '" + itemname(addedattribute['DefaultValueId']) + "' to attribute '" + itemname(addedattribute['Attribute']) + "' of " + str(len(unassigneditems)) + " " + name + "(s).", file=sys.stderr)
+                for item in unassigneditems:
+                    assign(item, addedattribute['Attribute'], addedattribute['DefaultValueId'])
+
+            # Work out which value roles have changed
+            rolestodelete = []
+            rolestoinsert = []
+            for item, attributeid in changedassignments:
+                existingvalueids = originalassignments.get((item, attributeid), [])
+                newvalueids      = assignments[(item, attributeid)]
+                rolestodelete += [{'Item': item, 'ExistingValueId': valueid} for valueid in existingvalueids if valueid not in newvalueids]
+                rolestoinsert += [{'Item': item, 'NewValueId':      valueid, 'Tag': assignmenttags[(item, attributeid)]}
+                                                                                    for valueid in newvalueids      if valueid not in existingvalueids]
+
+            if len(attributestoinsert) > 0:
+                itemvalues = {
+                        'Id':          bindparam('Id'),
+                        'Name':        bindparam('Name'),
+                        'Description': literal_column("''"),
+                        'TypeId':      literal_column(NVivo.ItemType.AttributeName),
+                        'ColorArgb':   literal_column('0'),
+                        'System':      literal_column('0'),
+                        'ReadOnly':    literal_column('0'),
+                        'InheritPermissions': literal_column(NVivo.RoleType.ParentItem),
+                        'CreatedBy':    bindparam('CreatedBy'),
+                        'CreatedDate':  bindparam('CreatedDate'),
+                        'ModifiedBy':   bindparam('ModifiedBy'),
+                        'ModifiedDate': bindparam('ModifiedDate')
+                    }
+                if args.mac:
+                    itemvalues.update({
+                        'HierarchicalName': bindparam('NameHierarchicalName')
+                    })
+                executechunks(nvivoItem.insert().values(itemvalues), attributestoinsert)
+                executechunks(nvivoRole.insert().values({
+                        'Item1_Id': bindparam('Id'),
+                        'Item2_Id': bindparam('Category'),
+                        'TypeId':   literal_column(NVivo.RoleType.AttributeClassification),
+                        'Tag':      bindparam('Tag')
+                    }), attributestoinsert)
+                executechunks(nvivoExtendedItem.insert().values({
+                        'Item_Id':    bindparam('Id'),
+                        'Properties': bindparam('Properties')
+                    }), attributestoinsert)
+
+            if len(valuestoinsert) > 0:
+                itemvalues = {
+                        'Id':       bindparam('Id'),
+                        'Name':     bindparam('Name'),
+                        'Description': literal_column("''"),
+                        'TypeId':   literal_column(NVivo.ItemType.AttributeValue),
+                        'System':   bindparam('System'),
+                        'ReadOnly': literal_column('0'),
+                        'InheritPermissions': literal_column(NVivo.RoleType.ParentItem),
+                        'ColorArgb': literal_column('0'),
+                        'CreatedBy':    bindparam('CreatedBy'),
+                        'CreatedDate':  bindparam('CreatedDate'),
+                        'ModifiedBy':   bindparam('ModifiedBy'),
+                        'ModifiedDate': bindparam('ModifiedDate')
+                    }
+                if args.mac:
+                    itemvalues.update({
+                        'HierarchicalName': bindparam('HierarchicalName')
+                    })
+                executechunks(nvivoItem.insert().values(itemvalues), valuestoinsert)
+                executechunks(nvivoRole.insert().values({
+                        'Item1_Id': bindparam('Attribute'),
+                        'Item2_Id': bindparam('Id'),
+                        'TypeId':   literal_column(NVivo.RoleType.AttributeValue),
+                        'Tag':      bindparam('Tag')
+                    }), valuestoinsert)
+                executechunks(nvivoExtendedItem.insert().values({
+                        'Item_Id':    bindparam('Id'),
+                        'Properties': bindparam('Properties')
+                    }), valuestoinsert)
+
+            if len(rolestodelete) > 0:
+                executechunks(nvivoRole.delete(and_(
+                        nvivoRole.c.Item1_Id == bindparam('Item'),
+                        nvivoRole.c.Item2_Id == bindparam('ExistingValueId'),
+                        nvivoRole.c.TypeId   == literal_column(NVivo.RoleType.ItemValue)
+                    )), rolestodelete)
+            if len(rolestoinsert) > 0:
+                executechunks(nvivoRole.insert().values({
+                        'Item1_Id': bindparam('Item'),
+                        'Item2_Id': bindparam('NewValueId'),
+                        'TypeId':   literal_column(NVivo.RoleType.ItemValue),
+                        'Tag':      bindparam('Tag')
+                    }), rolestoinsert)
 
 # Node attributes
+        stats.begin('node_attributes')
         if args.node_attributes != 'skip':
             if args.verbosity > 0:
                 print("Denormalising node attributes", file=sys.stderr)
 
-            attributes = [dict(row) for row in normdb.execute(select([
+            attributes = stats.read([dict(row) for row in normdb.execute(select([
                     normNodeAttribute.c.Id,
                     normNodeAttribute.c.Name,
                     normNodeAttribute.c.Description,
@@ -1742,8 +1958,8 @@ def Denormalise(args):
                     normNodeAttribute.c.CreatedDate,
                     normNodeAttribute.c.ModifiedBy,
                     normNodeAttribute.c.ModifiedDate
-                ]))]
-            values = [dict(row) for row in normdb.execute(select([
+                ]))])
+            values = stats.read([dict(row) for row in normdb.execute(select([
                     normNodeValue.c.Node.label('Item'),
                     normNodeValue.c.Attribute,
                     normNodeValue.c.Value,
@@ -1755,67 +1971,42 @@ def Denormalise(args):
                     normNodeAttribute.c.Id == normNodeValue.c.Attribute
                 ).order_by(
                     normNodeAttribute.c.Name
-                ))]
+                ))])
 
             skip_merge_or_overwrite_attributes(attributes, values, 'node', args.node_attributes)
 
         # Function to handle node or source category records
+        # Rebuild the layout of every category of a type from its classified items and its
+        # attributes, each read for all the categories at once.
         def rebuild_category_records(itemtype):
-            categories = [dict(row) for row in nvivocon.execute(select([
+            categoryids = select([
+                    nvivoItem.c.Id
+                ]).where(
+                    nvivoItem.c.TypeId == literal_column(itemtype)
+                )
+            categories = stats.read([dict(row) for row in nvivocon.execute(select([
                     nvivoItem.c.Id.label('CategoryId')
                 ]).where(
                     nvivoItem.c.TypeId == literal_column(itemtype)
-                ))]
-
-            for category in categories:
-                doc = Document()
-                layout = doc.createElement('CategoryLayout')
-                layout.setAttribute('xmlns', 'http://qsr.com.au/XMLSchema.xsd')
+                ))])
 
-                items = [dict(row) for row in nvivocon.execute(select([
-                        nvivoRole.c.Item1_Id.label('Id')
+            def categoryroles(roletype):
+                roles = {}
+                for role in stats.read(nvivocon.execute(select([
+                        nvivoRole.c.Item2_Id,
+                        nvivoRole.c.Item1_Id
                     ]).where(and_(
-                        nvivoRole.c.Item2_Id == bindparam('CategoryId'),
-                        nvivoRole.c.TypeId   == literal_column(NVivo.RoleType.NodeMember)
-                    )), category)]
-                index = 0
-                for item in items:
-                    row = layout.appendChild(doc.createElement('Row'))
-                    row.setAttribute('Guid',   str(item['Id']).lower())
-                    row.setAttribute('Id',     str(index))
-                    row.setAttribute('OrderId',str(index))
-                    row.setAttribute('Hidden', 'false')
-                    row.setAttribute('Size',   '-1')
-                    index += 1
-
-                attributes = [dict(row) for row in nvivocon.execute(select([
-                        nvivoRole.c.Item1_Id.label('Id')
-                    ]).where(and_(
-                        nvivoRole.c.Item2_Id == bindparam('CategoryId'),
-                        nvivoRole.c.TypeId   == literal_column(NVivo.RoleType.AttributeClassification)
-                    )), category)]
-                index = 0
-                for attribute in attributes:
-                    column = layout.appendChild(doc.createElement('Column'))
-                    column.setAttribute('Guid', str(attribute['Id']).lower())
-                    column.setAttribute('Id',     str(index))
-                    column.setAttribute('OrderId',str(index))
-                    column.setAttribute('Hidden', 'false')
-                    column.setAttribute('Size',   '-1')
-                    index += 1
-
-                el = layout.appendChild(doc.createElement('SortedColumn'))
-                el.setAttribute('Ascending', 'true')
-                el.appendChild(doc.createTextNode('-1'))
-                layout.appendChild(doc.createElement('RecordHeaderWidth')).appendChild(doc.createTextNode('100'))
-                layout.appendChild(doc.createElement('ShowRowIDs')).appendChild(doc.createTextNode('true'))
-                layout.appendChild(doc.createElement('ShowColumnIDs')).appendChild(doc.createTextNode('true'))
-                layout.appendChild(doc.createElement('Transposed')).appendChild(doc.createTextNode('false'))
-                layout.appendChild(doc.createElement('NameSource')).appendChild(doc.createTextNode('1'))
-                layout.appendChild(doc.createElement('RowsUserOrdered')).appendChild(doc.createTextNode('false'))
-                layout.appendChild(doc.createElement('ColumnsUserOrdered')).appendChild(doc.createTextNode('true'))
-
-                category['Layout'] = layout.toxml()
+                        nvivoRole.c.TypeId   == literal_column(roletype),
+                        nvivoRole.c.Item2_Id.in_(categoryids)
+                    ))).fetchall()):
+                    roles.setdefault(role['Item2_Id'], []).append(role['Item1_Id'])
+                return roles
+
+            items      = categoryroles(NVivo.RoleType.NodeMember)
+            attributes = categoryroles(NVivo.RoleType.AttributeClassification)
+            for category in categories:
+                category['Layout'] = categorylayoutxml(items.get(category['CategoryId'], []),
+                                                       attributes.get(category['CategoryId'], []))
 
             if len(categories) > 0:
                 nvivocon.execute(nvivoCategory.update(
@@ -1827,6 +2018,7 @@ def Denormalise(args):
             rebuild_category_records(NVivo.ItemType.NodeClassification)
 
 # Source categories
+        stats.begin('source_categories')
         skip_merge_or_overwrite_categories(normSourceCategory, NVivo.ItemType.SourceClassification, 'source', args.source_categories)
 
 # Function to massage source data
@@ -1838,11 +2030,18 @@ def Denormalise(args):
             source['PlainTextName'] = source['Name']
             source['Name'] = re.sub(NVivo.ILLEGALNAMECHARS, '_', source['Name']).strip()
             if args.windows:
-                source['Name']        = u''.join(map(lambda ch: chr(ord(ch) + 0x377), source['Name']))
-                source['Description'] = u''.join(map(lambda ch: chr(ord(ch) + 0x377), source['Description'].replace('\n', '\r\n')))
+                source['Name']        = encodename(source['Name'])
+                source['Description'] = encodename(source['Description'].replace('\n', '\r\n'))
             if source['Color'] is None:
                 source['Color'] = 0
 
+            # Blobs are mapped rather than read, as most objects are only written out to
+            # a temporary file for conversion.
+            if blobs is not None:
+                source['Object']    = blobs.open(source['Object'])
+                source['Thumbnail'] = blobs.read(source['Thumbnail'])
+            stats.blobbytes(len(source['Object'] or '') + len(source['Thumbnail'] or ''))
+
             content = source['Content']
             if content:
                 source['PlainText'] = content if type(content) == unicode else unicode(content, 'utf-8')
@@ -1852,132 +2051,63 @@ def Denormalise(args):
                 if key not in source.keys():
                     source[key] = None
 
+            # Columns that converting a source may fill in, and their values beforehand so that
+            # only those that the conversion changes are cached.
+            cachekey = source.pop('CacheKey', None)
+            cached = cache.get(cachekey) if cachekey is not None else None
+            if cachekey is not None and cached is None:
+                unconverted = dict((key, source.get(key)) for key in NVivo.CONVERTEDCOLUMNS)
+
             # Do our best to imitate NVivo's treatment of sources. In particular, generating
             # the PlainText column is very tricky. If it was already filled in the Object column
             # of the normalised file then use that value instead.
-            if source['ObjectTypeName'] == 'PDF':
+            if cached is not None:
+                source.update(cached)
+            elif source['ObjectTypeName'] == 'PDF':
                 source['SourceType'] = NVivo.SourceType.PDF
                 source['LengthX'] = 0
 
-                doc = Document()
-                pages = doc.createElement("PdfPages")
-                pages.setAttribute("xmlns", "http://qsr.com.au/XMLSchema.xsd")
-
-                # Write out PDF object into a temporary file, then read it using pdfminer
-                tmpfilename = tempfile.mktemp()
-                tmpfileptr  = file(tmpfilename, 'wb')
-                tmpfileptr.write(source['Object'])
-                tmpfileptr.close()
-                rsrcmgr = PDFResourceManager()
-                retstr = StringIO()
-                laparams = LAParams()
-                device = TextConverter(rsrcmgr, retstr, codec='utf-8', laparams=laparams)
-                tmpfileptr = file(tmpfilename, 'rb')
-                interpreter = PDFPageInterpreter(rsrcmgr, device)
-                pagenos = set()
-                pdfpages = PDFPage.get_pages(tmpfileptr, password='', check_extractable=True)
-                pageoffset = 0
-                pdfstr = u''
-                for pdfpage in pdfpages:
-                    mediabox   = pdfpage.attrs['MediaBox']
-
-                    interpreter.process_page(pdfpage)
-                    pageelement = pages.appendChild(doc.createElement("PdfPage"))
-                    pageelement.setAttribute("PageLength", str(retstr.tell()))
-                    pageelement.setAttribute("PageOffset", str(pageoffset))
-                    pageelement.setAttribute("PageWidth",  str(int(mediabox[2] - mediabox[0])))
-                    pageelement.setAttribute("PageHeight", str(int(mediabox[3] - mediabox[1])))
-
-                    pagestr = unicode(retstr.getvalue(), 'utf-8')
-                    pagestr = re.sub('(?<!\n)\n(?!\n)', ' ', pagestr).replace('\n\n', '\n')
-                    retstr.truncate(0)
-                    pdfstr += pagestr
-                    pageoffset += len(pagestr)
-
-                tmpfileptr.close()
-                os.remove(tmpfilename)
+                # Extract the text and layout here unless already done by a worker process
+                layout = source.pop('PdfLayout', None)
+                if layout is None:
+                    layout = extractpdf(source['Object'])
+                pdfstr, pages, paragraphs = layout
 
                 if source['PlainText'] is None:
                     source['PlainText'] = pdfstr
+                else:
+                    paragraphs = paragraphindex(source)
 
-                paragraphs = doc.createElement("Paragraphs")
-                paragraphs.setAttribute("xmlns", "http://qsr.com.au/XMLSchema.xsd")
-                start = 0
-                while start < len(source['PlainText']):
-                    end = source['PlainText'].find('\n', start)
-                    if end == -1:
-                        end = len(source['PlainText']) - 1
-                    para = paragraphs.appendChild(doc.createElement("Para"))
-                    para.setAttribute("Pos", str(start))
-                    para.setAttribute("Len", str(end - start + 1))
-                    para.setAttribute("Style", "")
-                    start = end + 1
-
-                source['MetaData'] = paragraphs.toxml() + pages.toxml()
+                metadata = StringIO()
+                paragraphs.writexml(metadata, "")
+                writepdfpagesxml(metadata, pages)
+                source['MetaData'] = metadata.getvalue()
 
                 # Would be good to work out how NVivo calculates the PDF checksum
-                extendeditems.append({
-                    'Item_Id':    source['Item_Id'],
-                    'Properties': '<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="PDFChecksum" Value="0"/><Property Key="PDFPassword" Value=""/></Properties>'
-                })
+                source['ExtendedProperties'] = '<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="PDFChecksum" Value="0"/><Property Key="PDFPassword" Value=""/></Properties>'
             elif source['ObjectTypeName'] in {'DOCX', 'DOC', 'ODT', 'TXT'}:
                 if source['SourceType'] is None:
                     source['SourceType'] = NVivo.SourceType.Doc
 
-                tmpfilename = tempfile.mktemp()
+                # The document to be converted is the object, or else the plain text
                 if source['ObjectTypeName'] == 'TXT':
-                    tmpfile = codecs.open(tmpfilename + '.TXT', 'w', 'utf-8')
-                    tmpfile.write(unicode(source['Object'], 'utf-8') if source['Object'] else source['Content'])
+                    data = source['Object'] if source['Object'] else source['Content'].encode('utf-8')
                 elif source['Object'] is not None:
-                    tmpfile = file(tmpfilename + '.' + source['ObjectTypeName'], 'wb')
-                    tmpfile.write(source['Object'])
-
+                    data = source['Object']
                 elif source['PlainText'] is not None:
-                    tmpfile = codecs.open(tmpfilename + '.' + source['ObjectTypeName'], 'w', 'utf-8-sig')
-                    tmpfile.write(source['PlainText'])
+                    data = codecs.BOM_UTF8 + source['PlainText'].encode('utf-8')
                 else:
                     raise RuntimeError("Source '" + source['PlainTextName'] + "' is missing")
 
-                tmpfile.close()
-
-                # Look for unoconvcmd just once
-                if massagesource.unoconvcmd is None:
-                    if args.verbosity > 1:
-                        print("Searching for unoconv executable.", file=sys.stderr)
-                    # Look first on path for OS installed version, otherwise use our copy
-                    for path in os.environ["PATH"].split(os.pathsep):
-                        unoconvpath = os.path.join(path, 'unoconv')
-                        if os.path.exists(unoconvpath):
-                            if os.access(unoconvpath, os.X_OK) and '' in os.environ.get("PATHEXT", "").split(os.pathsep):
-                                massagesource.unoconvcmd = [unoconvpath]
-                            else:
-                                massagesource.unoconvcmd = ['python', unoconvpath]
-                            break
-                    if massagesource.unoconvcmd is None:
-                        unoconvpath = os.path.join(NVivo.helperpath + 'unoconv')
-                        if os.path.exists(unoconvpath):
-                            if os.access(unoconvpath, os.X_OK) and '' in os.environ.get("PATHEXT", "").split(os.pathsep):
-                                massagesource.unoconvcmd = [unoconvpath]
-                            else:
-                                massagesource.unoconvcmd = ['python', unoconvpath]
-                    if massagesource.unoconvcmd is None:
-                        raise RuntimeError("Can't find unoconv on path. Please refer to the NVivotools README file.")
-
                 if source['PlainText'] is None:
                     if source['ObjectTypeName'] == 'TXT':
-                        source['PlainText'] = codecs.open(tmpfilename + '.TXT', 'r', 'utf-8-sig').read()
+                        source['PlainText'] = unicode(data[:], 'utf-8-sig')
                     else:
                         # Use unoconv to convert to text
-                        p = subprocess.Popen(massagesource.unoconvcmd + ['--format=text', tmpfilename + '.' + source['ObjectTypeName']], stderr=subprocess.PIPE)
-                        err = p.stderr.read()
-                        if err != '':
-                            raise RuntimeError(err)
-
-                        source['PlainText'] = codecs.open(tmpfilename + '.txt', 'r', 'utf-8-sig').read()
-                        os.remove(tmpfilename + '.txt')
+                        source['PlainText'] = unicode(converter.convert(data, source['ObjectTypeName'], 'text'), 'utf-8-sig')
 
-                # Read text output from unocode, then massage it by dropping a final line
-                # terminator, and fixing Windows line terminatorss.
+                # Massage text output from unoconv by dropping a final line terminator, and
+                # fixing Windows line terminatorss.
                 if source['PlainText'].endswith('\n'):
                     source['PlainText'] = source['PlainText'][:-1]
                 if args.windows:
@@ -1988,17 +2118,7 @@ def Denormalise(args):
                 # Convert object to DOC/ODT if isn't already
                 source['Object'] = ''
                 if source['ObjectTypeName'] != ('ODT' if args.mac else 'DOC'):
-                    destformat = 'odt' if args.mac else 'doc'
-                    p = subprocess.Popen(massagesource.unoconvcmd + ['--format=' + destformat, tmpfilename + '.' + source['ObjectTypeName']], stderr=subprocess.PIPE)
-                    err = p.stderr.read()
-                    if err != '':
-                        err = "unoconv invocation error: " + str(massagesource.unoconvcmd) + "\n" + err
-                        raise RuntimeError(err)
-
-                    source['Object'] = file(tmpfilename + '.' + destformat, 'rb').read()
-                    os.remove(tmpfilename + '.' + destformat)
-
-                os.remove(tmpfilename + '.' + source['ObjectTypeName'])
+                    source['Object'] = converter.convert(data, source['ObjectTypeName'], 'odt' if args.mac else 'doc')
 
                 # Hack so that right object type code is found later
                 source['ObjectTypeName'] = 'DOC'
@@ -2006,52 +2126,27 @@ def Denormalise(args):
                 if args.mac:
                     source['LengthX'] = len(source['PlainText'].replace(u' ', u''))
                 else:
-                    # Compress doc object without header using compression level 6
-                    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
-                    source['Object'] = compressor.compress(source['Object']) + compressor.flush()
-
+                    # The doc object is compressed later along with the others
                     source['LengthX'] = 0
 
-                    doc = Document()
-                    settings = doc.createElement("DisplaySettings")
-                    settings.setAttribute("xmlns", "http://qsr.com.au/XMLSchema.xsd")
-                    settings.setAttribute("InputPosition", "0")
-                    source['MetaData'] = settings.toxml()
-
-                    paragraphs = doc.createElement("Paragraphs")
-                    paragraphs.setAttribute("xmlns", "http://qsr.com.au/XMLSchema.xsd")
-                    start = 0
-                    while start < len(source['PlainText']):
-                        end = source['PlainText'].find('\n', start)
-                        if end == -1:
-                            end = len(source['PlainText']) - 1
-                        para = paragraphs.appendChild(doc.createElement("Para"))
-                        para.setAttribute("Pos", str(start))
-                        para.setAttribute("Len", str(end - start + 1))
-                        para.setAttribute("Style", "Text Body")
-                        start = end + 1
-
-                    source['MetaData'] = paragraphs.toxml() + settings.toxml()
-
-                extendeditems.append({
-                    'Item_Id':source['Item_Id'],
-                    'Properties': '<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="MimeType" Value=""/></Properties>'
-                })
+                    metadata = StringIO()
+                    paragraphindex(source).writexml(metadata, "Text Body")
+                    metadata.write(DISPLAYSETTINGSXML)
+                    source['MetaData'] = metadata.getvalue()
+
+                source['ExtendedProperties'] = '<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="MimeType" Value=""/></Properties>'
             # Note that NVivo 10 for Mac doesn't support images
             elif source['ObjectTypeName'] == 'JPEG':
                 source['SourceType'] = NVivo.SourceType.JPEG
-                image = Image.open(StringIO(source['Object']))
-                source['LengthX'], source['LengthY'] = image.size
-                image.thumbnail((200,200))
-                thumbnail = StringIO()
-                image.save(thumbnail, format='BMP')
-                source['Thumbnail'] = thumbnail.getvalue()
+                # Make the thumbnail here unless a worker process has been making it
+                thumbnailresult = source.pop('ThumbnailResult', None)
+                if thumbnailresult is not None:
+                    source['LengthX'], source['LengthY'], source['Thumbnail'] = thumbnailresult.get()
+                else:
+                    source['LengthX'], source['LengthY'], source['Thumbnail'] = thumbnail(source['Object'])
                 source['Properties'] = '<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"/>'
 
-                extendeditems.append({
-                    'Item_Id':source['Item_Id'],
-                    'Properties': '<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="PictureRotation" Value="0"/><Property Key="PictureBrightness" Value="0"/><Property Key="PictureContrast" Value="0"/><Property Key="PictureQuality" Value="0"/></Properties>'
-                })
+                source['ExtendedProperties'] = '<Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="PictureRotation" Value="0"/><Property Key="PictureBrightness" Value="0"/><Property Key="PictureContrast" Value="0"/><Property Key="PictureQuality" Value="0"/></Properties>'
             #elif source['ObjectTypeName'] == 'MP3':
                 #source['LengthX'] = length of recording in milliseconds
                 #source['Waveform'] = waveform of recording, one byte per centisecond
@@ -2061,6 +2156,10 @@ def Denormalise(args):
             else:
                 source['LengthX'] = 0
 
+            if cachekey is not None and cached is None:
+                cache.put(cachekey, dict((key, source.get(key)) for key in NVivo.CONVERTEDCOLUMNS
+                                         if source.get(key) is not unconverted[key]))
+
             # Lookup object type from name
             if source['ObjectTypeName'] in NVivo.ObjectTypeName.values():
                 source['ObjectType'] = NVivo.ObjectTypeName.keys()[NVivo.ObjectTypeName.values().index(source['ObjectTypeName'])]
@@ -2070,10 +2169,72 @@ def Denormalise(args):
             if args.mac:
                 source['HierarchicalName'] = headsourcename + u'\\\\' + source['Name']
 
-        # Unitialise static variable
-        massagesource.unoconvcmd = None
+            # Objects that are written to NVivo unchanged must be read after all
+            if isinstance(source['Object'], mmap.mmap):
+                source['Object'] = source['Object'][:]
+
+        # Paragraph index of a source's text, reused from the normalised file if it was made
+        # from the same text. New indexes are kept to be written back with the sources.
+        def paragraphindex(source):
+            digest = hashlib.sha256(source['PlainText'].encode('utf-8')).hexdigest()
+            stored = storedparagraphs.get(source['Item_Id'])
+            if stored is not None and stored['TextDigest'] == digest:
+                return ParagraphIndex.frompacked(stored['Paragraphs'])
+
+            paragraphs = ParagraphIndex.fromtext(source['PlainText'])
+            newparagraphs.append({'Source_Id':  source['Item_Id'],
+                                  'TextDigest': digest,
+                                  'Paragraphs': paragraphs.packed()})
+            return paragraphs
+
+        # Prepare sources before any are massaged. Cache keys are made from the sources as
+        # they are in the normalised file and the kind of project they are going into, and
+        # worker processes start making thumbnails of images that are not in the cache,
+        # carrying on while other sources are massaged and written.
+        def preparesources(sources):
+            if cache is not None:
+                for source in sources:
+                    source['CacheKey'] = cache.key('mac' if args.mac else 'windows', args.nvivoversion,
+                                                   source['ObjectTypeName'], source['SourceType'],
+                                                   source['Object'], source['Content'])
+
+            jpegsources = [source for source in sources if source['ObjectTypeName'] == 'JPEG'
+                                                        and not (cache is not None and source['CacheKey'] in cache)]
+            for source, thumbnailresult in zip(jpegsources, thumbnailer.start([source['Object'] for source in jpegsources])):
+                source['ThumbnailResult'] = thumbnailresult
+
+        # Massage sources as many at a time as the converter can convert, compress their
+        # objects, then collect their extended items in the order of the sources. PDFs that are not in the conversion cache
+        # are first extracted in parallel by worker processes.
+        def massagesources(sources):
+            pdfsources = [source for source in sources if source['ObjectTypeName'] == 'PDF'
+                                                       and not (cache is not None and source['CacheKey'] in cache)]
+            if pdfextractor.workers > 1 and len(pdfsources) > 1:
+                for source, layout in zip(pdfsources, pdfextractor.extract([source['Object'] for source in pdfsources])):
+                    source['PdfLayout'] = layout
+
+            if converter.workers > 1 and len(sources) > 1:
+                pool = ThreadPool(converter.workers)
+                try:
+                    pool.map(stats.inphase(massagesource), sources)
+                finally:
+                    pool.close()
+            else:
+                for source in sources:
+                    massagesource(source)
+
+            # NVivo for Windows keeps doc objects compressed without a header
+            if not args.mac:
+                docsources = [source for source in sources if source['ObjectTypeName'] == 'DOC']
+                for source, data in zip(docsources, compressor.deflate([source['Object'] for source in docsources])):
+                    source['Object'] = data
+
+            extendeditems.extend({'Item_Id':    source['Item_Id'],
+                                  'Properties': source['ExtendedProperties']}
+                                 for source in sources if source.get('ExtendedProperties') is not None)
 
 # Sources
+        stats.begin('sources')
         if args.sources != 'skip':
             if args.verbosity > 0:
                 print("Denormalising sources", file=sys.stderr)
@@ -2081,7 +2242,7 @@ def Denormalise(args):
             # Look up head source
             headsourcename = u'Internals'
             if args.windows:
-                headsourcename = u''.join(map(lambda ch: chr(ord(ch) + 0x377), headsourcename))
+                headsourcename = encodename(headsourcename)
             headsource = nvivocon.execute(select([
                     nvivoItem.c.Id
                 ]).where(and_(
@@ -2097,7 +2258,7 @@ def Denormalise(args):
                 if args.verbosity > 1:
                     print("Found head source Id: " + str(headsource['Id']), file=sys.stderr)
 
-            sources = [dict(row) for row in normdb.execute(select([
+            sources = stats.read([dict(row) for row in normdb.execute(select([
                         normSource.c.Id.label('Item_Id'),
                         normSource.c.Category,
                         normSource.c.Name,
@@ -2112,13 +2273,19 @@ def Denormalise(args):
                         normSource.c.CreatedDate,
                         normSource.c.ModifiedBy,
                         normSource.c.ModifiedDate
-                    ]))]
+                    ]))])
             extendeditems = []
 
-            newids = [{'Item_Id':row['Item_Id']} for row in sources]
-            curids = [{'Item_Id':row['Item_Id']} for row in nvivocon.execute(select([
+            if normSourceParagraphs is not None:
+                storedparagraphs = dict((row['Source_Id'], row) for row in normdb.execute(select([
+                        normSourceParagraphs.c.Source_Id,
+                        normSourceParagraphs.c.TextDigest,
+                        normSourceParagraphs.c.Paragraphs
+                    ])))
+
+            curids = set(row['Item_Id'] for row in nvivocon.execute(select([
                     nvivoSource.c.Item_Id
-                ]))]
+                ])))
 
             itemvalues = {
                         'Id':       bindparam('Item_Id'),
@@ -2134,35 +2301,42 @@ def Denormalise(args):
                 })
 
             if args.sources == 'overwrite' or args.sources == 'replace':
-                sourcestoupdate = [source for source in sources if {'Item_Id':source['Item_Id']} in curids]
-
+                sourcestoupdate = [source for source in sources if source['Item_Id'] in curids]
+            else:
+                sourcestoupdate = []
+            sourcestoinsert = [source for source in sources if source['Item_Id'] not in curids]
+            preparesources(sourcestoupdate + sourcestoinsert)
+
+            massagesources(sourcestoupdate)
+
+            if len(sourcestoupdate) > 0:
+                nvivocon.execute(nvivoItem.update(
+                        nvivoItem.c.Id == bindparam('Item_Id')
+                    ).values(itemvalues), sourcestoupdate)
+                nvivocon.execute(nvivoSource.update(
+                        nvivoSource.c.Item_Id == bindparam('Item_Id')).values({
+                        'TypeId':   bindparam('ObjectType'),
+                        # This work-around is specific to MSSQL
+                        'Object':   func.CONVERT(literal_column('VARBINARY(MAX)'),
+                                                bindparam('Object'))
+                                    if mssql
+                                    else bindparam('Object'),
+                        'Thumbnail': func.CONVERT(literal_column('VARBINARY(MAX)'),
+                                                bindparam('Thumbnail'))
+                                    if mssql
+                                    else bindparam('Thumbnail'),
+                    }), sourcestoupdate)
                 for source in sourcestoupdate:
-                    massagesource(source)
+                    catalogue.update(source['Item_Id'], Name=source['Name'], TypeId=int(source['SourceType']),
+                                     HierarchicalName=source.get('HierarchicalName'))
 
-                if len(sourcestoupdate) > 0:
-                    nvivocon.execute(nvivoItem.update(
-                            nvivoItem.c.Id == bindparam('Item_Id')
-                        ).values(itemvalues), sourcestoupdate)
-                    nvivocon.execute(nvivoSource.update(
-                            nvivoSource.c.Item_Id == bindparam('Item_Id')).values({
-                            'TypeId':   bindparam('ObjectType'),
-                            # This work-around is specific to MSSQL
-                            'Object':   func.CONVERT(literal_column('VARBINARY(MAX)'),
-                                                    bindparam('Object'))
-                                        if mssql
-                                        else bindparam('Object'),
-                            'Thumbnail': func.CONVERT(literal_column('VARBINARY(MAX)'),
-                                                    bindparam('Thumbnail'))
-                                        if mssql
-                                        else bindparam('Thumbnail'),
-                        }), sourcestoupdate)
-
-            sourcestoinsert = [source for source in sources if not {'Item_Id':source['Item_Id']} in curids]
-            for source in sourcestoinsert:
-                massagesource(source)
+            massagesources(sourcestoinsert)
 
             if len(sourcestoinsert) > 0:
                 nvivocon.execute(nvivoItem.insert().values(itemvalues), sourcestoinsert)
+                for source in sourcestoinsert:
+                    catalogue.add(source['Item_Id'], source['Name'], int(source['SourceType']),
+                                  hierarchicalname=source.get('HierarchicalName'))
                 nvivocon.execute(nvivoSource.insert().values({
                         'TypeId':   bindparam('ObjectType'),
                         # This work-around is specific to MSSQL
@@ -2191,27 +2365,29 @@ def Denormalise(args):
 
             # Now deal with extended items.
             if len(extendeditems) > 0:
-                newids = [{'Item_Id':row['Item_Id']} for row in extendeditems]
-                curids = [{'Item_Id':row['Item_Id']} for row in nvivocon.execute(select([
+                curids = set(row['Item_Id'] for row in nvivocon.execute(select([
                         nvivoExtendedItem.c.Item_Id
-                    ]))]
+                    ])))
                 if args.sources == 'overwrite':
-                    extendeditemstoupdate = [row for row in extendeditems if {'Item_Id':source['Item_Id']} in curids]
+                    extendeditemstoupdate = [row for row in extendeditems if row['Item_Id'] in curids]
                     if len(extendeditemstoupdate) > 0:
+                        for row in extendeditemstoupdate:
+                            row['_Item_Id'] = row['Item_Id']
                         nvivocon.execute(nvivoExtendedItem.update(
-                                nvivoExtendedItem.c.Item_Id == bindparam('Item_Id')
-                            ), extendeditemstoinsert)
+                                nvivoExtendedItem.c.Item_Id == bindparam('_Item_Id')
+                            ), extendeditemstoupdate)
 
-                extendeditemstoinsert = [row for row in extendeditems if not {'Item_Id':source['Item_Id']} in curids]
+                extendeditemstoinsert = [row for row in extendeditems if row['Item_Id'] not in curids]
                 if len(extendeditemstoinsert) > 0:
                     nvivocon.execute(nvivoExtendedItem.insert(), extendeditemstoinsert)
 
 # Source attributes
+        stats.begin('source_attributes')
         if args.source_attributes != 'skip':
             if args.verbosity > 0:
                 print("Denormalising source attributes", file=sys.stderr)
 
-            attributes = [dict(row) for row in normdb.execute(select([
+            attributes = stats.read([dict(row) for row in normdb.execute(select([
                     normSourceAttribute.c.Id,
                     normSourceAttribute.c.Name,
                     normSourceAttribute.c.Description,
@@ -2220,8 +2396,8 @@ def Denormalise(args):
                     normSourceAttribute.c.CreatedDate,
                     normSourceAttribute.c.ModifiedBy,
                     normSourceAttribute.c.ModifiedDate
-                ]))]
-            values = [dict(row) for row in normdb.execute(select([
+                ]))])
+            values = stats.read([dict(row) for row in normdb.execute(select([
                     normSourceValue.c.Source.label('Item'),
                     normSourceValue.c.Attribute,
                     normSourceValue.c.Value,
@@ -2233,7 +2409,7 @@ def Denormalise(args):
                     normSourceAttribute.c.Id == normSourceValue.c.Attribute
                 ).order_by(
                     normSourceAttribute.c.Name
-                ))]
+                ))])
 
             skip_merge_or_overwrite_attributes(attributes, values, 'source', args.source_attributes)
 
@@ -2242,11 +2418,12 @@ def Denormalise(args):
             rebuild_category_records(NVivo.ItemType.SourceClassification)
 
 # Taggings and annotations
+        stats.begin('taggings')
         if args.taggings != 'skip' or args.annotations != 'skip':
             if args.verbosity > 0:
                 print("Denormalising taggings and/or annotations", file=sys.stderr)
 
-            taggings = [dict(row) for row in normdb.execute(select([
+            taggings = stats.read([dict(row) for row in normdb.execute(select([
                     normTagging.c.Id,
                     normTagging.c.Source,
                     normSource.c.ObjectType,
@@ -2259,7 +2436,10 @@ def Denormalise(args):
                     normTagging.c.ModifiedDate,
                 ]).where(
                     normSource.c.Id == normTagging.c.Source
-                ))]
+                ))])
+
+            sourcesbyid   = {source['Item_Id']: source for source in sources}
+            sourceoffsets = {}
 
             nvivotaggings    = []
             nvivoannotations = []
@@ -2271,7 +2451,7 @@ def Denormalise(args):
                     taggings.remove(tagging)
                     continue
 
-                source = next(source for source in sources if source['Item_Id'] == tagging['Source'])
+                source = sourcesbyid[tagging['Source']]
 
                 # Normalised file startX is 1-based, Nvivo is 0-based
                 tagging['StartX']  = int(matchfragment.group(1)) - 1
@@ -2293,24 +2473,19 @@ def Denormalise(args):
                         tagging['LengthY'] = int(endY) - tagging['StartY'] + 1
 
 
+                offsets = sourceoffsets.get(tagging['Source'])
+                if offsets is None:
+                    offsets = SourceOffsets(source['Content'] if args.windows else source['PlainText'])
+                    sourceoffsets[tagging['Source']] = offsets
+
                 # On Mac need to remove white space (but not non-breaking spaces) from startX
                 # and LengthX to calculate StartText and LengthText
                 if args.mac:
-                    if source['PlainText'] is not None:
-                        tagging['StartText']  = tagging['StartX'] - sum(c.isspace() and c != u'\xa0'
-                                                for c in source['PlainText'][0:tagging['StartX']])
-                        tagging['LengthText'] = tagging['LengthX'] - sum(c.isspace() and c != u'\xa0'
-                                                for c in source['PlainText'][tagging['StartX']:tagging['StartX']+tagging['LengthX']])
-                    else:
-                        tagging['StartText']  = tagging['StartX']
-                        tagging['LengthText'] = tagging['LengthX']
+                    tagging['StartText'], tagging['LengthText'] = offsets.toMac(tagging['StartX'], tagging['LengthX'])
 
                 # On Windows need to adjust for two-character line terminators
                 if args.windows:
-                    startx  = tagging['StartX']
-                    lengthx = tagging['LengthX']
-                    tagging['StartX']  += len(re.findall('(?<=[^\r])\n', source['Content'][0:startx]))
-                    tagging['LengthX'] += len(re.findall('(?<=[^\r])\n', source['Content'][startx:startx+lengthx]))
+                    tagging['StartX'], tagging['LengthX'] = offsets.toWindows(tagging['StartX'], tagging['LengthX'])
 
                 if tagging['ObjectType'] == 'JPEG':
                     tagging['ReferenceTypeId'] = 2
@@ -2336,6 +2511,34 @@ def Denormalise(args):
 # All done.
         nvivotr.commit()
         nvivotr = None
+
+        # Keep new paragraph indexes in the normalised file for next time. This is only a
+        # saving for later runs, so failing to do it is not an error.
+        if keepparagraphs and len(newparagraphs) > 0:
+            try:
+                if normSourceParagraphs is None:
+                    normSourceParagraphs = Table('SourceParagraphs', normmd,
+                        Column('Source_Id',     UUID(),         primary_key=True),
+                        Column('TextDigest',    String(64),     nullable=False),
+                        Column('Paragraphs',    LargeBinary,    nullable=False))
+                    normSourceParagraphs.create(normdb)
+
+                normcon = normdb.connect()
+                try:
+                    normtr = normcon.begin()
+                    merge_overwrite_or_replace(normcon, normSourceParagraphs, ['Source_Id'], newparagraphs, 'overwrite', args.verbosity)
+                    normtr.commit()
+                finally:
+                    normcon.close()
+            except Exception as exception:
+                if args.verbosity > 0:
+                    print("WARNING: Paragraph indexes could not be kept in the normalised file: " + str(exception), file=sys.stderr)
+
+        stats.close()
+        if ownconverter:
+            converter.close()
+        thumbnailer.close()
+        compressor.close()
         nvivocon.close()
         nvivodb.dispose()
 
@@ -20,12 +20,15 @@ import os
 from sqlalchemy import *
 from sqlalchemy import exc
 import uuid
+from blobTools import openblobstore, resolveblobs
 
 exec(open(os.path.dirname(os.path.realpath(__file__)) + os.path.sep + 'DataTypes.py').read())
 
 class NVivoNorm(object):
 
-    def __init__(self, path):
+    # Blob references in the Source table are resolved transparently unless rawblobs is
+    # set, for tools that manage the blob store themselves.
+    def __init__(self, path, rawblobs=False):
         try:
             self.db  = create_engine('sqlite:///' + path)
             self.md  = MetaData(bind=self.db)
@@ -193,6 +196,11 @@ class NVivoNorm(object):
                 Column('ModifiedDate',  DateTime))
             self.Tagging.create(self.db)
 
+        # Source objects and thumbnails may be kept in a blob store beside the file
+        self.blobs = openblobstore(path)
+        if not rawblobs:
+            resolveblobs(self.Source, self.blobs)
+
     def __del__(self):
         if self.tr:
             self.tr.rollback()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import argparse
+import Columnar
+
+parser = argparse.ArgumentParser(description='Export the tables of a normalised NVivo project as columnar Parquet or Arrow files.')
+
+parser.add_argument('-v', '--verbosity', type=int, default=1)
+
+parser.add_argument('-f', '--format', choices=["parquet", "arrow"], default="parquet",
+                    help='Columnar file format.')
+parser.add_argument('-rg', '--row-group-size', type=int, default=Columnar.ROWGROUPSIZE,
+                    help='Number of rows read and written at a time.')
+
+parser.add_argument('infile', type=str,
+                    help="Input normalised (.norm) file")
+parser.add_argument('outdir', type=str, nargs='?',
+                    help="Output directory, one file per table")
+
+args = parser.parse_args()
+
+if args.outdir is None:
+    args.outdir = args.infile.rsplit('.',1)[0] + '.' + args.format
+
+args.indb = 'sqlite:///' + args.infile
+
+Columnar.Norm2Columnar(args)
@@ -48,6 +48,9 @@ parser.add_argument('-t', '--taggings', choices=["skip", "overwrite"], default="
 parser.add_argument('-a', '--annotations', choices=["skip", "overwrite"], default="merge",
                     help='Annotation action.')
 
+parser.add_argument('--stats', type=str,
+                    help='Write the timing, row counts and memory use of each phase to this JSON file.')
+
 parser.add_argument('infile', type=argparse.FileType('rb'),
                     help="Input normalised (.norm) file")
 parser.add_argument('outfilename', type=str, nargs='?',
@@ -30,6 +30,34 @@ parser.add_argument('-v', '--verbosity', type=int, default=1)
 parser.add_argument('-nv', '--nvivoversion', choices=["10", "11"], default="10",
                     help='NVivo version (10 or 11)')
 
+parser.add_argument('-cs', '--chunk-size', type=int, default=100,
+                    help='Number of sources read and written at a time.')
+parser.add_argument('-pl', '--pipeline', action='store_true',
+                    help='Read from the NVivo database in parallel threads while writing.')
+
+parser.add_argument('--node-filter', type=str,
+                    help='Only normalise nodes whose name matches this SQL LIKE pattern, and their values and taggings.')
+parser.add_argument('--node-category', type=str,
+                    help='Only normalise nodes in the named category.')
+parser.add_argument('--node-ids', type=str,
+                    help='Only normalise nodes with these comma-separated Ids.')
+parser.add_argument('--source-filter', type=str,
+                    help='Only normalise sources whose name matches this SQL LIKE pattern, and their values, taggings and annotations.')
+parser.add_argument('--source-category', type=str,
+                    help='Only normalise sources in the named category.')
+parser.add_argument('--source-ids', type=str,
+                    help='Only normalise sources with these comma-separated Ids.')
+parser.add_argument('--modified-after', type=str,
+                    help='Only normalise items modified on or after this date.')
+parser.add_argument('--modified-before', type=str,
+                    help='Only normalise items modified before this date.')
+parser.add_argument('--no-objects', action='store_true',
+                    help='Do not read source objects.')
+parser.add_argument('--no-thumbnails', action='store_true',
+                    help='Do not read source thumbnails.')
+parser.add_argument('--blob-store', action='store_true',
+                    help='Keep source objects and thumbnails in a blob store beside the output file.')
+
 parser.add_argument('-u', '--users', choices=["skip", "merge", "overwrite", "replace"], default="merge",
                     help='User action.')
 parser.add_argument('-p', '--project', choices=["skip", "overwrite"], default="overwrite",
@@ -51,6 +79,9 @@ parser.add_argument('-t', '--taggings', choices=["skip", "merge", "overwrite", "
 parser.add_argument('-a', '--annotations', choices=["skip", "merge", "overwrite", "replace"], default="merge",
                     help='Annotation action.')
 
+parser.add_argument('--stats', type=str,
+                    help='Write the timing, row counts and memory use of each phase to this JSON file.')
+
 parser.add_argument('indb', type=str,
                     help='SQLAlchemy path of input NVivo database or "-" to create empty project.')
 parser.add_argument('outdb', type=str, nargs='?',
@@ -19,6 +19,7 @@
 from __future__ import print_function
 import argparse
 import NVivo
+from blobTools import blobdirectory
 import os
 import sys
 import shutil
@@ -33,6 +34,36 @@ def NormaliseNVP(arglist):
     parser.add_argument('-nv', '--nvivoversion', choices=["10", "11"], default="10",
                         help='NVivo version (10 or 11)')
 
+    parser.add_argument('-cs', '--chunk-size', type=int, default=100,
+                        help='Number of sources read and written at a time.')
+    parser.add_argument('-pl', '--pipeline', action='store_true',
+                        help='Read from the NVivo database in parallel threads while writing.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Update an existing output file, reading only what has changed since it was last written.')
+
+    parser.add_argument('--node-filter', type=str,
+                        help='Only normalise nodes whose name matches this SQL LIKE pattern, and their values and taggings.')
+    parser.add_argument('--node-category', type=str,
+                        help='Only normalise nodes in the named category.')
+    parser.add_argument('--node-ids', type=str,
+                        help='Only normalise nodes with these comma-separated Ids.')
+    parser.add_argument('--source-filter', type=str,
+                        help='Only normalise sources whose name matches this SQL LIKE pattern, and their values, taggings and annotations.')
+    parser.add_argument('--source-category', type=str,
+                        help='Only normalise sources in the named category.')
+    parser.add_argument('--source-ids', type=str,
+                        help='Only normalise sources with these comma-separated Ids.')
+    parser.add_argument('--modified-after', type=str,
+                        help='Only normalise items modified on or after this date.')
+    parser.add_argument('--modified-before', type=str,
+                        help='Only normalise items modified before this date.')
+    parser.add_argument('--no-objects', action='store_true',
+                        help='Do not read source objects.')
+    parser.add_argument('--no-thumbnails', action='store_true',
+                        help='Do not read source thumbnails.')
+    parser.add_argument('--blob-store', action='store_true',
+                        help='Keep source objects and thumbnails in a blob store beside the output file.')
+
     parser.add_argument('-S', '--server', type=str,
                         help="IP address/name of Microsoft SQL Server")
     parser.add_argument('-P', '--port', type=int,
@@ -61,6 +92,9 @@ def NormaliseNVP(arglist):
     parser.add_argument('-a', '--annotations', choices=["skip", "merge", "overwrite", "replace"], default="merge",
                         help='Annotation action.')
 
+    parser.add_argument('--stats', type=str,
+                        help='Write the timing, row counts and memory use of each phase to this JSON file.')
+
     parser.add_argument('infile', type=str,
                         help="Input NVivo (.nvp) file")
     parser.add_argument('outfilename', type=str, nargs='?',
@@ -104,6 +138,10 @@ def NormaliseNVP(arglist):
     if args.outfilename is None:
         args.outfilename = args.infile.rsplit('.',1)[0] + '.norm'
 
+    # Incremental mode starts from the existing output file
+    if args.incremental and os.path.isfile(args.outfilename):
+        shutil.copyfile(args.outfilename, tmpoutfilename)
+
     helperpath = os.path.dirname(os.path.realpath(__file__)) + os.path.sep + 'Windows' + os.path.sep
 
     if args.instance is None:
@@ -140,6 +178,9 @@ def NormaliseNVP(arglist):
     try:
         args.indb = 'mssql+pymssql://nvivotools:nvivotools@' + (args.server or 'localhost') + ((':' + str(args.port)) if args.port else '') + '/' + dbname
         args.outdb = 'sqlite:///' + tmpoutfilename
+        # The blob store belongs beside the final output file, not the temporary one
+        if args.blob_store:
+            args.blob_directory = blobdirectory(args.outfilename)
 
         NVivo.Normalise(args)
 
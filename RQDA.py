@@ -24,7 +24,11 @@ import sys
 import re
 from datetime import date, time, datetime
 from dateutil import parser as dateparser
+from dateTools import parsedatetime
 from distutils import util
+from mergeTools import merge_overwrite_or_replace
+from attributeTools import AttributeRegistry
+from statsTools import ConversionStats
 
 exec(open(os.path.dirname(os.path.realpath(__file__)) + os.path.sep + 'DataTypes.py').read())
 
@@ -275,8 +279,10 @@ def Norm2RQDA(args):
 
         rqdacon = rqdadb.connect()
         rqdatr=rqdacon.begin()
+        stats = ConversionStats('Norm2RQDA', [normdb, rqdadb], getattr(args, 'stats', None))
 
 # Project
+        stats.begin('project')
         if args.project != 'skip':
             if args.verbosity > 0:
                 print("Converting project", file=sys.stderr)
@@ -306,11 +312,12 @@ def Norm2RQDA(args):
                     }), project)
 
 # Source categories
+        stats.begin('source_categories')
         if args.source_categories != 'skip':
             if args.verbosity > 0:
                 print("Converting source categories", file=sys.stderr)
 
-            sourcecats  = [dict(row) for row in normdb.execute(select([
+            sourcecats  = stats.read([dict(row) for row in normdb.execute(select([
                     normSourceCategory.c.Id.label('Uuid'),
                     normSourceCategory.c.Name.label('name'),
                     normSourceCategory.c.Description.label('memo'),
@@ -319,7 +326,7 @@ def Norm2RQDA(args):
                     normSourceCategory.c.ModifiedDate
                 ]).where(
                     normUser.c.Id == normSourceCategory.c.CreatedBy
-                ))]
+                ))])
 
             lastid = 1
             filecatid = {}
@@ -335,11 +342,12 @@ def Norm2RQDA(args):
                 rqdacon.execute(rqdafilecat.insert(), sourcecats)
 
 # Sources
+        stats.begin('sources')
         if args.sources != 'skip':
             if args.verbosity > 0:
                 print("Converting sources", file=sys.stderr)
 
-            sources = [dict(row) for row in normdb.execute(select([
+            sources = stats.read([dict(row) for row in normdb.execute(select([
                     normSource.c.Id.label('Uuid'),
                     normSource.c.Category,
                     normSource.c.Name.label('name'),
@@ -351,7 +359,7 @@ def Norm2RQDA(args):
                 ]).where(and_(
                     normSource.c.Content.isnot(None),
                     normUser.c.Id == normSource.c.CreatedBy
-                )))]
+                )))])
 
             lastid = 1
             sourceid = {}
@@ -389,6 +397,19 @@ def Norm2RQDA(args):
                 if len(treefiles) > 0:
                     rqdacon.execute(rqdatreefile.insert(), treefiles)
 
+        # RQDA attribute names are global, so they are registered with no category
+        rqdaattributeregistry = AttributeRegistry(typekeys=('class',))
+        for row in rqdacon.execute(select([
+                rqdaattributes.c.name,
+                rqdaattributes.c['class']
+            ])):
+            if rqdaattributeregistry.lookup(None, row['name']) is None:
+                rqdaattributeregistry.add({
+                        'Category': None,
+                        'Name':     row['name'],
+                        'class':    row['class']
+                    })
+
         def create_or_test_attribute(value):
             attrclass = None
             if value['Type'] == 'Text':
@@ -410,12 +431,14 @@ def Norm2RQDA(args):
                 attrclass = 'numeric'
                 value['value'] = util.strtobool(value['value'])
 
-            attribute = rqdacon.execute(select([
-                    rqdaattributes.c['class']
-                ]).where(
-                    rqdaattributes.c.name == bindparam('variable')
-                ), value).first()
-            if attribute is None:
+            attribute = {
+                    'Category': None,
+                    'Name':     value['variable'],
+                    'class':    attrclass
+                }
+            existing = rqdaattributeregistry.find(attribute)
+            if existing is None:
+                rqdaattributeregistry.add(attribute)
                 rqdacon.execute(rqdaattributes.insert(), {
                         'name':   value['variable'],
                         'class':  attrclass,
@@ -424,17 +447,17 @@ def Norm2RQDA(args):
                         'dateM':  value['AttributeModifiedDate'].strftime('%c'),
                         'owner':  value['attributeowner']
                     })
-            else:
-                if attribute['class'] != attrclass:
-                    print("WARNING: Inconsistent type for attribute: " + value['variable'], file=sys.stderr)
+            elif rqdaattributeregistry.conflicts(existing, attribute):
+                print("WARNING: Inconsistent type for attribute: " + value['variable'], file=sys.stderr)
 
 # Source attributes
+        stats.begin('source_attributes')
         if args.source_attributes != 'skip':
             if args.verbosity > 0:
                 print("Converting source attributes", file=sys.stderr)
 
             normAttributeUser = normUser.alias(name='AttributeUser')
-            sourcevalues = [dict(row) for row in normdb.execute(select([
+            sourcevalues = stats.read([dict(row) for row in normdb.execute(select([
                     normSourceValue.c.Source.label('SourceUuid'),
                     normSourceAttribute.c.Name.label('variable'),
                     normSourceAttribute.c.Type,
@@ -451,7 +474,7 @@ def Norm2RQDA(args):
                     normSourceAttribute.c.Id == normSourceValue.c.Attribute,
                     normUser.c.Id == normSourceValue.c.CreatedBy,
                     normAttributeUser.c.Id == normSourceAttribute.c.CreatedBy
-                )))]
+                )))])
 
             for sourcevalue in sourcevalues:
                 sourcevalue['fileID'] = sourceid[sourcevalue['SourceUuid']]
@@ -465,11 +488,12 @@ def Norm2RQDA(args):
                 rqdacon.execute(rqdafileAttr.insert(), sourcevalues)
 
 # Node categories
+        stats.begin('node_categories')
         if args.node_categories != 'skip':
             if args.verbosity > 0:
                 print("Converting node categories", file=sys.stderr)
 
-            codecats  = [dict(row) for row in normdb.execute(select([
+            codecats  = stats.read([dict(row) for row in normdb.execute(select([
                     normNodeCategory.c.Id.label('Uuid'),
                     normNodeCategory.c.Name.label('name'),
                     normNodeCategory.c.Description.label('memo'),
@@ -478,7 +502,7 @@ def Norm2RQDA(args):
                     normNodeCategory.c.ModifiedDate
                 ]).where(
                     normUser.c.Id == normNodeCategory.c.CreatedBy
-                ))]
+                ))])
 
             lastid = 1
             codecatid = {}
@@ -496,13 +520,14 @@ def Norm2RQDA(args):
                 rqdacon.execute(rqdacodecat.insert(), codecats)
 
 # Nodes
+        stats.begin('nodes')
         if args.nodes != 'skip':
             if args.verbosity > 0:
                 print("Converting nodes", file=sys.stderr)
 
             # Nodes without any attributes are mapped to RQDA codes, those with attributes
             # are mapped to RQDA cases.
-            nodes = [dict(row) for row in normdb.execute(select([
+            nodes = stats.read([dict(row) for row in normdb.execute(select([
                     normNode.c.Id.label('Uuid'),
                     normNode.c.Category,
                     normNode.c.Name.label('name'),
@@ -519,7 +544,7 @@ def Norm2RQDA(args):
                     normNode.outerjoin(
                     normNodeValue,
                     normNodeValue.c.Node == normNode.c.Id
-                )))]
+                )))])
 
             lastcodeid = 1
             lastcaseid = 1
@@ -598,7 +623,7 @@ def Norm2RQDA(args):
 
             if args.node_attributes != 'skip':
                 normAttributeUser = normUser.alias(name='AttributeUser')
-                casevalues = [dict(row) for row in normdb.execute(select([
+                casevalues = stats.read([dict(row) for row in normdb.execute(select([
                         normNodeValue.c.Node.label('NodeUuid'),
                         normNodeAttribute.c.Name.label('variable'),
                         normNodeAttribute.c.Type,
@@ -613,7 +638,7 @@ def Norm2RQDA(args):
                         normNodeAttribute.c.Id == normNodeValue.c.Attribute,
                         normUser.c.Id == normNodeValue.c.CreatedBy,
                         normAttributeUser.c.Id == normNodeAttribute.c.CreatedBy
-                    )))]
+                    )))])
 
                 for casevalue in casevalues:
                     casevalue['caseID'] = caseid[casevalue['NodeUuid']]
@@ -626,11 +651,12 @@ def Norm2RQDA(args):
                     rqdacon.execute(rqdacaseAttr.insert(), casevalues)
 
 # Tagging
+        stats.begin('taggings')
         if args.taggings != 'skip':
             if args.verbosity > 0:
                 print("Converting taggings", file=sys.stderr)
 
-            taggings = [dict(row) for row in normdb.execute(select([
+            taggings = stats.read([dict(row) for row in normdb.execute(select([
                     normTagging.c.Id,
                     normTagging.c.Source.label('SourceUuid'),
                     normTagging.c.Node,
@@ -643,7 +669,7 @@ def Norm2RQDA(args):
                     normSource.c.Id == normTagging.c.Source,
                     normSource.c.Content.isnot(None),
                     normUser.c.Id == normTagging.c.CreatedBy
-                )))]
+                )))])
 
             annotations = []
             codings = []
@@ -686,6 +712,7 @@ def Norm2RQDA(args):
 # All done.
         rqdatr.commit()
         rqdatr = None
+        stats.close()
         rqdacon.close()
         rqdadb.dispose()
 
@@ -901,6 +928,7 @@ def RQDA2Norm(args):
 
         normcon = normdb.connect()
         normtr = normcon.begin()
+        stats = ConversionStats('RQDA2Norm', [rqdadb, normdb], getattr(args, 'stats', None))
 
 # Function to find or create users
         def find_or_create_user(name):
@@ -921,7 +949,21 @@ def RQDA2Norm(args):
                     })
                 return userid
 
+# Functions to find the Ids of rows already in the normalised file, so that converting
+# into an existing file matches its rows rather than adding them again. Each Id is only
+# given out once, so that rows with the same key still get Ids of their own.
+        def existing_ids(table, keycolumns):
+            ids = {}
+            for row in normcon.execute(select([table.c.Id] + [table.c[column] for column in keycolumns]).order_by(table.c.Id)):
+                ids.setdefault(tuple(row[column] for column in keycolumns), []).append(row['Id'])
+            return ids
+
+        def find_or_create_id(ids, key):
+            existing = ids.get(key)
+            return existing.pop(0) if existing else uuid.uuid4()
+
 # Project
+        stats.begin('project')
         if args.project != 'skip':
             if args.verbosity > 0:
                 print("Converting project", file=sys.stderr)
@@ -939,9 +981,9 @@ def RQDA2Norm(args):
                 raise RuntimeError("Incompatible version of RQDA file: " + project['databaseversion'])
 
             project['CreatedBy']    = find_or_create_user('Default User')
-            project['CreatedDate']  = dateparser.parse(project['date'])
+            project['CreatedDate']  = parsedatetime(project['date'])
             project['ModifiedBy']   = project['CreatedBy']
-            project['ModifiedDate'] = dateparser.parse(project['dateM'])
+            project['ModifiedDate'] = parsedatetime(project['dateM'])
 
             normcon.execute(normProject.delete())
             normcon.execute(normProject.insert().values({
@@ -949,11 +991,12 @@ def RQDA2Norm(args):
                 }), project)
 
 # Source categories
+        stats.begin('source_categories')
         if args.source_categories != 'skip':
             if args.verbosity > 0:
                 print("Converting source categories", file=sys.stderr)
 
-            sourcecats  = [dict(row) for row in rqdadb.execute(select([
+            sourcecats  = stats.read([dict(row) for row in rqdadb.execute(select([
                     rqdafilecat.c.catid,
                     rqdafilecat.c.name.label('Name'),
                     rqdafilecat.c.memo.label('Description'),
@@ -962,26 +1005,27 @@ def RQDA2Norm(args):
                     rqdafilecat.c.dateM
                 ]).where(
                     rqdafilecat.c.status == literal_column('1')
-                ))]
+                ))])
 
+            sourcecatids = existing_ids(normSourceCategory, ['Name'])
             sourcecatuuid = {}
             for sourcecat in sourcecats:
-                sourcecat['Id'] = uuid.uuid4()
+                sourcecat['Id'] = find_or_create_id(sourcecatids, (sourcecat['Name'],))
                 sourcecatuuid[sourcecat['catid']] = sourcecat['Id']
                 sourcecat['CreatedBy']    = find_or_create_user(sourcecat['owner'])
-                sourcecat['CreatedDate']  = dateparser.parse(sourcecat['date'])
+                sourcecat['CreatedDate']  = parsedatetime(sourcecat['date'])
                 sourcecat['ModifiedBy']   = sourcecat['CreatedBy']
-                sourcecat['ModifiedDate'] = dateparser.parse(sourcecat['dateM'])
+                sourcecat['ModifiedDate'] = parsedatetime(sourcecat['dateM'])
 
-            if len(sourcecats) > 0:
-                normcon.execute(normSourceCategory.insert(), sourcecats)
+            merge_overwrite_or_replace(normcon, normSourceCategory, ['Id'], sourcecats, args.source_categories, args.verbosity)
 
 # Sources
+        stats.begin('sources')
         if args.sources != 'skip':
             if args.verbosity > 0:
                 print("Converting sources", file=sys.stderr)
 
-            sources = [dict(row) for row in rqdadb.execute(select([
+            sources = stats.read([dict(row) for row in rqdadb.execute(select([
                     rqdasource.c.id.label('fid'),
                     rqdasource.c.name.label('Name'),
                     rqdasource.c.memo.label('Description'),
@@ -991,40 +1035,41 @@ def RQDA2Norm(args):
                     rqdasource.c.dateM
                 ]).where(
                     rqdasource.c.status == literal_column('1')
-                ))]
+                ))])
 
+            sourceids = existing_ids(normSource, ['Name'])
             sourceuuid = {}
             for source in sources:
-                source['Id'] = uuid.uuid4()
+                source['Id'] = find_or_create_id(sourceids, (source['Name'],))
                 sourceuuid[source['fid']] = source['Id']
                 source['ObjectType'] = 'TXT'
                 #source['Object'] = buffer(source['Content'])  # SQLite complains here!!!
                 source['CreatedBy']    = find_or_create_user(source['owner'])
-                source['CreatedDate']  = dateparser.parse(source['date'])
+                source['CreatedDate']  = parsedatetime(source['date'])
                 source['ModifiedBy']   = source['CreatedBy']
-                source['ModifiedDate'] = dateparser.parse(source['dateM'])
+                source['ModifiedDate'] = parsedatetime(source['dateM'])
                 source['Category']     = None
-                sourcecats = [dict(row) for row in rqdadb.execute(select([
+                sourcecats = stats.read([dict(row) for row in rqdadb.execute(select([
                         rqdatreefile.c.catid
                     ]).where(
                         rqdatreefile.c.fid == bindparam('fid')
                     ), {
                         'fid': source['fid']
-                    })]
+                    })])
                 if len(sourcecats) > 1:
                     print("WARNING: Source: " + source['Name'] + " belongs to more than one category. Only first category will be retained", file=sys.stderr)
                 if len(sourcecats) > 0:
                     source['Category'] = sourcecatuuid[sourcecats[0]['catid']]
 
-            if len(sources) > 0:
-                normcon.execute(normSource.insert(), sources)
+            merge_overwrite_or_replace(normcon, normSource, ['Id'], sources, args.sources, args.verbosity)
 
 # Source attributes
+        stats.begin('source_attributes')
         if args.source_attributes != 'skip':
             if args.verbosity > 0:
                 print("Converting source attributes", file=sys.stderr)
 
-            sourcevalues = [dict(row) for row in rqdadb.execute(select([
+            sourcevalues = stats.read([dict(row) for row in rqdadb.execute(select([
                     rqdafileAttr.c.variable.label('Name'),
                     rqdafileAttr.c.value.label('Value'),
                     rqdafileAttr.c.fileID.label('fid'),
@@ -1039,15 +1084,15 @@ def RQDA2Norm(args):
                 ]).where(and_(
                     rqdafileAttr.c.status == literal_column('1'),
                     rqdaattributes.c.name == rqdafileAttr.c.variable
-                )))]
+                )))])
 
             sourceattributeuuid = {}
             for sourcevalue in sourcevalues:
                 sourcevalue['Source']       = sourceuuid[sourcevalue['fid']]
                 sourcevalue['CreatedBy']    = find_or_create_user(sourcevalue['owner'])
-                sourcevalue['CreatedDate']  = dateparser.parse(sourcevalue['date'])
+                sourcevalue['CreatedDate']  = parsedatetime(sourcevalue['date'])
                 sourcevalue['ModifiedBy']   = sourcevalue['CreatedBy']
-                sourcevalue['ModifiedDate'] = dateparser.parse(sourcevalue['dateM'])
+                sourcevalue['ModifiedDate'] = parsedatetime(sourcevalue['dateM'])
 
                 if sourcevalue['Name'] not in sourceattributeuuid.keys():
                     sourceattribute = normcon.execute(select([
@@ -1058,8 +1103,8 @@ def RQDA2Norm(args):
                     if sourceattribute is None:
                         sourceattributeuuid[sourcevalue['Name']] = uuid.uuid4()
                         sourcevalue['AttributeOwner']    = find_or_create_user(sourcevalue['attributeowner'])
-                        sourcevalue['AttributeCreatedDate']  = dateparser.parse(sourcevalue['attributedate'])
-                        sourcevalue['AttributeModifiedDate'] = dateparser.parse(sourcevalue['attributedateM'])
+                        sourcevalue['AttributeCreatedDate']  = parsedatetime(sourcevalue['attributedate'])
+                        sourcevalue['AttributeModifiedDate'] = parsedatetime(sourcevalue['attributedateM'])
 
                         normcon.execute(normSourceAttribute.insert().values({
                                 'Id': sourceattributeuuid[sourcevalue['Name']],
@@ -1074,15 +1119,15 @@ def RQDA2Norm(args):
 
                 sourcevalue['Attribute'] = sourceattributeuuid[sourcevalue['Name']]
 
-            if len(sourcevalues) > 0:
-                normcon.execute(normSourceValue.insert(), sourcevalues)
+            merge_overwrite_or_replace(normcon, normSourceValue, ['Source', 'Attribute'], sourcevalues, args.source_attributes, args.verbosity)
 
 # Node categories
+        stats.begin('node_categories')
         if args.node_categories != 'skip':
             if args.verbosity > 0:
                 print("Converting node categories", file=sys.stderr)
 
-            nodecats  = [dict(row) for row in rqdadb.execute(select([
+            nodecats  = stats.read([dict(row) for row in rqdadb.execute(select([
                     rqdacodecat.c.catid,
                     rqdacodecat.c.name.label('Name'),
                     rqdacodecat.c.memo.label('Description'),
@@ -1091,26 +1136,30 @@ def RQDA2Norm(args):
                     rqdacodecat.c.dateM
                 ]).where(
                     rqdacodecat.c.status == literal_column('1')
-                ))]
+                ))])
 
+            nodecatids = existing_ids(normNodeCategory, ['Name'])
             nodecatuuid = {}
             for nodecat in nodecats:
-                nodecat['Id'] = uuid.uuid4()
+                nodecat['Id'] = find_or_create_id(nodecatids, (nodecat['Name'],))
                 nodecatuuid[nodecat['catid']] = nodecat['Id']
                 nodecat['CreatedBy']    = find_or_create_user(nodecat['owner'])
-                nodecat['CreatedDate']  = dateparser.parse(nodecat['date'])
+                nodecat['CreatedDate']  = parsedatetime(nodecat['date'])
                 nodecat['ModifiedBy']   = nodecat['CreatedBy']
-                nodecat['ModifiedDate'] = dateparser.parse(nodecat['dateM'])
+                nodecat['ModifiedDate'] = parsedatetime(nodecat['dateM'])
 
-            if len(nodecats) > 0:
-                normcon.execute(normNodeCategory.insert(), nodecats)
+            merge_overwrite_or_replace(normcon, normNodeCategory, ['Id'], nodecats, args.node_categories, args.verbosity)
+
+# Nodes and cases are both written to the node table, so share its existing Ids
+        nodeids = existing_ids(normNode, ['Name'])
 
 # Nodes
+        stats.begin('nodes')
         if args.nodes != 'skip':
             if args.verbosity > 0:
                 print("Converting nodes", file=sys.stderr)
 
-            nodes  = [dict(row) for row in rqdadb.execute(select([
+            nodes  = stats.read([dict(row) for row in rqdadb.execute(select([
                     rqdafreecode.c.id.label('cid'),
                     rqdafreecode.c.name.label('Name'),
                     rqdafreecode.c.memo.label('Description'),
@@ -1119,38 +1168,38 @@ def RQDA2Norm(args):
                     rqdafreecode.c.dateM
                 ]).where(
                     rqdafreecode.c.status == literal_column('1')
-                ))]
+                ))])
 
             nodeuuid = {}
             for node in nodes:
-                node['Id'] = uuid.uuid4()
+                node['Id'] = find_or_create_id(nodeids, (node['Name'],))
                 nodeuuid[node['cid']] = node['Id']
                 node['CreatedBy']    = find_or_create_user(node['owner'])
-                node['CreatedDate']  = dateparser.parse(node['date'])
+                node['CreatedDate']  = parsedatetime(node['date'])
                 node['ModifiedBy']   = node['CreatedBy']
-                node['ModifiedDate'] = dateparser.parse(node['dateM'])
+                node['ModifiedDate'] = parsedatetime(node['dateM'])
                 node['Category']     = None
-                nodecats = [dict(row) for row in rqdadb.execute(select([
+                nodecats = stats.read([dict(row) for row in rqdadb.execute(select([
                         rqdatreecode.c.catid
                     ]).where(
                         rqdatreecode.c.cid == bindparam('cid')
                     ), {
                         'cid': node['cid']
-                    })]
+                    })])
                 if len(nodecats) > 1:
                     print("WARNING: Node: " + node['Name'] + " belongs to more than one category. Only first category will be retained", file=sys.stderr)
                 if len(nodecats) > 0:
                     node['Category'] = nodecatuuid[nodecats[0]['catid']]
 
-            if len(nodes) > 0:
-                normcon.execute(normNode.insert(), nodes)
+            merge_overwrite_or_replace(normcon, normNode, ['Id'], nodes, args.nodes, args.verbosity)
 
 # Cases
+        stats.begin('cases')
         if args.cases != 'skip':
             if args.verbosity > 0:
                 print("Converting cases", file=sys.stderr)
 
-            cases  = [dict(row) for row in rqdadb.execute(select([
+            cases  = stats.read([dict(row) for row in rqdadb.execute(select([
                     rqdacases.c.id.label('caseid'),
                     rqdacases.c.name.label('Name'),
                     rqdacases.c.memo.label('Description'),
@@ -1159,26 +1208,26 @@ def RQDA2Norm(args):
                     rqdacases.c.dateM
                 ]).where(
                     rqdacases.c.status == literal_column('1')
-                ))]
+                ))])
 
             caseuuid = {}
             for case in cases:
-                case['Id'] = uuid.uuid4()
+                case['Id'] = find_or_create_id(nodeids, (case['Name'],))
                 caseuuid[case['caseid']] = case['Id']
                 case['CreatedBy']    = find_or_create_user(case['owner'])
-                case['CreatedDate']  = dateparser.parse(case['date'])
+                case['CreatedDate']  = parsedatetime(case['date'])
                 case['ModifiedBy']   = case['CreatedBy']
-                case['ModifiedDate'] = dateparser.parse(case['dateM'])
+                case['ModifiedDate'] = parsedatetime(case['dateM'])
 
-            if len(cases) > 0:
-                normcon.execute(normNode.insert(), cases)
+            merge_overwrite_or_replace(normcon, normNode, ['Id'], cases, args.cases, args.verbosity)
 
 # Case attributes
+        stats.begin('case_attributes')
         if args.case_attributes != 'skip':
             if args.verbosity > 0:
                 print("Converting case attributes", file=sys.stderr)
 
-            casevalues = [dict(row) for row in rqdadb.execute(select([
+            casevalues = stats.read([dict(row) for row in rqdadb.execute(select([
                     rqdacaseAttr.c.variable.label('Name'),
                     rqdacaseAttr.c.value.label('Value'),
                     rqdacaseAttr.c.caseID.label('caseid'),
@@ -1193,18 +1242,18 @@ def RQDA2Norm(args):
                 ]).where(and_(
                     rqdacaseAttr.c.status == literal_column('1'),
                     rqdaattributes.c.name == rqdacaseAttr.c.variable
-                )))]
+                )))])
 
             caseattributeuuid = {}
             for casevalue in casevalues[:]: # Take copy of list so we can remove items
                 casevalue['Node']                  = caseuuid[casevalue['caseid']]
                 casevalue['CreatedBy']             = find_or_create_user(casevalue['owner'])
-                casevalue['CreatedDate']           = dateparser.parse(casevalue['date'])
+                casevalue['CreatedDate']           = parsedatetime(casevalue['date'])
                 casevalue['ModifiedBy']            = casevalue['CreatedBy']
-                casevalue['ModifiedDate']          = dateparser.parse(casevalue['dateM'])
+                casevalue['ModifiedDate']          = parsedatetime(casevalue['dateM'])
                 casevalue['AttributeOwner']        = find_or_create_user(casevalue['attributeowner'])
-                casevalue['AttributeCreatedDate']  = dateparser.parse(casevalue['attributedate'])
-                casevalue['AttributeModifiedDate'] = dateparser.parse(casevalue['attributedateM'])
+                casevalue['AttributeCreatedDate']  = parsedatetime(casevalue['attributedate'])
+                casevalue['AttributeModifiedDate'] = parsedatetime(casevalue['attributedateM'])
 
                 # Catch reserved attribute 'Category'
                 if casevalue['Name'] == 'Category':
@@ -1261,17 +1310,17 @@ def RQDA2Norm(args):
 
                     casevalue['Attribute'] = caseattributeuuid[casevalue['Name']]
 
-            if len(casevalues) > 0:
-                normcon.execute(normNodeValue.insert(), casevalues)
+            merge_overwrite_or_replace(normcon, normNodeValue, ['Node', 'Attribute'], casevalues, args.case_attributes, args.verbosity)
 
 # Annotations, codings and case linkages
+        stats.begin('taggings')
         if args.taggings != 'skip':
             if args.verbosity > 0:
                 print("Converting annotations, codings and case linkages", file=sys.stderr)
 
             taggings = []
 
-            annotations = [dict(row) for row in rqdadb.execute(select([
+            annotations = stats.read([dict(row) for row in rqdadb.execute(select([
                     rqdaannotation.c.fid,
                     rqdaannotation.c.position.label('StartX'),
                     rqdaannotation.c.annotation.label('Memo'),
@@ -1280,7 +1329,7 @@ def RQDA2Norm(args):
                     rqdaannotation.c.dateM
                 ]).where(
                     rqdaannotation.c.status == literal_column('1')
-                ))]
+                ))])
             for annotation in annotations:
                 annotation.update({
                         'Node': None,
@@ -1288,7 +1337,7 @@ def RQDA2Norm(args):
                     })
                 taggings += [annotation]
 
-            codings = [dict(row) for row in rqdadb.execute(select([
+            codings = stats.read([dict(row) for row in rqdadb.execute(select([
                     rqdacoding.c.cid,
                     rqdacoding.c.fid,
                     rqdacoding.c.selfirst.label('StartX'),
@@ -1298,7 +1347,7 @@ def RQDA2Norm(args):
                     rqdacoding.c.date
                 ]).where(
                     rqdacoding.c.status == literal_column('1')
-                ))]
+                ))])
             for coding in codings:
                 coding.update({
                         'Node':  nodeuuid[coding['cid']],
@@ -1306,7 +1355,7 @@ def RQDA2Norm(args):
                     })
                 taggings += [coding]
 
-            caselinkages = [dict(row) for row in rqdadb.execute(select([
+            caselinkages = stats.read([dict(row) for row in rqdadb.execute(select([
                     rqdacaselinkage.c.caseid,
                     rqdacaselinkage.c.fid,
                     rqdacaselinkage.c.selfirst.label('StartX'),
@@ -1316,7 +1365,7 @@ def RQDA2Norm(args):
                     rqdacaselinkage.c.date
                 ]).where(
                     rqdacaselinkage.c.status == literal_column('1')
-                ))]
+                ))])
             for caselinkage in caselinkages:
                 caselinkage.update({
                         'Node':  caseuuid[caselinkage['caseid']],
@@ -1324,21 +1373,22 @@ def RQDA2Norm(args):
                     })
                 taggings += [caselinkage]
 
+            taggingids = existing_ids(normTagging, ['Source', 'Node', 'Fragment'])
             for tagging in taggings:
-                tagging['Id']           = uuid.uuid4()
                 tagging['Source']       = sourceuuid[tagging['fid']]
                 tagging['Fragment']     = str(int(tagging['StartX'])) + ':' + str(int(tagging['EndX']))
+                tagging['Id']           = find_or_create_id(taggingids, (tagging['Source'], tagging['Node'], tagging['Fragment']))
                 tagging['CreatedBy']    = find_or_create_user(tagging['owner'])
-                tagging['CreatedDate']  = dateparser.parse(tagging['date'])
+                tagging['CreatedDate']  = parsedatetime(tagging['date'])
                 tagging['ModifiedBy']   = tagging['CreatedBy']
-                tagging['ModifiedDate'] = dateparser.parse(tagging['dateM'])
+                tagging['ModifiedDate'] = parsedatetime(tagging['dateM'])
 
-            if len(taggings) > 0:
-                normcon.execute(normTagging.insert(), taggings)
+            merge_overwrite_or_replace(normcon, normTagging, ['Id'], taggings, args.taggings, args.verbosity)
 
 # All done.
         normtr.commit()
         normtr = None
+        stats.close()
         normcon.close()
         normdb.dispose()
 
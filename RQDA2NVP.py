@@ -36,27 +36,27 @@ parser.add_argument('-nv', '--nvivoversion', choices=["10", "11"], default="10",
 parser.add_argument('-i', '--instance', type=str, nargs='?',
                     help="Microsoft SQL Server instance")
 
-parser.add_argument('-u', '--users', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-u', '--users', choices=["skip", "merge", "overwrite"], default="merge",
                     help='User action.')
 parser.add_argument('-p', '--project', choices=["skip", "overwrite"], default="overwrite",
                     help='Project action.')
-parser.add_argument('-nc', '--node-categories', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-nc', '--node-categories', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Node category action.')
-parser.add_argument('-n', '--nodes', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-n', '--nodes', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Node action.')
-parser.add_argument('-c', '--cases', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-c', '--cases', choices=["skip", "merge", "overwrite"], default="merge",
                     help='case action.')
-parser.add_argument('-ca', '--case-attributes', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-ca', '--case-attributes', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Case attribute table action.')
-parser.add_argument('-sc', '--source-categories', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-sc', '--source-categories', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Source category action.')
-parser.add_argument('-s', '--sources', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-s', '--sources', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Source action.')
-parser.add_argument('-sa', '--source-attributes', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-sa', '--source-attributes', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Source attribute action.')
-parser.add_argument('-t', '--taggings', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-t', '--taggings', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Tagging action.')
-parser.add_argument('-a', '--annotations', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-a', '--annotations', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Annotation action.')
 
 parser.add_argument('-b', '--base', dest='basefile', type=argparse.FileType('rb'), nargs='?',
@@ -27,29 +27,32 @@ parser = argparse.ArgumentParser(description='Convert an RQDA project to normali
 
 parser.add_argument('-v', '--verbosity', type=int, default=1)
 
-parser.add_argument('-u', '--users', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-u', '--users', choices=["skip", "merge", "overwrite"], default="merge",
                     help='User action.')
 parser.add_argument('-p', '--project', choices=["skip", "overwrite"], default="overwrite",
                     help='Project action.')
-parser.add_argument('-nc', '--node-categories', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-nc', '--node-categories', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Node category action.')
-parser.add_argument('-n', '--nodes', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-n', '--nodes', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Node action.')
-parser.add_argument('-c', '--cases', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-c', '--cases', choices=["skip", "merge", "overwrite"], default="merge",
                     help='case action.')
-parser.add_argument('-ca', '--case-attributes', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-ca', '--case-attributes', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Case attribute table action.')
-parser.add_argument('-sc', '--source-categories', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-sc', '--source-categories', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Source category action.')
-parser.add_argument('-s', '--sources', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-s', '--sources', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Source action.')
-parser.add_argument('-sa', '--source-attributes', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-sa', '--source-attributes', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Source attribute action.')
-parser.add_argument('-t', '--taggings', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-t', '--taggings', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Tagging action.')
-parser.add_argument('-a', '--annotations', choices=["skip", "overwrite"], default="merge",
+parser.add_argument('-a', '--annotations', choices=["skip", "merge", "overwrite"], default="merge",
                     help='Annotation action.')
 
+parser.add_argument('--stats', type=str,
+                    help='Write the timing, row counts and memory use of each phase to this JSON file.')
+
 parser.add_argument('infile', type=argparse.FileType('rb'),
                     help="Input RQDA file")
 parser.add_argument('outfilename', type=str, nargs='?',
@@ -66,12 +69,17 @@ tmpinfileptr.close()
 tmpoutfilename = tempfile.mktemp()
 
 if args.outfilename is None:
-    args.outfilename = args.infile.name.rsplit('.',1)[0] + '.rqda'
+    args.outfilename = args.infile.name.rsplit('.',1)[0] + '.norm'
+args.outfilename = os.path.basename(args.outfilename)
+
+# Start from an existing output file, so that its rows are merged with or overwritten
+if os.path.isfile(args.outfilename):
+    shutil.copyfile(args.outfilename, tmpoutfilename)
 
 args.indb  = 'sqlite:///' + tmpinfilename
 args.outdb = 'sqlite:///' + tmpoutfilename
 
 RQDA.RQDA2Norm(args)
 
-shutil.move(tmpoutfilename, os.path.basename(args.outfilename))
+shutil.move(tmpoutfilename, args.outfilename)
 os.remove(tmpinfilename)
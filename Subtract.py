@@ -9,6 +9,7 @@ import sys
 import os
 import argparse
 import uuid
+from blobTools import resolvedbblobs
 
 exec(open(os.path.dirname(os.path.realpath(__file__)) + os.path.sep + 'DataTypes.py').read())
 
@@ -38,13 +39,17 @@ try:
     else:
         ignorecols = []
 
+    # Objects and thumbnails are compared by content, whether or not either file keeps
+    # them in a blob store
     minuenddb = create_engine(args.minuend)
     minuendmd = MetaData()
     minuendmd.reflect(minuenddb)
+    resolvedbblobs(minuenddb, minuendmd)
 
     subtrahenddb = create_engine(args.subtrahend)
     subtrahendmd = MetaData()
     subtrahendmd.reflect(subtrahenddb)
+    resolvedbblobs(subtrahenddb, subtrahendmd)
 
     if args.difference != None:
         differencedb = create_engine(args.difference)
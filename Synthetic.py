@@ -0,0 +1,550 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import os
+import sys
+import uuid
+import random
+import itertools
+import zlib
+import zipfile
+from datetime import datetime, timedelta
+from cStringIO import StringIO
+from sqlalchemy import *
+from PIL import Image
+from NVivo import NVivo
+from nameCodec import encodename
+from offsetTools import SourceOffsets
+
+exec(open(os.path.dirname(os.path.realpath(__file__)) + os.path.sep + 'DataTypes.py').read())
+
+# Synthetic projects are written in chunks of this many rows
+CHUNKSIZE = 1000
+
+WORDS = [u'the', u'interview', u'participant', u'said', u'that', u'community', u'was',
+         u'important', u'and', u'we', u'discussed', u'their', u'experience', u'of',
+         u'health', u'services', u'in', u'a', u'rural', u'town', u'family', u'work',
+         u'school', u'often', u'felt', u'support', u'from', u'local', u'people', u'time']
+
+PROPERTIES = u'<Properties xmlns="http://qsr.com.au/XMLSchema.xsd">{}</Properties>'
+PROPERTY   = u'<Property Key="{}" Value="{}"/>'
+
+ODTMIMETYPE = 'application/vnd.oasis.opendocument.text'
+ODTCONTENT  = (u'<?xml version="1.0" encoding="UTF-8"?>'
+               u'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"'
+               u' xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" office:version="1.2">'
+               u'<office:body><office:text>{}</office:text></office:body></office:document-content>')
+ODTMANIFEST = (u'<?xml version="1.0" encoding="UTF-8"?>'
+               u'<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">'
+               u'<manifest:file-entry manifest:full-path="/" manifest:media-type="' + ODTMIMETYPE + u'"/>'
+               u'<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+               u'</manifest:manifest>')
+
+# A minimal ODT document holding the given paragraphs, as NVivo for Mac stores documents.
+# Entries are dated at the start of the synthetic year so that the same text always
+# gives the same object.
+def odt(paragraphs):
+    output = StringIO()
+    archive = zipfile.ZipFile(output, 'w')
+    for name, data, compression in [
+            ('mimetype',              ODTMIMETYPE, zipfile.ZIP_STORED),
+            ('content.xml',           ODTCONTENT.format(u''.join(u'<text:p>' + paragraph + u'</text:p>' for paragraph in paragraphs)).encode('utf-8'), zipfile.ZIP_DEFLATED),
+            ('META-INF/manifest.xml', ODTMANIFEST.encode('utf-8'), zipfile.ZIP_DEFLATED)]:
+        info = zipfile.ZipInfo(name, (2017, 1, 1, 0, 0, 0))
+        info.compress_type = compression
+        archive.writestr(info, data)
+    archive.close()
+    return output.getvalue()
+
+# Create the tables of an NVivo project that the NVivo module reads and writes, with
+# the columns that NVivo gives them, so that a SQLite file can stand in for a real
+# project. The computed End columns of references and annotations are left out.
+def createschema(nvivodb):
+    nvivomd = MetaData(bind=nvivodb)
+
+    def audit():
+        return [Column('CreatedBy',    UUID()),
+                Column('CreatedDate',  DateTime),
+                Column('ModifiedBy',   UUID()),
+                Column('ModifiedDate', DateTime)]
+
+    Table('UserProfile', nvivomd,
+        Column('Id',                 UUID(),         primary_key=True),
+        Column('Initials',           String(16)),
+        Column('Name',               String(256)),
+        Column('AccountName',        String(256)),
+        Column('ColorArgb',          Integer),
+        Column('ServerAccountId',    UUID()),
+        Column('Email',              String(256)),
+        Column('RevisionId',         Integer))
+    Table('Project', nvivomd,
+        Column('Id',                 UUID(),         primary_key=True),
+        Column('Title',              String(256)),
+        Column('Description',        String(2048)),
+        Column('ReadPassword',       String(256)),
+        Column('WritePassword',      String(256)),
+        Column('ReadPasswordHint',   String(256)),
+        Column('WritePasswordHint',  String(256)),
+        Column('Version',            String(16)),
+        Column('CasebookLayout',     Text),
+        Column('UnassignedLabel',    String(256)),
+        Column('NotApplicableLabel', String(256)),
+        Column('IndexLanguage',      Integer),
+        Column('EmbedSources',       Boolean),
+        Column('EmbeddedFileSizeLimitBytes', Integer),
+        Column('AllowGuestAccess',   Boolean),
+        Column('EventLogging',       Boolean),
+        Column('UserColors',         Boolean),
+        Column('StopWords',          Text),
+        *audit())
+    Table('Item', nvivomd,
+        Column('Id',                 UUID(),         primary_key=True),
+        Column('TypeId',             Integer),
+        Column('Name',               String(256)),
+        Column('Nickname',           String(256)),
+        Column('HierarchicalName',   String(2048)),
+        Column('Description',        String(512)),
+        Column('ColorArgb',          Integer),
+        Column('Aggregate',          Boolean),
+        Column('System',             Boolean),
+        Column('ReadOnly',           Boolean),
+        Column('InheritPermissions', Boolean),
+        Column('RevisionId',         Integer),
+        *audit())
+    Table('Role', nvivomd,
+        Column('Item1_Id',           UUID(),         primary_key=True),
+        Column('Item2_Id',           UUID(),         primary_key=True),
+        Column('TypeId',             Integer,        primary_key=True),
+        Column('Tag',                Integer))
+    Table('ExtendedItem', nvivomd,
+        Column('Item_Id',            UUID(),         primary_key=True),
+        Column('Properties',         Text))
+    Table('Category', nvivomd,
+        Column('Item_Id',            UUID(),         primary_key=True),
+        Column('Layout',             Text))
+    # Sources written by the NVivo module have no waveform, which NVivo stores as empty
+    Table('Source', nvivomd,
+        Column('Item_Id',            UUID(),         primary_key=True),
+        Column('TypeId',             Integer),
+        Column('Object',             LargeBinary),
+        Column('PlainText',          UnicodeText),
+        Column('LengthX',            Integer),
+        Column('LengthY',            Integer),
+        Column('LengthZ',            Integer),
+        Column('MetaData',           Text),
+        Column('Thumbnail',          LargeBinary),
+        Column('Waveform',           LargeBinary,    nullable=False, server_default=text("X''")),
+        Column('Properties',         Text),
+        Column('ContentSize',        Integer),
+        Column('ImportProperties',   Text))
+    Table('NodeReference', nvivomd,
+        Column('Id',                 UUID(),         primary_key=True),
+        Column('Source_Item_Id',     UUID()),
+        Column('Node_Item_Id',       UUID()),
+        Column('CompoundSourceRegion_Id', UUID()),
+        Column('ReferenceTypeId',    Integer),
+        Column('StartX',             Integer),
+        Column('LengthX',            Integer),
+        Column('StartY',             Integer),
+        Column('LengthY',            Integer),
+        Column('StartZ',             Integer),
+        Column('StartText',          Integer),
+        Column('LengthText',         Integer),
+        Column('ClusterId',          Integer),
+        Column('OfX',                Integer),
+        Column('RevisionId',         Integer),
+        *audit())
+    Table('Annotation', nvivomd,
+        Column('Id',                 UUID(),         primary_key=True),
+        Column('Item_Id',            UUID()),
+        Column('CompoundSourceRegion_Id', UUID()),
+        Column('Text',               String(1024)),
+        Column('ReferenceTypeId',    Integer),
+        Column('StartX',             Integer),
+        Column('LengthX',            Integer),
+        Column('StartY',             Integer),
+        Column('LengthY',            Integer),
+        Column('StartZ',             Integer),
+        Column('StartText',          Integer),
+        Column('LengthText',         Integer),
+        Column('RevisionId',         Integer),
+        *audit())
+
+    nvivomd.create_all()
+    return nvivomd
+
+# Generate an NVivo-shaped SQLite project. The same arguments and seed always produce
+# the same project, so that benchmarks can be compared from one run to the next. With
+# args.windows names are coded as NVivo for Windows codes them, and with args.mac items
+# have hierarchical names, text positions are counted as NVivo for Mac counts them and
+# documents are ODT.
+def Generate(args):
+    # Initialise DB variables so exception handlers don't freak out
+    nvivodb = None
+    nvivotr = None
+
+    try:
+        rng = random.Random(getattr(args, 'seed', None) or 0)
+
+        def newid():
+            return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+        nvivodb = create_engine(args.outdb)
+        nvivomd = createschema(nvivodb)
+        nvivoUserProfile   = nvivomd.tables['UserProfile']
+        nvivoProject       = nvivomd.tables['Project']
+        nvivoItem          = nvivomd.tables['Item']
+        nvivoRole          = nvivomd.tables['Role']
+        nvivoExtendedItem  = nvivomd.tables['ExtendedItem']
+        nvivoCategory      = nvivomd.tables['Category']
+        nvivoSource        = nvivomd.tables['Source']
+        nvivoNodeReference = nvivomd.tables['NodeReference']
+        nvivoAnnotation    = nvivomd.tables['Annotation']
+
+        nvivocon = nvivodb.connect()
+        nvivotr = nvivocon.begin()
+
+        def insert(table, rows):
+            for start in range(0, len(rows), CHUNKSIZE):
+                nvivocon.execute(table.insert(), rows[start:start + CHUNKSIZE])
+
+        userid = newid()
+        basedate = datetime(2017, 1, 1)
+        def audit():
+            date = basedate + timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+            return {'CreatedBy':    userid,
+                    'CreatedDate':  date,
+                    'ModifiedBy':   userid,
+                    'ModifiedDate': date}
+
+        # NVivo numbers every change to items, references and annotations
+        revisions = itertools.count(1)
+
+        def coded(text):
+            return encodename(text) if args.windows else text
+
+        def item(itemtype, name, hierarchicalname=None, **values):
+            row = audit()
+            row.update({'Id':                 newid(),
+                        'TypeId':             int(itemtype),
+                        'Name':               coded(name),
+                        'HierarchicalName':   (hierarchicalname or name) if args.mac else None,
+                        'Description':        u'',
+                        'ColorArgb':          0,
+                        'Aggregate':          False,
+                        'System':             False,
+                        'ReadOnly':           False,
+                        'InheritPermissions': True,
+                        'RevisionId':         next(revisions)})
+            row.update(values)
+            return row
+
+        def role(item1, item2, roletype, tag=None):
+            return {'Item1_Id': item1, 'Item2_Id': item2, 'TypeId': int(roletype), 'Tag': tag}
+
+        nvivocon.execute(nvivoUserProfile.insert(), {'Id':          userid,
+                                                     'Initials':    u'SU',
+                                                     'Name':        u'Synthetic User',
+                                                     'AccountName': u'synthetic',
+                                                     'ColorArgb':   0,
+                                                     'RevisionId':  next(revisions)})
+        nvivocon.execute(nvivoProject.insert(), dict(audit(),
+                Id=newid(),
+                Title=coded(u'Synthetic project'),
+                Description=coded(u'Generated by NVivotools for benchmarking'),
+                Version=u'11.0' if args.nvivoversion == '11' else u'10.0',
+                UnassignedLabel=u'Unassigned',
+                NotApplicableLabel=u'Not Applicable',
+                EmbedSources=True,
+                AllowGuestAccess=False,
+                EventLogging=False,
+                UserColors=False))
+
+# System folders that the NVivo module looks up when denormalising
+        headcategoryname = u'Case Classifications' if args.nvivoversion == '11' else u'Node Classifications'
+        folders = [item(NVivo.ItemType.Folder, name, System=True)
+                   for name in [u'Nodes', u'Internals', headcategoryname, u'Source Classifications']]
+        headnode, headsource, headnodecategory, headsourcecategory = [folder['Id'] for folder in folders]
+        insert(nvivoItem, folders)
+
+        if getattr(args, 'empty', False):
+            nvivotr.commit()
+            nvivotr = None
+            nvivocon.close()
+            nvivodb.dispose()
+            return
+
+        items = []
+        roles = []
+        extendeditems = []
+
+# Categories
+        def categories(itemtype, headcategory, headcategoryname, name, count):
+            result = []
+            for index in range(count):
+                categoryname = name + u' ' + unicode(index)
+                category = item(itemtype, categoryname, headcategoryname + u'\\\\' + categoryname)
+                items.append(category)
+                roles.append(role(headcategory, category['Id'], NVivo.RoleType.NodeMember))
+                extendeditems.append({'Item_Id': category['Id'],
+                                      'Properties': PROPERTIES.format(PROPERTY.format('EndNoteReferenceType', '-1'))})
+                result.append(category)
+            # Layouts are left empty, as the NVivo module rebuilds them when denormalising
+            insert(nvivoCategory, [{'Item_Id': category['Id'], 'Layout': u''} for category in result])
+            return result
+
+        nodecategories   = categories(NVivo.ItemType.NodeClassification,   headnodecategory,   headcategoryname,          u'Node category',   args.node_category_count)
+        sourcecategories = categories(NVivo.ItemType.SourceClassification, headsourcecategory, u'Source Classifications', u'Source category', args.source_category_count)
+
+# Attributes, alternately text and integer, each with the default values and then
+# the given number of other values.
+        def attributes(name, count, categories):
+            result = []
+            for index in range(count):
+                datatype = index % 2
+                attributename = name + u' ' + unicode(index)
+                attribute = item(NVivo.ItemType.AttributeName, attributename,
+                                 (categories[0]['HierarchicalName'] + u':' + attributename) if categories and args.mac else None)
+                items.append(attribute)
+                extendeditems.append({'Item_Id': attribute['Id'],
+                                      'Properties': PROPERTIES.format(PROPERTY.format('DataType', datatype) +
+                                                                      PROPERTY.format('Length', 0) +
+                                                                      PROPERTY.format('EndNoteFieldTypeId', -1))})
+                for tag, category in enumerate(categories):
+                    roles.append(role(attribute['Id'], category['Id'], NVivo.RoleType.AttributeClassification, tag))
+
+                valueids = []
+                valuenames = [u'Unassigned', u'Not Applicable'] + [
+                              (u'Value ' + unicode(value)) if datatype == 0 else unicode(value)
+                              for value in range(args.value_count)]
+                for tag, valuename in enumerate(valuenames):
+                    value = item(NVivo.ItemType.AttributeValue, valuename,
+                                 (attribute['HierarchicalName'] + u'\\' + valuename) if args.mac else None,
+                                 System=(tag < 2))
+                    items.append(value)
+                    roles.append(role(attribute['Id'], value['Id'], NVivo.RoleType.AttributeValue, tag))
+                    extendeditems.append({'Item_Id': value['Id'],
+                                          'Properties': PROPERTIES.format(PROPERTY.format('IsDefault', tag == 0))})
+                    valueids.append(value['Id'])
+
+                result.append(valueids[2:])
+            return result
+
+        nodeattributes   = attributes(u'Node attribute',   args.node_attribute_count,   nodecategories)
+        sourceattributes = attributes(u'Source attribute', args.source_attribute_count, sourcecategories)
+
+        def values(itemid, attributevalues):
+            for valueids in attributevalues:
+                if valueids:
+                    roles.append(role(itemid, rng.choice(valueids), NVivo.RoleType.ItemValue))
+
+# Nodes, as a tree no deeper than the given depth. Nodes are numbered breadth first,
+# so that node i has parent (i // branching) - 1.
+        if args.verbosity > 0:
+            print("Generating nodes", file=sys.stderr)
+
+        depth = max(args.depth, 1)
+        branching = 1
+        while sum(branching ** level for level in range(1, depth + 1)) < args.node_count:
+            branching += 1
+
+        nodes = []
+        nodetags = {}
+        for index in range(args.node_count):
+            parent = nodes[index // branching - 1] if index >= branching else None
+            nodename = u'Node ' + unicode(index)
+            node = item(NVivo.ItemType.Node, nodename,
+                        (u'Nodes\\\\' + nodename if parent is None else parent['HierarchicalName'] + u'\\' + nodename) if args.mac else None,
+                        Aggregate=(rng.random() < 0.2),
+                        ColorArgb=rng.choice([0, -16776961, -65536, -16744448]))
+            node['Parent']    = parent
+            node['TopParent'] = node['Id'] if parent is None else parent['TopParent']
+            node['Depth']     = 0 if parent is None else parent['Depth'] + 1
+            nodes.append(node)
+
+            # Roles as laid out in 'NVivo database structure notes.txt'
+            tag = nodetags.get((node['TopParent'], node['Depth']), node['Depth'] << 16)
+            nodetags[(node['TopParent'], node['Depth'])] = tag + 1
+            roles.append(role(headnode, node['Id'], NVivo.RoleType.NodeMember))
+            roles.append(role(node['TopParent'], node['Id'], NVivo.RoleType.NodeIndex, tag))
+            roles.append(role(node['Id'], node['Id'], NVivo.RoleType.NodeAggregate))
+            if parent is not None:
+                roles.append(role(parent['Id'], node['Id'], NVivo.RoleType.ParentItem))
+                if parent['Aggregate']:
+                    roles.append(role(parent['Id'], node['Id'], NVivo.RoleType.NodeAggregate))
+            if nodecategories:
+                roles.append(role(node['Id'], nodecategories[index % len(nodecategories)]['Id'], NVivo.RoleType.ItemCategory))
+                values(node['Id'], nodeattributes)
+
+        items += nodes
+        insert(nvivoItem, items)
+        insert(nvivoRole, roles)
+        insert(nvivoExtendedItem, extendeditems)
+        nodeids = [node['Id'] for node in nodes]
+
+# Sources, written a chunk at a time so that their objects are never all in memory
+        if args.verbosity > 0:
+            print("Generating sources", file=sys.stderr)
+
+        def paragraphs():
+            text = []
+            length = 0
+            while length < args.text_length:
+                sentence = u' '.join(rng.choice(WORDS) for word in range(rng.randint(5, 20)))
+                paragraph = sentence[0].upper() + sentence[1:] + u'.'
+                text.append(paragraph)
+                length += len(paragraph) + 2
+            return text
+
+        def jpeg(size):
+            image = Image.new('RGB', size, (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+            output = StringIO()
+            image.save(output, 'JPEG')
+            return output.getvalue()
+
+        sourcelengths = []
+        sourceoffsets = {}
+        for start in range(0, args.source_count, CHUNKSIZE):
+            items = []
+            roles = []
+            sources = []
+            for index in range(start, min(start + CHUNKSIZE, args.source_count)):
+                if args.object_type == 'JPEG':
+                    size = (rng.randint(320, 1024), rng.randint(240, 768))
+                    source = {'TypeId':     8,
+                              'Object':     jpeg(size),
+                              'PlainText':  None,
+                              'LengthX':    size[0],
+                              'LengthY':    size[1],
+                              'MetaData':   None,
+                              'Thumbnail':  jpeg((size[0] // 8, size[1] // 8)),
+                              'Waveform':   b'',
+                              'Properties': PROPERTIES.format(u'')}
+                    sourcetype = NVivo.SourceType.JPEG
+                elif args.mac:
+                    text = paragraphs()
+                    plaintext = u'\n'.join(text)
+                    source = {'TypeId':     0,
+                              'Object':     odt(text),
+                              'PlainText':  plaintext,
+                              'LengthX':    len(plaintext.replace(u' ', u'')),
+                              'LengthY':    0,
+                              'MetaData':   None,
+                              'Thumbnail':  None,
+                              'Waveform':   b'',
+                              'Properties': None}
+                    size = (len(plaintext), None)
+                    sourcetype = NVivo.SourceType.Doc
+                else:
+                    text = paragraphs()
+                    plaintext = u'\r\n'.join(text)
+                    metadata = u'<Paragraphs xmlns="http://qsr.com.au/XMLSchema.xsd">'
+                    pos = 0
+                    for paragraph in text:
+                        metadata += u'<Para Pos="{}" Len="{}" Style=""/>'.format(pos, len(paragraph) + 1)
+                        pos += len(paragraph) + 1
+                    metadata += u'</Paragraphs>'
+                    # NVivo stores documents deflated without a zlib header
+                    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+                    source = {'TypeId':     0,
+                              'Object':     compressor.compress(plaintext.encode('utf-8')) + compressor.flush(),
+                              'PlainText':  plaintext,
+                              'LengthX':    len(plaintext.replace(u' ', u'')),
+                              'LengthY':    0,
+                              'MetaData':   metadata,
+                              'Thumbnail':  None,
+                              'Waveform':   b'',
+                              'Properties': None}
+                    size = (len(plaintext), None)
+                    sourcetype = NVivo.SourceType.Doc
+
+                sourcename = u'Source ' + unicode(index)
+                sourceitem = item(sourcetype, sourcename, u'Internals\\\\' + sourcename)
+                source['Item_Id'] = sourceitem['Id']
+                items.append(sourceitem)
+                sources.append(source)
+                sourcelengths.append((sourceitem['Id'], size))
+                # Text positions on Mac are counted from the text of the source
+                if args.mac:
+                    sourceoffsets[sourceitem['Id']] = SourceOffsets(source['PlainText'])
+                roles.append(role(headsource, sourceitem['Id'], NVivo.RoleType.NodeMember))
+                if sourcecategories:
+                    roles.append(role(sourceitem['Id'], sourcecategories[index % len(sourcecategories)]['Id'], NVivo.RoleType.ItemCategory))
+                    values(sourceitem['Id'], sourceattributes)
+
+            insert(nvivoItem, items)
+            insert(nvivoSource, sources)
+            insert(nvivoRole, roles)
+
+# Taggings and annotations, as text ranges of documents or regions of images
+        if args.verbosity > 0:
+            print("Generating taggings and annotations", file=sys.stderr)
+
+        def region(sourceid, size):
+            startx = rng.randint(0, max(size[0] - 1, 0))
+            lengthx = rng.randint(1, max(min(size[0] - startx, 200), 1))
+            if size[1] is None:
+                result = {'ReferenceTypeId': 0, 'StartX': startx, 'LengthX': lengthx, 'StartY': None, 'LengthY': None}
+            else:
+                starty = rng.randint(0, size[1] - 1)
+                lengthy = rng.randint(1, min(size[1] - starty, 200))
+                result = {'ReferenceTypeId': 2, 'StartX': startx, 'LengthX': lengthx, 'StartY': starty, 'LengthY': lengthy}
+            if args.mac:
+                offsets = sourceoffsets[sourceid]
+                result['StartText'], result['LengthText'] = offsets.toMac(startx, lengthx)
+            return result
+
+        if sourcelengths and nodeids:
+            for start in range(0, args.tagging_count, CHUNKSIZE):
+                taggings = []
+                for index in range(start, min(start + CHUNKSIZE, args.tagging_count)):
+                    sourceid, size = rng.choice(sourcelengths)
+                    tagging = dict(audit(), **region(sourceid, size))
+                    tagging.update({'Id':             newid(),
+                                    'Source_Item_Id': sourceid,
+                                    'Node_Item_Id':   rng.choice(nodeids),
+                                    'StartZ':         None,
+                                    'RevisionId':     next(revisions)})
+                    taggings.append(tagging)
+                insert(nvivoNodeReference, taggings)
+
+        if sourcelengths:
+            for start in range(0, args.annotation_count, CHUNKSIZE):
+                annotations = []
+                for index in range(start, min(start + CHUNKSIZE, args.annotation_count)):
+                    sourceid, size = rng.choice(sourcelengths)
+                    annotation = dict(audit(), **region(sourceid, size))
+                    annotation.update({'Id':         newid(),
+                                       'Item_Id':    sourceid,
+                                       'Text':       u'Annotation ' + unicode(index),
+                                       'RevisionId': next(revisions)})
+                    annotations.append(annotation)
+                insert(nvivoAnnotation, annotations)
+
+# All done.
+        nvivotr.commit()
+        nvivotr = None
+        nvivocon.close()
+        nvivodb.dispose()
+
+    except:
+        raise
+        if not nvivotr is None:
+            nvivotr.rollback()
+        nvivodb.dispose()
@@ -9,6 +9,8 @@ import sys
 import os
 import argparse
 import uuid
+from nameCodec import decodenames, encodenames
+from mergeTools import executemany
 
 exec(open(os.path.dirname(os.path.realpath(__file__)) + os.path.sep + 'DataTypes.py').read())
 
@@ -27,9 +29,9 @@ try:
     nvivomd.reflect(nvivodb)
 
     if args.reverse:
-        charoffset = +0x377
+        translatenames = encodenames
     else:
-        charoffset = -0x377
+        translatenames = decodenames
 
     nvivoProject = nvivomd.tables.get('Project')
     projectSel = select([
@@ -42,10 +44,8 @@ try:
                 .where(nvivoProject.c.Id == bindparam('b_Id')) \
                 .values(Title = bindparam('Title')) \
                 .values(Description = bindparam('Description'))
-    for project in projectRows:
-        project['Title']       = u''.join(map(lambda ch: unichr(ord(ch) + charoffset), project['Title']))
-        project['Description'] = u''.join(map(lambda ch: unichr(ord(ch) + charoffset), project['Description']))
-        nvivodb.execute(updateSql, project)
+    translatenames(projectRows, ['Title', 'Description'])
+    executemany(nvivodb, updateSql, projectRows)
 
     nvivoItem = nvivomd.tables.get('Item')
     itemSel = select([
@@ -58,10 +58,8 @@ try:
                 .where(nvivoItem.c.Id == bindparam('b_Id')) \
                 .values(Name = bindparam('Name')) \
                 .values(Description = bindparam('Description'))
-    for item in itemRows:
-        item['Name']       = u''.join(map(lambda ch: unichr(ord(ch) + charoffset), item['Name']))
-        item['Description'] = u''.join(map(lambda ch: unichr(ord(ch) + charoffset), item['Description']))
-        nvivodb.execute(updateSql, item)
+    translatenames(itemRows, ['Name', 'Description'])
+    executemany(nvivodb, updateSql, itemRows)
 
 except exc.SQLAlchemyError:
     raise
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+
+# Registry of attribute records (dictionaries), indexed by Id and by category and name.
+# Attributes are only indexed by name if they have a 'Category' key, which may be None
+# where attribute names are global, as in RQDA.
+class AttributeRegistry(object):
+    def __init__(self, attributes=None, typekeys=('Type', 'Length')):
+        self.typekeys   = typekeys
+        self.attributes = []
+        self.byid       = {}
+        self.byname     = {}
+        for attribute in attributes or []:
+            self.add(attribute)
+
+    def __len__(self):
+        return len(self.attributes)
+
+    def __iter__(self):
+        return iter(self.attributes)
+
+    def get(self, id):
+        return self.byid.get(id)
+
+    def lookup(self, category, name):
+        return self.byname.get((category, name))
+
+    # Return the registered attribute with the same Id, or failing that the same category
+    # and name, as the given attribute.
+    def find(self, attribute):
+        existing = None
+        if attribute.get('Id') is not None:
+            existing = self.byid.get(attribute['Id'])
+        if existing is None and 'Category' in attribute:
+            existing = self.byname.get((attribute['Category'], attribute['Name']))
+        return existing
+
+    def conflicts(self, existing, attribute):
+        return any(existing.get(key) != attribute.get(key) for key in self.typekeys)
+
+    # Register an attribute, or return the matching attribute if one is already
+    # registered. Raises RuntimeError if the two differ in type or length.
+    def add(self, attribute):
+        existing = self.find(attribute)
+        if existing is not None:
+            if self.conflicts(existing, attribute):
+                raise RuntimeError("ERROR: Attribute " + attribute.get('PlainTextName', attribute['Name']) + " is multiply defined with different type or length.")
+            return existing
+
+        self.attributes.append(attribute)
+        if attribute.get('Id') is not None:
+            self.byid[attribute['Id']] = attribute
+        if 'Category' in attribute:
+            self.byname[(attribute['Category'], attribute['Name'])] = attribute
+        return attribute
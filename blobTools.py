@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import os
+import hashlib
+import mmap
+import tempfile
+from sqlalchemy import TypeDecorator, LargeBinary
+
+# A blob store keeps the objects and thumbnails of a normalised file in a directory
+# beside it, one file per SHA-256 digest, so that identical objects are stored once.
+# The Source row holds a reference to the blob in place of the data itself.
+BLOBPREFIX = 'sha256:'
+BLOBREFLENGTH = len(BLOBPREFIX) + 64
+
+# Columns of the Source table that may hold references
+BLOBCOLUMNS = ['Object', 'Thumbnail']
+
+def blobdirectory(normpath):
+    return os.path.splitext(normpath)[0] + '.blobs'
+
+def isblobref(value):
+    return isinstance(value, str) and len(value) == BLOBREFLENGTH and value.startswith(BLOBPREFIX)
+
+# Return the blob store of a normalised file, or None if it doesn't have one
+def openblobstore(normpath):
+    directory = blobdirectory(normpath)
+    return BlobStore(directory) if os.path.isdir(directory) else None
+
+class BlobStore(object):
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def blobpath(self, ref):
+        digest = ref[len(BLOBPREFIX):]
+        return os.path.join(self.directory, digest[0:2], digest[2:])
+
+    # Store data, returning its reference. Values that are None or already references
+    # are returned unchanged.
+    def put(self, data):
+        if data is None or isblobref(data):
+            return data
+
+        data = bytes(data)
+        ref = BLOBPREFIX + hashlib.sha256(data).hexdigest()
+        path = self.blobpath(ref)
+        if not os.path.exists(path):
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            # Write to a temporary file first so that a blob is never seen half written
+            tmpfd, tmppath = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(tmpfd, 'wb') as tmpfile:
+                tmpfile.write(data)
+            if os.path.exists(path):
+                os.remove(tmppath)
+            else:
+                os.rename(tmppath, path)
+
+        return ref
+
+    # Return the data for a reference as a read-only memory map, which can be sliced or
+    # written to a file without being copied. Other values are returned unchanged.
+    def open(self, value):
+        if not isblobref(value):
+            return value
+
+        path = self.blobpath(value)
+        if not os.path.exists(path):
+            raise RuntimeError("ERROR: Blob " + value + " is missing from blob store " + self.directory)
+        if os.path.getsize(path) == 0:
+            return ''
+        with open(path, 'rb') as blobfile:
+            return mmap.mmap(blobfile.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # As open, but returning a string
+    def read(self, value):
+        data = self.open(value)
+        return data[:] if isinstance(data, mmap.mmap) else data
+
+    # References of every blob in the store
+    def refs(self):
+        for subdirectory in os.listdir(self.directory):
+            if os.path.isdir(os.path.join(self.directory, subdirectory)):
+                for filename in os.listdir(os.path.join(self.directory, subdirectory)):
+                    if len(subdirectory + filename) == 64:
+                        yield BLOBPREFIX + subdirectory + filename
+
+    def remove(self, ref):
+        os.remove(self.blobpath(ref))
+
+# Column type that resolves blob references as they are read, so that a normalised file
+# with a blob store reads like one without. Unless the column is read-only, data written
+# is also put in the store and only its reference is kept in the row.
+class BlobData(TypeDecorator):
+    impl = LargeBinary
+
+    def __init__(self, store, readonly=False):
+        TypeDecorator.__init__(self)
+        self.store    = store
+        self.readonly = readonly
+
+    def process_bind_param(self, value, dialect):
+        return value if self.readonly else self.store.put(value)
+
+    def process_result_value(self, value, dialect):
+        return self.store.read(value)
+
+# Resolve blob references in the Source table of a normalised file, if it has a store
+def resolveblobs(table, store, readonly=False):
+    if store is not None:
+        for column in BLOBCOLUMNS:
+            if column in table.c:
+                table.c[column].type = BlobData(store, readonly)
+
+# As resolveblobs, for a database opened directly rather than through NVivoNorm. Data
+# read is left to be written inline elsewhere, so the store is only read. Only SQLite
+# files can have a store beside them.
+def resolvedbblobs(db, md):
+    if db.dialect.name == 'sqlite' and db.url.database and 'Source' in md.tables:
+        resolveblobs(md.tables['Source'], openblobstore(db.url.database), readonly=True)
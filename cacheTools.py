@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+from blobTools import BLOBPREFIX, isblobref
+import os
+import hashlib
+import tempfile
+import threading
+import cPickle
+import mmap
+
+# Change this whenever the way sources are converted changes, so that conversions made
+# by earlier versions are no longer found.
+CACHEVERSION = '2'
+
+# A conversion cache keeps the results of converting sources in a directory, one file
+# per key, so that sources that have not changed need not be converted again. Keys are
+# digests of everything that the conversion depends on. Entries are touched whenever
+# they are used, and once the cache grows beyond its maximum size the least recently
+# used are removed.
+class ConversionCache(object):
+    def __init__(self, directory, maxbytes=None):
+        self.directory = directory
+        self.maxbytes  = maxbytes
+        self.size      = None
+        self.lock      = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    # Digest of a value, or a blob reference's own digest. Data is digested just as the
+    # blob store does, so that an object has the same key in or out of the blob store.
+    @staticmethod
+    def digest(value):
+        if value is None:
+            return 'None'
+        if isblobref(value):
+            return value
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+        elif not isinstance(value, (str, buffer, mmap.mmap)):
+            value = str(value)
+        return BLOBPREFIX + hashlib.sha256(value).hexdigest()
+
+    def key(self, *values):
+        return hashlib.sha256(' '.join([CACHEVERSION] + [self.digest(value) for value in values])).hexdigest()
+
+    def entrypath(self, key):
+        return os.path.join(self.directory, key[0:2], key[2:])
+
+    def __contains__(self, key):
+        return os.path.exists(self.entrypath(key))
+
+    # Dictionary of converted values, or None if there is no such entry
+    def get(self, key):
+        path = self.entrypath(key)
+        try:
+            with open(path, 'rb') as entryfile:
+                values = cPickle.load(entryfile)
+            os.utime(path, None)
+        except Exception:
+            # Entries that are missing or can't be read are treated alike
+            return None
+
+        return values
+
+    def put(self, key, values):
+        path = self.entrypath(key)
+        if not os.path.isdir(os.path.dirname(path)):
+            try:
+                os.makedirs(os.path.dirname(path))
+            except OSError:
+                if not os.path.isdir(os.path.dirname(path)):
+                    raise
+
+        # Write to a temporary file first so that an entry is never seen half written
+        tmpfd, tmppath = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(tmpfd, 'wb') as tmpfile:
+            cPickle.dump(values, tmpfile, cPickle.HIGHEST_PROTOCOL)
+        replaced = os.path.getsize(path) if os.path.exists(path) else 0
+        os.rename(tmppath, path)
+
+        if self.maxbytes is not None:
+            with self.lock:
+                if self.size is None:
+                    self.size = sum(size for key, size, lastused in self.entries())
+                else:
+                    self.size += os.path.getsize(path) - replaced
+                if self.size > self.maxbytes:
+                    self.size -= self.prune(self.maxbytes)[1]
+
+    # Key, size and time of last use of every entry
+    def entries(self):
+        for subdirectory in os.listdir(self.directory):
+            if os.path.isdir(os.path.join(self.directory, subdirectory)) and len(subdirectory) == 2:
+                for filename in os.listdir(os.path.join(self.directory, subdirectory)):
+                    if len(subdirectory + filename) == 64:
+                        try:
+                            status = os.stat(os.path.join(self.directory, subdirectory, filename))
+                        except OSError:
+                            continue
+                        yield subdirectory + filename, status.st_size, status.st_mtime
+
+    def remove(self, key):
+        try:
+            os.remove(self.entrypath(key))
+        except OSError:
+            pass
+
+    # Remove the least recently used entries until the cache is no larger than the given
+    # size, returning the number of entries and bytes removed
+    def prune(self, maxbytes=0):
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        removed = 0
+        removedbytes = 0
+        for key, entrysize, lastused in entries:
+            if size <= maxbytes:
+                break
+            self.remove(key)
+            size -= entrysize
+            removed += 1
+            removedbytes += entrysize
+
+        return removed, removedbytes
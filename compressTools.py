@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+from multiprocessing.pool import ThreadPool
+import multiprocessing
+import zlib
+
+# NVivo for Windows stores documents deflated without a zlib header, at this level
+# unless asked otherwise.
+COMPRESSIONLEVEL = 6
+
+# Number of objects given to a worker thread at a time
+BATCHSIZE = 4
+
+# Signature of an OLE2 compound document, that is an uncompressed DOC
+OLE2SIGNATURE = '\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+def deflate(data, level=COMPRESSIONLEVEL):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+# Whether data could be deflated, judging by its first bytes. A deflate stream can't
+# begin with a block of the reserved type 3, nor with the signature of a compound
+# document, so objects like these need not be inflated to find out.
+def maybedeflated(data):
+    if not data or (ord(data[0]) >> 1) & 3 == 3:
+        return False
+    return data[0:8] != OLE2SIGNATURE
+
+# Inflated data, or the data unchanged if it isn't deflated
+def inflate(data):
+    if maybedeflated(data):
+        try:
+            return zlib.decompress(data, -15)
+        except Exception:
+            pass
+    return data
+
+# Deflate or inflate objects in batches on a pool of worker threads. zlib releases the
+# interpreter lock while it works, so the threads run alongside each other and alongside
+# whatever else the main thread is doing, such as writing to a database.
+class Compressor(object):
+    def __init__(self, workers=None, level=None):
+        self.workers = workers if workers is not None else multiprocessing.cpu_count()
+        self.level   = level if level is not None else COMPRESSIONLEVEL
+        self.pool    = None
+
+    def map(self, function, objects):
+        if self.workers <= 1 or len(objects) <= 1:
+            return [function(data) for data in objects]
+
+        if self.pool is None:
+            self.pool = ThreadPool(self.workers)
+        return self.pool.map(function, objects, chunksize=BATCHSIZE)
+
+    def deflate(self, objects):
+        return self.map(lambda data: deflate(data, self.level), objects)
+
+    def inflate(self, objects):
+        return self.map(inflate, objects)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
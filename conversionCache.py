@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import os
+import sys
+import argparse
+from datetime import datetime
+from cacheTools import ConversionCache
+
+def conversionCache(arglist):
+
+    parser = argparse.ArgumentParser(description='Show or prune the conversion cache used when denormalising sources.')
+
+    parser.add_argument('-v', '--verbosity',  type=int, default=1)
+
+    parser.add_argument('-p', '--prune', type=float,
+                        help='Remove the least recently used conversions until the cache is no larger than this many megabytes.')
+    parser.add_argument('-c', '--clear', action='store_true',
+                        help='Remove every conversion from the cache.')
+
+    parser.add_argument('cacheDirectory', type=str)
+
+    args = parser.parse_args(arglist)
+
+    if not os.path.isdir(args.cacheDirectory):
+        raise RuntimeError("ERROR: Conversion cache " + args.cacheDirectory + " does not exist.")
+
+    cache = ConversionCache(args.cacheDirectory)
+
+    if args.clear or args.prune is not None:
+        removed, removedbytes = cache.prune(0 if args.clear else int(args.prune * 1048576))
+        if args.verbosity > 0:
+            print("Removed " + str(removed) + " conversion(s), " + '{:.1f}'.format(removedbytes / 1048576.0) + " MB.", file=sys.stderr)
+
+    entries = sorted(cache.entries(), key=lambda entry: entry[2])
+    if args.verbosity > 1:
+        for key, size, lastused in entries:
+            print(key + " " + '{:10d}'.format(size) + " " + datetime.fromtimestamp(lastused).isoformat(' '))
+
+    if args.verbosity > 0:
+        print(str(len(entries)) + " conversion(s), " + '{:.1f}'.format(sum(entry[1] for entry in entries) / 1048576.0) + " MB.")
+        if entries:
+            print("Least recently used " + datetime.fromtimestamp(entries[0][2]).isoformat(' ') +
+                  ", most recently used " + datetime.fromtimestamp(entries[-1][2]).isoformat(' ') + ".")
+
+if __name__ == '__main__':
+    conversionCache(None)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+from dateutil import parser as dateparser
+from datetime import datetime
+import re
+
+# Timestamp format returned as text by SQL Anywhere, eg 2017-03-14 09:26:53.123000
+TIMESTAMP = re.compile(r'(\d{4})-(\d\d)-(\d\d)[ T](\d\d):(\d\d):(\d\d)(?:\.(\d{1,6}))?$')
+
+# Convert a date/time string to a datetime. Values that are already datetimes, and None,
+# are returned unchanged. Strings in other formats, such as RQDA dates, are left to the
+# slower dateparser.
+def parsedatetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+
+    match = TIMESTAMP.match(value)
+    if match:
+        fraction = match.group(7)
+        return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)),
+                        int(match.group(4)), int(match.group(5)), int(match.group(6)),
+                        int(fraction.ljust(6, '0')) if fraction else 0)
+
+    return dateparser.parse(value)
@@ -20,6 +20,7 @@ import os
 import sys
 import argparse
 from NVivoNorm import NVivoNorm
+from nodeTools import NodeTree
 import unicodecsv
 from sqlalchemy import *
 import re
@@ -101,6 +102,13 @@ def editNodes(arglist):
 
         datetimeNow = datetime.utcnow()
 
+        # Tree of existing nodes, so nodes and parents are found by name without a query for each
+        nodeTree = NodeTree([dict(row) for row in norm.con.execute(select([
+                norm.Node.c.Id,
+                norm.Node.c.Name,
+                norm.Node.c.Parent
+            ]))])
+
         if args.user:
             user = norm.con.execute(select([
                     norm.User.c.Id
@@ -266,6 +274,7 @@ def editNodes(arglist):
         rowNum = 0
         nodesToInsert      = []
         nodeValuesToInsert = []
+        insertedNodeIds    = {}
         for nodeRow in nodeRows:
             rowNum += 1
 
@@ -297,17 +306,9 @@ def editNodes(arglist):
             parentName = nodeRow.get('Parent')
             parentId = None
             if (parentName or '') != '':
-                parentIdList = [nodeToInsert['Id'] for nodeToInsert in nodesToInsert if nodeToInsert['Name'] == parentName]
-                if parentIdList:
-                    parentId = parentIdList[0]
-                else:
-                    parent = norm.con.execute(select([
-                            norm.Node.c.Id
-                        ]).where(
-                            norm.Node.c.Name == bindparam('Name')
-                        ), {
-                            'Name': parentName
-                        }).first()
+                parentId = insertedNodeIds.get(parentName)
+                if parentId is None:
+                    parent = nodeTree.find(parentName)
 
                     if parent is not None:
                         parentId = parent['Id']
@@ -322,19 +323,20 @@ def editNodes(arglist):
                             'ModifiedBy':   userId,
                             'ModifiedDate': datetimeNow
                         })
+                        nodeTree.add({
+                            'Id':     parentId,
+                            'Name':   parentName,
+                            'Parent': None
+                        })
 
             nodeName        = nodeRow.get('Name')        or str(rowNum)
             nodeDescription = nodeRow.get('Description')
             nodeAggregate   = nodeRow.get('Aggregate')
 
-            node = norm.con.execute(select([
-                        norm.Node.c.Id
-                    ]).where(
-                        norm.Node.c.Name == bindparam('Name')
-                    ), {
-                        'Name': nodeName
-                    }).first()
+            node = nodeTree.find(nodeName)
             nodeId = node['Id'] if node else uuid.uuid4()
+            if node is not None and parentId is not None and (parentId == nodeId or nodeId in nodeTree.ancestors(parentId)):
+                raise RuntimeError("Node '" + nodeName + "' cannot be moved below itself")
 
             nodeValues = []
             for attributeName, attributeNode in nodeAttributes.iteritems():
@@ -395,11 +397,14 @@ def editNodes(arglist):
                     'CreatedDate':  datetimeNow,
                 })
                 nodesToInsert.append(normNodeRow)
+                insertedNodeIds.setdefault(nodeName, nodeId)
                 nodeValuesToInsert += nodeValues
             else:
                 norm.con.execute(norm.Node.update(
                         norm.Node.c.Id == bindparam('_Id')),
                         normNodeRow)
+                if node['Parent'] != parentId:
+                    nodeTree.setparent(nodeId, parentId)
                 for nodeValue in nodeValues:
                     norm.con.execute(norm.NodeValue.delete(and_(
                         norm.NodeValue.c.Node    == bindparam('_Node'),
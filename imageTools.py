@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+from blobTools import BlobStore
+from PIL import Image
+from cStringIO import StringIO
+import multiprocessing
+import mmap
+import os
+
+THUMBNAILSIZE = (200, 200)
+
+# Width, height and BMP thumbnail of an image held in a string or memory map. The size
+# comes from the image header, and Image.thumbnail sets the JPEG decoder to draft mode
+# so that only as much of the image is decoded as the thumbnail needs.
+def thumbnail(data):
+    image = Image.open(data if isinstance(data, mmap.mmap) else StringIO(data))
+    width, height = image.size
+    image.thumbnail(THUMBNAILSIZE)
+    bmp = StringIO()
+    image.save(bmp, format='BMP')
+    return width, height, bmp.getvalue()
+
+# Thumbnail an image given as data or as a reference into a blob store, so that a worker
+# process can map the blob itself rather than be sent its contents.
+def thumbnailobject(blobobject):
+    blobdirectory, data = blobobject
+    if blobdirectory is not None:
+        data = BlobStore(blobdirectory).open(data)
+    return thumbnail(data)
+
+# Thumbnail made in this process when it is asked for
+class DeferredThumbnail(object):
+    def __init__(self, blobobject):
+        self.blobobject = blobobject
+
+    def get(self):
+        return thumbnailobject(self.blobobject)
+
+# Make thumbnails in a pool of worker processes, so that images are decoded outside this
+# process and alongside whatever it does meanwhile. start() returns a result for each
+# image, whose get() waits for its thumbnail. Windows starts workers by re-running the
+# main script, so there thumbnails are made in this process unless asked otherwise.
+class Thumbnailer(object):
+    def __init__(self, workers=None, blobdirectory=None):
+        if workers is None:
+            workers = multiprocessing.cpu_count() if os.name != 'nt' else 1
+        self.workers = workers
+        self.blobdirectory = blobdirectory
+        self.pool = None
+
+    def start(self, objects):
+        blobobjects = [(self.blobdirectory, data) for data in objects]
+        if self.workers <= 1 or len(blobobjects) <= 1:
+            return [DeferredThumbnail(blobobject) for blobobject in blobobjects]
+
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.workers)
+        return [self.pool.apply_async(thumbnailobject, (blobobject,)) for blobobject in blobobjects]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
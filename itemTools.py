@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+from sqlalchemy import *
+
+# Catalogue of the items of an NVivo project, holding the name, type, parent and
+# hierarchical name of each item by Id. It is loaded in a single query and kept up to
+# date as items are written, so that names can be looked up without a round trip to
+# the database for every item.
+class ItemCatalogue(object):
+    def __init__(self):
+        self.items = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, id):
+        return id in self.items
+
+    # Load every item, taking its parent from the given type of role. Hierarchical names
+    # are only read if asked for, as only NVivo for Mac projects have them.
+    def load(self, con, itemtable, roletable, parentroletype, hierarchical=False):
+        parentrole = roletable.alias(name='CatalogueParentRole')
+        columns = [itemtable.c.Id,
+                   itemtable.c.Name,
+                   itemtable.c.TypeId,
+                   parentrole.c.Item1_Id.label('Parent')]
+        if hierarchical:
+            columns.append(itemtable.c.HierarchicalName)
+
+        for row in con.execute(select(columns).select_from(itemtable.outerjoin(
+                parentrole,
+            and_(
+                parentrole.c.TypeId   == literal_column(parentroletype),
+                parentrole.c.Item2_Id == itemtable.c.Id
+            )))):
+            self.add(row['Id'], row['Name'], row['TypeId'], row['Parent'],
+                     row['HierarchicalName'] if hierarchical else None)
+
+    def add(self, id, name, typeid=None, parent=None, hierarchicalname=None):
+        self.items[id] = {'Name':             name,
+                          'TypeId':           typeid,
+                          'Parent':           parent,
+                          'HierarchicalName': hierarchicalname}
+
+    # Update some of the details of an item, adding it if it is not yet catalogued
+    def update(self, id, **details):
+        item = self.items.get(id)
+        if item is None:
+            self.add(id, details.get('Name'))
+            item = self.items[id]
+        item.update(details)
+
+    # Ids of every item of the given type
+    def ids(self, typeid):
+        typeid = int(typeid)
+        return set(id for id, item in self.items.iteritems() if item['TypeId'] == typeid)
+
+    def get(self, id):
+        return self.items.get(id)
+
+    def name(self, id):
+        item = self.items.get(id)
+        return item['Name'] if item is not None else None
+
+    def parent(self, id):
+        item = self.items.get(id)
+        return item['Parent'] if item is not None else None
+
+    def hierarchicalname(self, id):
+        item = self.items.get(id)
+        return item['HierarchicalName'] if item is not None else None
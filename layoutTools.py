@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+from blobTools import BlobStore
+from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfpage import PDFPage
+from cStringIO import StringIO
+from xml.sax.saxutils import escape
+from array import array
+import itertools
+import multiprocessing
+import mmap
+import os
+import re
+import sys
+
+# Text layout of sources as NVivo stores it in the MetaData column. Layouts are kept
+# as flat arrays of numbers rather than DOM nodes, and written out as XML directly.
+XMLNS = "http://qsr.com.au/XMLSchema.xsd"
+
+# Attributes are written in sorted order, as minidom does, so that the XML is the same
+# as NVivotools has always written.
+def xmlelement(name, attributes):
+    return '<' + name + ''.join(' ' + key + '="' + escape(attributes[key], {'"': '&quot;'}) + '"'
+                                for key in sorted(attributes.keys())) + '/>'
+
+def xmlelements(name, children):
+    xml = ''.join(children)
+    if xml == '':
+        return '<' + name + ' xmlns="' + XMLNS + '"/>'
+    return '<' + name + ' xmlns="' + XMLNS + '">' + xml + '</' + name + '>'
+
+DISPLAYSETTINGSXML = '<DisplaySettings InputPosition="0" xmlns="' + XMLNS + '"/>'
+
+# Index of the paragraphs of a text, as an array of position and length pairs, each
+# paragraph including the line terminator that ends it. The index is found in one pass
+# over the text, and can be packed into a string of little-endian 32-bit integers to
+# be stored.
+class ParagraphIndex(object):
+    def __init__(self, spans=None):
+        self.spans = spans if spans is not None else array('i')
+
+    def __len__(self):
+        return len(self.spans) // 2
+
+    @staticmethod
+    def fromtext(text):
+        spans = array('i')
+        position = 0
+        for line in text.split('\n'):
+            spans.append(position)
+            spans.append(len(line) + 1)
+            position += len(line) + 1
+
+        # The text after the last line terminator is only a paragraph if there is some,
+        # and has no terminator to count.
+        if spans[-1] == 1:
+            del spans[-2:]
+        else:
+            spans[-1] -= 1
+
+        return ParagraphIndex(spans)
+
+    @staticmethod
+    def frompacked(packed):
+        spans = array('i')
+        spans.fromstring(str(packed))
+        if sys.byteorder != 'little':
+            spans.byteswap()
+        return ParagraphIndex(spans)
+
+    def packed(self):
+        spans = array('i', self.spans)
+        if sys.byteorder != 'little':
+            spans.byteswap()
+        return spans.tostring()
+
+    def writexml(self, buffer, style):
+        if not self.spans:
+            buffer.write('<Paragraphs xmlns="' + XMLNS + '"/>')
+            return
+
+        para = '<Para Len="%d" Pos="%d" Style="' + escape(style, {'"': '&quot;'}) + '"/>'
+        buffer.write('<Paragraphs xmlns="' + XMLNS + '">')
+        spans = self.spans
+        for index in xrange(0, len(spans), 2):
+            buffer.write(para % (spans[index + 1], spans[index]))
+        buffer.write('</Paragraphs>')
+
+# Pages of a PDF as an array of length, offset, width and height for each page
+def writepdfpagesxml(buffer, pages):
+    if not pages:
+        buffer.write('<PdfPages xmlns="' + XMLNS + '"/>')
+        return
+
+    buffer.write('<PdfPages xmlns="' + XMLNS + '">')
+    for index in xrange(0, len(pages), 4):
+        buffer.write('<PdfPage PageHeight="%d" PageLength="%d" PageOffset="%d" PageWidth="%d"/>'
+                     % (pages[index + 3], pages[index], pages[index + 1], pages[index + 2]))
+    buffer.write('</PdfPages>')
+
+# Layout of a classification sheet with a row for each classified item and a column for
+# each attribute, all in their given order
+CATEGORYLAYOUTSETTINGS = ('<SortedColumn Ascending="true">-1</SortedColumn>'
+                          '<RecordHeaderWidth>100</RecordHeaderWidth>'
+                          '<ShowRowIDs>true</ShowRowIDs>'
+                          '<ShowColumnIDs>true</ShowColumnIDs>'
+                          '<Transposed>false</Transposed>'
+                          '<NameSource>1</NameSource>'
+                          '<RowsUserOrdered>false</RowsUserOrdered>'
+                          '<ColumnsUserOrdered>true</ColumnsUserOrdered>')
+
+def categorylayoutxml(itemids, attributeids):
+    def cells(name, ids):
+        return (xmlelement(name, {'Guid': str(id).lower(), 'Id': str(index), 'OrderId': str(index),
+                                  'Hidden': 'false', 'Size': '-1'})
+                for index, id in enumerate(ids))
+
+    return xmlelements("CategoryLayout", itertools.chain(cells("Row", itemids), cells("Column", attributeids),
+                                                         [CATEGORYLAYOUTSETTINGS]))
+
+# Extract the text and page layout of a PDF held in a string or memory map. The page
+# length is that of pdfminer's output for the page, and the offset that of the page
+# in the text once single line breaks have been joined.
+def extractpdf(data):
+    pdffile = data if isinstance(data, mmap.mmap) else StringIO(data)
+    pdffile.seek(0)
+
+    rsrcmgr = PDFResourceManager()
+    retstr = StringIO()
+    device = TextConverter(rsrcmgr, retstr, codec='utf-8', laparams=LAParams())
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    pages = array('l')
+    pagestrs = []
+    pageoffset = 0
+    for pdfpage in PDFPage.get_pages(pdffile, password='', check_extractable=True):
+        mediabox = pdfpage.attrs['MediaBox']
+
+        interpreter.process_page(pdfpage)
+        pages.extend([retstr.tell(), pageoffset, int(mediabox[2] - mediabox[0]), int(mediabox[3] - mediabox[1])])
+
+        pagestr = unicode(retstr.getvalue(), 'utf-8')
+        pagestr = re.sub('(?<!\n)\n(?!\n)', ' ', pagestr).replace('\n\n', '\n')
+        retstr.truncate(0)
+        pagestrs.append(pagestr)
+        pageoffset += len(pagestr)
+
+    text = u''.join(pagestrs)
+    return text, pages, ParagraphIndex.fromtext(text)
+
+# Extract a PDF given as data or as a reference into a blob store, so that a worker
+# process can map the blob itself rather than be sent its contents.
+def extractpdfobject(blobobject):
+    blobdirectory, data = blobobject
+    if blobdirectory is not None:
+        data = BlobStore(blobdirectory).open(data)
+    return extractpdf(data)
+
+# Extract PDFs in a pool of worker processes, one PDF to a worker at a time, returning
+# the layouts in the order of the objects. Windows starts workers by re-running the
+# main script, so there PDFs are extracted in this process unless asked otherwise.
+class PdfExtractor(object):
+    def __init__(self, workers=None, blobdirectory=None):
+        if workers is None:
+            workers = multiprocessing.cpu_count() if os.name != 'nt' else 1
+        self.workers = workers
+        self.blobdirectory = blobdirectory
+
+    def extract(self, objects):
+        blobobjects = [(self.blobdirectory, data) for data in objects]
+        if self.workers <= 1 or len(blobobjects) <= 1:
+            return [extractpdfobject(blobobject) for blobobject in blobobjects]
+
+        pool = multiprocessing.Pool(min(self.workers, len(blobobjects)))
+        try:
+            layouts = pool.map(extractpdfobject, blobobjects, chunksize=1)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+        return layouts
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+from sqlalchemy import select, bindparam, and_
+from sqlalchemy.sql.expression import Executable, ClauseElement
+from sqlalchemy.ext.compiler import compiles
+import sys
+
+# Number of rows sent to the database in each executemany batch
+CHUNKSIZE = 1000
+
+# Name of the SQL Anywhere dialect varies between versions of sqlalchemy_sqlany
+SQLANYDIALECTS = {'sqlany', 'sqlalchemy_sqlany'}
+
+# Single statement insert-or-update, compiled to whatever the dialect offers natively.
+class Upsert(Executable, ClauseElement):
+    def __init__(self, table, keycolumns, columns, update):
+        self.table      = table
+        self.keycolumns = keycolumns
+        self.columns    = columns
+        self.update     = update
+
+def upsertbinds(element, compiler, **kw):
+    return [compiler.process(bindparam(column.name, type_=column.type), **kw) for column in element.columns]
+
+@compiles(Upsert, 'sqlite')
+def compile_upsert_sqlite(element, compiler, **kw):
+    quote = compiler.preparer.quote
+    updatecolumns = [column for column in element.columns if column.name not in element.keycolumns]
+    sql = 'INSERT INTO ' + compiler.preparer.format_table(element.table) + \
+          ' (' + ', '.join(quote(column.name) for column in element.columns) + ')' + \
+          ' VALUES (' + ', '.join(upsertbinds(element, compiler, **kw)) + ')' + \
+          ' ON CONFLICT (' + ', '.join(quote(key) for key in element.keycolumns) + ')'
+    if element.update and updatecolumns:
+        sql += ' DO UPDATE SET ' + ', '.join(quote(column.name) + ' = excluded.' + quote(column.name)
+                                             for column in updatecolumns)
+    else:
+        sql += ' DO NOTHING'
+    return sql
+
+@compiles(Upsert, 'mssql')
+def compile_upsert_mssql(element, compiler, **kw):
+    quote = compiler.preparer.quote
+    updatecolumns = [column for column in element.columns if column.name not in element.keycolumns]
+    sql = 'MERGE INTO ' + compiler.preparer.format_table(element.table) + ' AS target' + \
+          ' USING (SELECT ' + ', '.join(bind + ' AS ' + quote(column.name)
+                                       for bind, column in zip(upsertbinds(element, compiler, **kw), element.columns)) + \
+          ') AS source ON ' + ' AND '.join('target.' + quote(key) + ' = source.' + quote(key)
+                                            for key in element.keycolumns)
+    if element.update and updatecolumns:
+        sql += ' WHEN MATCHED THEN UPDATE SET ' + ', '.join('target.' + quote(column.name) + ' = source.' + quote(column.name)
+                                                             for column in updatecolumns)
+    sql += ' WHEN NOT MATCHED THEN INSERT (' + ', '.join(quote(column.name) for column in element.columns) + ')' + \
+           ' VALUES (' + ', '.join('source.' + quote(column.name) for column in element.columns) + ');'
+    return sql
+
+def compile_upsert_sqlany(element, compiler, **kw):
+    # ON EXISTING matches on the primary key, which is why the native path is only
+    # used when the merge columns are exactly the primary key.
+    quote = compiler.preparer.quote
+    return 'INSERT INTO ' + compiler.preparer.format_table(element.table) + \
+           ' (' + ', '.join(quote(column.name) for column in element.columns) + ')' + \
+           ' ON EXISTING ' + ('UPDATE' if element.update else 'SKIP') + \
+           ' VALUES (' + ', '.join(upsertbinds(element, compiler, **kw)) + ')'
+
+for dialectname in SQLANYDIALECTS:
+    compiles(Upsert, dialectname)(compile_upsert_sqlany)
+
+# Execute a statement over a list of parameter sets in bounded batches
+def executemany(conn, statement, rows, chunksize=CHUNKSIZE):
+    for start in range(0, len(rows), chunksize):
+        conn.execute(statement, rows[start:start+chunksize])
+
+# Test whether the dialect-native upsert can be used for this table and key
+def nativeupsert(conn, table, columns):
+    if set(columns) != set(column.name for column in table.primary_key.columns):
+        return False
+
+    dialect = conn.dialect
+    if dialect.name == 'sqlite':
+        # ON CONFLICT clause appeared in SQLite 3.24
+        return getattr(dialect.dbapi, 'sqlite_version_info', (0,)) >= (3, 24, 0)
+    else:
+        return dialect.name == 'mssql' or dialect.name in SQLANYDIALECTS
+
+def rowkey(row, columns):
+    return tuple(row[column] for column in columns)
+
+# Delete rows whose key is not in keys, returning the set of keys that were present.
+# Used directly when data is written in several batches and so cannot be replaced
+# in one call.
+def delete_other_keys(conn, table, columns, keys, verbosity):
+    curkeys = set(tuple(row) for row in conn.execute(select([table.c[column] for column in columns])))
+    keystodelete = [{'_' + column:value for column, value in zip(columns, key)}
+                        for key in curkeys - keys]
+    if len(keystodelete) > 0:
+        if verbosity > 1:
+            print("Deleting " + str(len(keystodelete)) + " rows from " + table.name, file=sys.stderr)
+        delete = table.delete(and_(*[table.c[column] == bindparam('_' + column) for column in columns]))
+        executemany(conn, delete, keystodelete)
+
+    return curkeys
+
+# Generic merge/overwrite/replace function
+#
+# merge     - insert rows whose key is not already present
+# overwrite - as merge, but also update rows whose key is present
+# replace   - as overwrite, but also delete rows whose key is not in data
+def merge_overwrite_or_replace(conn, table, columns, data, operation, verbosity):
+    if operation == 'skip':
+        return
+
+    curkeys = None
+    if operation == 'replace':
+        curkeys = delete_other_keys(conn, table, columns, set(rowkey(row, columns) for row in data), verbosity)
+
+    if len(data) == 0:
+        return
+
+    if nativeupsert(conn, table, columns):
+        if verbosity > 1:
+            print("Upserting " + str(len(data)) + " rows into " + table.name, file=sys.stderr)
+        # As with table.insert(), the columns are taken from the keys of the first row
+        upsert = Upsert(table, columns,
+                        [column for column in table.columns if column.name in data[0]],
+                        operation == 'overwrite' or operation == 'replace')
+        executemany(conn, upsert, data)
+        return
+
+    if curkeys is None:
+        curkeys = set(tuple(row) for row in conn.execute(select([table.c[column] for column in columns])))
+
+    if operation == 'overwrite' or operation == 'replace':
+        rowstoupdate = [row for row in data if rowkey(row, columns) in curkeys]
+        if len(rowstoupdate) > 0:
+            if verbosity > 1:
+                print("Updating " + str(len(rowstoupdate)) + " rows in " + table.name, file=sys.stderr)
+            for row in rowstoupdate:
+                for column in columns:
+                    row['_' + column] = row[column]
+            update = table.update(and_(*[table.c[column] == bindparam('_' + column) for column in columns]))
+            executemany(conn, update, rowstoupdate)
+
+    rowstoinsert = [row for row in data if rowkey(row, columns) not in curkeys]
+    if len(rowstoinsert) > 0:
+        if verbosity > 1:
+            print("Inserting " + str(len(rowstoinsert)) + " rows into " + table.name, file=sys.stderr)
+        executemany(conn, table.insert(), rowstoinsert)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import re
+import sys
+
+# NVivo for Windows stores names, descriptions and attribute values with every
+# character shifted up by this offset.
+CHAROFFSET = 0x377
+
+def shiftcode(code, offset):
+    shifted = code + offset
+    return shifted if 0 <= shifted <= sys.maxunicode else code
+
+# Translation tables covering the Basic Multilingual Plane and whatever it encodes to.
+# Characters that would be shifted out of range, such as those below the offset when
+# decoding, are mapped to themselves. unicode.translate leaves characters beyond the
+# end of a table unchanged, so text with any of those is shifted character by character.
+class ShiftTable(object):
+    def __init__(self, offset, size):
+        self.offset = offset
+        self.table  = [shiftcode(code, offset) for code in xrange(size)]
+        self.beyond = re.compile(u'[' + unichr(size) + u'-' + unichr(sys.maxunicode) + u']') if size <= sys.maxunicode else None
+
+    def translate(self, text):
+        if self.beyond is not None and self.beyond.search(text):
+            return u''.join(unichr(shiftcode(ord(character), self.offset)) for character in text)
+        return text.translate(self.table)
+
+DECODETABLE = ShiftTable(-CHAROFFSET, 0x10000 + CHAROFFSET)
+ENCODETABLE = ShiftTable(CHAROFFSET, 0x10000)
+
+# Byte strings are treated character by character, as the old ord()/chr() shifting did
+def decodename(text):
+    if text is None:
+        return None
+    if not isinstance(text, unicode):
+        text = unicode(text, 'latin-1')
+    return DECODETABLE.translate(text)
+
+def encodename(text):
+    if text is None:
+        return None
+    if not isinstance(text, unicode):
+        text = unicode(text, 'latin-1')
+    return ENCODETABLE.translate(text)
+
+# Decode or encode the given columns of every row of a result list in place
+def decodenames(rows, columns):
+    for row in rows:
+        for column in columns:
+            row[column] = decodename(row[column])
+
+def encodenames(rows, columns):
+    for row in rows:
+        for column in columns:
+            row[column] = encodename(row[column])
+
+# Encode a SQL LIKE pattern, leaving the % and _ wildcards unchanged
+def encodepattern(pattern):
+    if pattern is None:
+        return None
+    return u''.join(character if character in u'%_' else encodename(character) for character in unicode(pattern))
+
+# Check that every character survives encoding and decoding
+if __name__ == '__main__':
+    for start in xrange(0, sys.maxunicode + 1, 0x10000):
+        text = u''.join(unichr(code) for code in xrange(start, min(start + 0x10000, sys.maxunicode + 1 - CHAROFFSET)))
+        if decodename(encodename(text)) != text:
+            raise RuntimeError("ERROR: Characters from " + hex(start) + " do not survive encoding and decoding.")
+    print("Encoding and decoding round trip for every character.")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+
+# Tree of nodes, each a dictionary with at least 'Id', 'Name' and 'Parent', indexed
+# by Id and by parent so that the tree can be walked without searching the whole
+# list of nodes at every level. Walks are iterative, so deep trees don't run into
+# the recursion limit. Nodes are kept in their original order among their siblings.
+class NodeTree(object):
+    def __init__(self, nodes=[]):
+        self.nodes = {}
+        self.childnodes = {}
+        self.names = None
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, id):
+        return id in self.nodes
+
+    def add(self, node):
+        self.nodes[node['Id']] = node
+        self.childnodes.setdefault(node['Parent'], []).append(node)
+        if self.names is not None:
+            self.names.setdefault(node['Name'], node)
+
+    def get(self, id):
+        return self.nodes.get(id)
+
+    def children(self, parent):
+        return self.childnodes.get(parent, [])
+
+    # Move a node to a new parent, where it becomes the last of its siblings
+    def setparent(self, id, parent):
+        node = self.nodes[id]
+        self.childnodes[node['Parent']].remove(node)
+        node['Parent'] = parent
+        self.childnodes.setdefault(parent, []).append(node)
+
+    # First node with the given name, if any
+    def find(self, name):
+        if self.names is None:
+            self.names = {}
+            for node in self.nodes.itervalues():
+                self.names.setdefault(node['Name'], node)
+        return self.names.get(name)
+
+    # Ids of the ancestors of a node that are in the tree, nearest first
+    def ancestors(self, id):
+        ancestors = []
+        node = self.nodes.get(id)
+        while node is not None and node['Parent'] is not None and node['Parent'] not in ancestors:
+            ancestors.append(node['Parent'])
+            node = self.nodes.get(node['Parent'])
+        return ancestors
+
+    # Nodes below a parent, or below the top of the tree, each before its children, with
+    # their depths below the parent. Nodes in a cycle are never reached.
+    def walk(self, parent=None):
+        stack = [(child, 0) for child in reversed(self.children(parent))]
+        while stack:
+            node, depth = stack.pop()
+            yield node, depth
+            stack.extend((child, depth + 1) for child in reversed(self.children(node['Id'])))
+
+    # Fill in the role tag, top parent and list of nodes aggregating each node as NVivo
+    # wants them. Tags number the children of each parent from the depth shifted into
+    # the high word. A node aggregates to itself and to the chain of its ancestors for
+    # as long as each aggregates its children.
+    # JS This might be NQR. Not sure whether node should aggregate to itself -
+    # might depend on NVivo version?
+    def tag(self):
+        nexttag = {}
+        for node, depth in self.walk():
+            node['RoleTag'] = nexttag.get(node['Parent'], depth << 16)
+            nexttag[node['Parent']] = node['RoleTag'] + 1
+            if node['Aggregate'] is None:
+                node['Aggregate'] = False
+
+            parent = self.nodes.get(node['Parent'])
+            if parent is None:
+                node['TopParent']     = node['Id']
+                node['AggregateList'] = [node['Id']]
+            else:
+                node['TopParent']     = parent['TopParent']
+                node['AggregateList'] = [node['Id']] + (parent['AggregateList'] if parent['Aggregate'] else [])
+
+    # Fill in hierarchical names, joining the names of ancestors with a separator. Nodes
+    # whose parents are not in the tree take the parent's hierarchical name from a
+    # function if it knows it, otherwise they are at the top and take the given prefix.
+    def hierarchicalnames(self, prefix, separator, parentname=lambda id: None):
+        for parent, children in self.childnodes.iteritems():
+            if parent is not None and parent in self.nodes:
+                continue
+
+            parenthierarchicalname = parentname(parent) if parent is not None else None
+            for child in children:
+                if parenthierarchicalname is None:
+                    child['HierarchicalName'] = prefix + child['Name']
+                else:
+                    child['HierarchicalName'] = parenthierarchicalname + separator + child['Name']
+                for node, depth in self.walk(child['Id']):
+                    node['HierarchicalName'] = self.nodes[node['Parent']]['HierarchicalName'] + separator + node['Name']
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+from array import array
+from bisect import bisect_left
+import re
+
+# NVivo for Mac counts every character except white space, but does count non-breaking
+# spaces.
+MACCOUNTEDCHAR = re.compile(u'\\S|\xa0', re.UNICODE)
+# Two-character line terminator in NVivo for Windows text
+CRLF = re.compile('\r\n')
+# Line terminator in normalised text that NVivo for Windows writes as \r\n
+LONELF = re.compile('(?<=[^\r])\n')
+
+# Offset index over the text of a single source. Each table is a sorted array of the
+# positions of one kind of character, so that the number of such characters before
+# any position, and the position of the n'th such character, are found by binary
+# search. Tables are only built when first needed.
+class SourceOffsets(object):
+    def __init__(self, text):
+        self.text     = text or u''
+        self.maccount = None
+        self.crlf     = None
+        self.lonelf   = None
+
+    def positions(self, regex):
+        return array('l', (match.start() for match in regex.finditer(self.text)))
+
+    # Position in the text of the character counted by NVivo for Mac with the given
+    # index. Beyond the end of the text every position is counted.
+    def macposition(self, index):
+        if index < len(self.maccount):
+            return self.maccount[index]
+        else:
+            return len(self.text) + index - len(self.maccount)
+
+    # NVivo for Mac StartText and LengthText to normalised (0-based) StartX and LengthX
+    def fromMac(self, starttext, lengthtext):
+        if starttext is None or lengthtext is None:
+            return starttext, lengthtext
+        if self.maccount is None:
+            self.maccount = self.positions(MACCOUNTEDCHAR)
+
+        startx = self.macposition(starttext)
+        if lengthtext > 0:
+            lengthx = self.macposition(starttext + lengthtext - 1) + 1 - startx
+        else:
+            lengthx = 0
+        return startx, lengthx
+
+    # Number of characters counted by NVivo for Mac before the given position
+    def maccountbefore(self, position):
+        return bisect_left(self.maccount, position) + max(0, position - len(self.text))
+
+    # Normalised (0-based) StartX and LengthX to NVivo for Mac StartText and LengthText
+    def toMac(self, startx, lengthx):
+        if self.maccount is None:
+            self.maccount = self.positions(MACCOUNTEDCHAR)
+
+        starttext = self.maccountbefore(startx)
+        return starttext, self.maccountbefore(startx + lengthx) - starttext
+
+    # NVivo for Windows StartX and LengthX, where the text has \r\n line terminators,
+    # to normalised StartX and LengthX
+    def fromWindows(self, startx, lengthx):
+        if startx is None or lengthx is None:
+            return startx, lengthx
+        if self.crlf is None:
+            self.crlf = self.positions(CRLF)
+
+        # Count only line terminators that lie wholly before/within the range
+        before = bisect_left(self.crlf, startx - 1)
+        within = bisect_left(self.crlf, startx + lengthx - 1) - before
+        return startx - before, lengthx - within
+
+    # Normalised StartX and LengthX to NVivo for Windows StartX and LengthX
+    def toWindows(self, startx, lengthx):
+        if self.lonelf is None:
+            self.lonelf = self.positions(LONELF)
+
+        before = bisect_left(self.lonelf, startx)
+        within = bisect_left(self.lonelf, startx + lengthx) - before
+        return startx + before, lengthx + within
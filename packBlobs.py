@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import os
+import sys
+import argparse
+import shutil
+from NVivoNorm import NVivoNorm
+from blobTools import BlobStore, blobdirectory, isblobref
+from sqlalchemy import *
+
+def packBlobs(arglist):
+
+    parser = argparse.ArgumentParser(description='Move source objects and thumbnails of a normalised file between its blob store and the file itself.')
+
+    parser.add_argument('-v', '--verbosity',  type=int, default=1)
+
+    parser.add_argument('-u', '--unpack', action='store_true',
+                        help='Move objects and thumbnails into the blob store, rather than packing them back into the file.')
+
+    parser.add_argument('normFile', type=str)
+
+    args = parser.parse_args(arglist)
+
+    try:
+        norm = NVivoNorm(args.normFile, rawblobs=True)
+        if args.unpack and norm.blobs is None:
+            norm.blobs = BlobStore(blobdirectory(args.normFile))
+        if norm.blobs is None:
+            if args.verbosity > 0:
+                print("Normalised file has no blob store.", file=sys.stderr)
+            return
+
+        norm.begin()
+
+        # Sources are done one at a time so that only one object is in memory at once
+        sourceids = [row['Id'] for row in norm.con.execute(select([norm.Source.c.Id]))]
+        moved = 0
+        refs = set()
+        for sourceid in sourceids:
+            source = norm.con.execute(select([
+                    norm.Source.c.Object,
+                    norm.Source.c.Thumbnail
+                ]).where(
+                    norm.Source.c.Id == bindparam('Id')
+                ), {'Id': sourceid}).first()
+
+            values = {}
+            for column in ['Object', 'Thumbnail']:
+                if args.unpack:
+                    value = norm.blobs.put(source[column])
+                    if value is not None:
+                        refs.add(value)
+                    if value != source[column]:
+                        values[column] = value
+                elif isblobref(source[column]):
+                    values[column] = norm.blobs.read(source[column])
+
+            if values:
+                norm.con.execute(norm.Source.update(
+                        norm.Source.c.Id == bindparam('_Id')
+                    ).values(values), {'_Id': sourceid})
+                moved += 1
+
+        norm.commit()
+
+        if args.verbosity > 0:
+            print(("Unpacked " if args.unpack else "Packed ") + str(moved) + " source(s).", file=sys.stderr)
+
+        # Remove blobs that are no longer referenced, or the whole store once packed
+        if args.unpack:
+            for ref in list(norm.blobs.refs()):
+                if ref not in refs:
+                    if args.verbosity > 1:
+                        print("Removing unreferenced blob " + ref, file=sys.stderr)
+                    norm.blobs.remove(ref)
+        else:
+            shutil.rmtree(norm.blobs.directory)
+            norm.blobs = None
+
+        del norm
+
+    except:
+        raise
+        norm.rollback()
+        del norm
+
+if __name__ == '__main__':
+    packBlobs(None)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import threading
+import Queue
+import sys
+
+# Number of writes each phase may have waiting before it blocks
+QUEUESIZE = 4
+
+# A phase is a function taking a single argument, write, which it calls as
+# write(function, *arguments) for every change it makes to the output database.
+#
+# Run the phases one after another, making each write as it is requested.
+def run_sequential(phases):
+    def write(function, *arguments):
+        function(*arguments)
+
+    for phase in phases:
+        phase(write)
+
+class PipelineStopped(Exception):
+    pass
+
+# Run every phase in its own worker thread. Writes are queued and made by the calling
+# thread, which drains the queue of each phase in turn, so the writes are made in
+# exactly the order that run_sequential would make them. Phases that depend on the
+# results of earlier phases must wait for them themselves.
+def run_pipeline(phases, queuesize=QUEUESIZE):
+    stop = threading.Event()
+    queues = [Queue.Queue(queuesize) for phase in phases]
+
+    def put(queue, item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return
+            except Queue.Full:
+                pass
+        raise PipelineStopped()
+
+    def worker(phase, queue):
+        try:
+            phase(lambda function, *arguments: put(queue, ('write', function, arguments)))
+            put(queue, ('done',))
+        except PipelineStopped:
+            pass
+        except:
+            put(queue, ('error', sys.exc_info()))
+
+    threads = [threading.Thread(target=worker, args=(phase, queue)) for phase, queue in zip(phases, queues)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    try:
+        for queue in queues:
+            while True:
+                item = queue.get()
+                if item[0] == 'write':
+                    item[1](*item[2])
+                elif item[0] == 'done':
+                    break
+                else:
+                    exctype, excvalue, exctraceback = item[1]
+                    raise exctype, excvalue, exctraceback
+    finally:
+        stop.set()
+
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+from xml.parsers import expat
+import xml.etree.cElementTree as ElementTree
+
+# Properties whose values are converted from strings
+TYPEDPROPERTIES = {
+    'DataType':    int,
+    'Length':      int,
+    'PDFChecksum': long
+}
+
+# The same few Properties documents recur across a whole project, so results are
+# kept by content. Callers must not modify the dictionaries that are returned. Should
+# a project have more distinct documents than this, the caches are emptied and start
+# again rather than growing without limit.
+CACHESIZE = 1024
+propertiescache = {}
+xmlcache = {}
+
+def cacheresult(cache, key, value):
+    if len(cache) >= CACHESIZE:
+        cache.clear()
+    cache[key] = value
+
+def xmlbytes(xml):
+    return xml.encode('utf-8') if isinstance(xml, unicode) else xml
+
+# Decode the Properties column of an ExtendedItem, for example
+#   <Properties xmlns="http://qsr.com.au/XMLSchema.xsd"><Property Key="DataType" Value="0"/>...
+# into a dictionary of property values keyed by property key.
+def decodeproperties(xml):
+    if not xml:
+        return {}
+
+    properties = propertiescache.get(xml)
+    if properties is None:
+        properties = {}
+        def startelement(name, attributes):
+            if name == 'Property':
+                key   = attributes.get('Key')
+                value = attributes.get('Value')
+                convert = TYPEDPROPERTIES.get(key)
+                if convert is not None and value is not None:
+                    try:
+                        value = convert(value)
+                    except ValueError:
+                        pass
+                properties[key] = value
+
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = startelement
+        parser.Parse(xmlbytes(xml), True)
+        cacheresult(propertiescache, xml, properties)
+
+    return properties
+
+# Parse an XML column, such as Properties or Layout, into an ElementTree element. Only
+# Properties documents are kept, as other documents such as Layouts are mostly unique.
+def parsexml(xml):
+    element = xmlcache.get(xml)
+    if element is None:
+        element = ElementTree.fromstring(xmlbytes(xml))
+        if localname(element.tag) == 'Properties':
+            cacheresult(xmlcache, xml, element)
+
+    return element
+
+def localname(tag):
+    return tag.rsplit('}', 1)[-1]
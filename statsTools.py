@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+from sqlalchemy import event
+import threading
+import time
+import json
+import sys
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Functions called as hook(event) for every event recorded, where event is a dictionary
+# whose 'Event' is 'phase' at the end of each phase and 'conversion' at the end of the
+# whole conversion. Job runners can append to this list to scrape the statistics.
+hooks = []
+
+DMLSTATEMENTS = {'INSERT', 'UPDATE', 'DELETE', 'MERGE'}
+
+# Peak resident set size of the process so far, in bytes
+def peakrss():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+def newrecord(name):
+    return {
+        'Phase':       name,
+        'WallTime':    0.0,
+        'RowsRead':    0,
+        'RowsWritten': 0,
+        'BlobBytes':   0,
+        'Statements':  0,
+        'PeakRSS':     None
+    }
+
+# Statistics for one conversion. Statements and rows written are counted by listening
+# to the given engines; rows read and blob bytes are reported by the conversion itself.
+# The current phase is kept per thread, so that phases may run in parallel.
+class ConversionStats(object):
+    def __init__(self, conversion, engines, statsfile=None):
+        self.conversion = conversion
+        self.engines    = [engine for engine in engines if engine is not None]
+        self.statsfile  = statsfile
+        self.phases     = []
+        self.total      = newrecord(None)
+        self.lock       = threading.Lock()
+        self.local      = threading.local()
+        self.started    = time.time()
+
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self.beforeexecute)
+
+    def beforeexecute(self, conn, cursor, statement, parameters, context, executemany):
+        records = [self.total]
+        phase = getattr(self.local, 'phase', None)
+        if phase is not None:
+            records.append(phase)
+
+        written = 0
+        words = statement.split(None, 1)
+        if words and words[0].upper() in DMLSTATEMENTS:
+            written = len(parameters) if executemany else 1
+
+        with self.lock:
+            for record in records:
+                record['Statements']  += 1
+                record['RowsWritten'] += written
+
+    # Start a phase, ending any phase already running in this thread
+    def begin(self, name):
+        self.end()
+        self.local.phase = newrecord(name)
+        self.local.phasestarted = time.time()
+        with self.lock:
+            self.phases.append(self.local.phase)
+
+    def end(self):
+        phase = getattr(self.local, 'phase', None)
+        if phase is None:
+            return
+
+        phase['WallTime'] = time.time() - self.local.phasestarted
+        phase['PeakRSS']  = peakrss()
+        self.local.phase = None
+        self.emit(dict(phase, Event='phase', Conversion=self.conversion))
+
+    # Run a phase function of the kind used by pipelineTools, recording it as a phase.
+    # Writes, which may be made by another thread, are counted against the phase too.
+    def wrap(self, name, phasefunction):
+        def wrappedphase(write):
+            self.begin(name)
+            def wrappedwrite(function, *arguments):
+                write(self.inphase(function), *arguments)
+            try:
+                phasefunction(wrappedwrite)
+            finally:
+                self.end()
+
+        return wrappedphase
+
+    # Wrap a function so that what it does is counted against the phase running in this
+    # thread, whichever thread it is called from
+    def inphase(self, function):
+        phase = getattr(self.local, 'phase', None)
+        def phasefunction(*arguments):
+            previous = getattr(self.local, 'phase', None)
+            self.local.phase = phase
+            try:
+                return function(*arguments)
+            finally:
+                self.local.phase = previous
+
+        return phasefunction
+
+    # Count rows read by the current phase, returning the rows for convenience
+    def read(self, rows):
+        self.add('RowsRead', len(rows))
+        return rows
+
+    def blobbytes(self, count):
+        self.add('BlobBytes', count)
+
+    def add(self, key, count):
+        records = [self.total]
+        phase = getattr(self.local, 'phase', None)
+        if phase is not None:
+            records.append(phase)
+        with self.lock:
+            for record in records:
+                record[key] += count
+
+    def emit(self, statsevent):
+        for hook in hooks:
+            hook(statsevent)
+
+    # End the conversion, writing the statistics to the stats file if there is one
+    def close(self):
+        self.end()
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self.beforeexecute)
+
+        self.total['WallTime'] = time.time() - self.started
+        self.total['PeakRSS']  = peakrss()
+        summary = {
+            'Conversion': self.conversion,
+            'Total':      dict((key, value) for key, value in self.total.iteritems() if key != 'Phase'),
+            'Phases':     self.phases
+        }
+        self.emit(dict(summary, Event='conversion'))
+
+        if self.statsfile is not None:
+            with open(self.statsfile, 'w') as statsfile:
+                json.dump(summary, statsfile, indent=2, sort_keys=True)
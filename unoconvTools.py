@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Jonathan Schultz
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import os
+import sys
+import subprocess
+import tempfile
+import shutil
+import socket
+import signal
+import threading
+import atexit
+import Queue
+import time
+
+# Seconds to wait for a LibreOffice listener to start accepting connections
+LISTENERTIMEOUT = 60
+
+# Find unoconv, looking first on path for OS installed version, otherwise use our copy
+def unoconvcommand(helperpath):
+    for path in os.environ["PATH"].split(os.pathsep) + [helperpath]:
+        unoconvpath = os.path.join(path, 'unoconv')
+        if os.path.exists(unoconvpath):
+            if os.access(unoconvpath, os.X_OK) and '' in os.environ.get("PATHEXT", "").split(os.pathsep):
+                return [unoconvpath]
+            else:
+                return ['python', unoconvpath]
+
+    raise RuntimeError("Can't find unoconv on path. Please refer to the NVivotools README file.")
+
+# A converter is any object with these members, so that a fake converter can be used
+# in place of LibreOffice:
+#
+#   convert(data, informat, outformat) turns a document from one format into another.
+#       The input format is a file extension such as 'DOCX' or 'TXT', and the output
+#       format a unoconv format name such as 'text', 'doc' or 'odt'. The data is a
+#       string or buffer and the result a string.
+#   workers is the number of conversions that it is worth running at the same time, as
+#       convert() may be called from several threads at once.
+#   close() stops whatever the converter has started.
+
+# Run unoconv on a document, returning what it writes to standard output. The input
+# still goes through a temporary file, as LibreOffice works out its format from the
+# file extension.
+def unoconv(command, data, informat, outformat):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        infilename = os.path.join(tmpdir, 'source.' + informat)
+        with open(infilename, 'wb') as infile:
+            infile.write(data)
+
+        p = subprocess.Popen(command + ['--format=' + outformat, '--stdout', infilename],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = p.communicate()
+        if p.returncode != 0 or err != '':
+            raise RuntimeError("unoconv invocation error: " + str(command) + "\n" + err)
+
+        return out
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+# Converter that runs a fresh unoconv, and so a fresh LibreOffice, for each conversion
+class UnoconvConverter(object):
+    def __init__(self, helperpath):
+        self.helperpath = helperpath
+        self.workers = 1
+        self.command = None
+
+    def convert(self, data, informat, outformat):
+        if self.command is None:
+            self.command = unoconvcommand(self.helperpath)
+
+        return unoconv(self.command, data, informat, outformat)
+
+    def close(self):
+        pass
+
+# Converter that keeps a number of LibreOffice listeners running, each with its own
+# port and user profile, and sends each conversion to whichever listener is free.
+# The listeners are started by the first conversion and stopped by close(), or when
+# the program exits.
+class UnoconvPool(object):
+    def __init__(self, helperpath, servers=1, verbosity=1):
+        self.helperpath = helperpath
+        self.workers    = servers
+        self.verbosity  = verbosity
+        self.command    = None
+        self.listeners  = []
+        self.ports      = Queue.Queue()
+        self.lock       = threading.RLock()
+        self.registered = False
+
+    def start(self):
+        command = unoconvcommand(self.helperpath)
+        # Restarting after close() needs no further exit handler
+        if not self.registered:
+            atexit.register(self.close)
+            self.registered = True
+        for server in range(self.workers):
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.bind(('127.0.0.1', 0))
+            port = str(s.getsockname()[1])
+            s.close()
+
+            profile = tempfile.mkdtemp()
+            errors  = tempfile.TemporaryFile()
+            if self.verbosity > 1:
+                print("Starting LibreOffice listener on port " + port, file=sys.stderr)
+            listener = subprocess.Popen(command + ['--listener', '--server=127.0.0.1', '--port=' + port,
+                                                   '--user-profile=' + profile],
+                                        stdout=open(os.devnull, 'wb'), stderr=errors,
+                                        preexec_fn=os.setsid if os.name != 'nt' else None)
+            self.listeners.append((listener, port, profile, errors))
+
+        try:
+            for listener, port, profile, errors in self.listeners:
+                self.waitfor(listener, port, errors)
+                self.ports.put(port)
+        except:
+            self.close()
+            raise
+
+        self.command = command
+
+    def waitfor(self, listener, port, errors):
+        deadline = time.time() + LISTENERTIMEOUT
+        while time.time() < deadline:
+            if listener.poll() is not None:
+                errors.seek(0)
+                raise RuntimeError("LibreOffice listener on port " + port + " failed to start: " + errors.read())
+            try:
+                socket.create_connection(('127.0.0.1', int(port)), 1).close()
+                return
+            except socket.error:
+                time.sleep(0.2)
+
+        raise RuntimeError("LibreOffice listener on port " + port + " did not start.")
+
+    def convert(self, data, informat, outformat):
+        with self.lock:
+            if self.command is None:
+                self.start()
+
+        port = self.ports.get()
+        try:
+            return unoconv(self.command + ['--no-launch', '--server=127.0.0.1', '--port=' + port],
+                           data, informat, outformat)
+        finally:
+            self.ports.put(port)
+
+    def close(self):
+        with self.lock:
+            for listener, port, profile, errors in self.listeners:
+                if listener.poll() is None:
+                    if os.name != 'nt':
+                        os.killpg(listener.pid, signal.SIGTERM)
+                    else:
+                        listener.terminate()
+                    listener.wait()
+                errors.close()
+                shutil.rmtree(profile, ignore_errors=True)
+            self.listeners = []
+            self.ports     = Queue.Queue()
+            self.command   = None